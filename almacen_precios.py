@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from instrumentacion import instrumentacion
+
+# Tiempo de vida de los precios en memoria (15 minutos)
+TTL_SEGUNDOS = int(os.environ.get("SIMULADOR_TTL_PRECIOS", str(15 * 60)))
+
+# Memoria máxima que pueden ocupar los precios en memoria (256 MB)
+MEMORIA_MAXIMA_BYTES = int(os.environ.get("SIMULADOR_MEMORIA_PRECIOS", str(256 * 1024 * 1024)))
+
+def _tamano(datos):
+    """Estima los bytes que ocupa un DataFrame de precios."""
+    if datos is None:
+        return 0
+    try:
+        return int(datos.memory_usage(index=True, deep=False).sum())
+    except Exception:
+        return 0
+
+class AlmacenPrecios:
+    """
+    Almacén de precios compartido por todas las sesiones del proceso.
+
+    Guarda los precios de cada ticker durante TTL_SEGUNDOS y descarta los menos
+    usados recientemente cuando se supera MEMORIA_MAXIMA_BYTES. Si varias sesiones
+    piden a la vez un ticker que no está en memoria, solo se hace una descarga y
+    las demás esperan su resultado.
+    """
+
+    def __init__(self, cargar_lote, ttl_segundos=TTL_SEGUNDOS, memoria_maxima_bytes=MEMORIA_MAXIMA_BYTES):
+        self._cargar_lote = cargar_lote
+        self.ttl_segundos = ttl_segundos
+        self.memoria_maxima_bytes = memoria_maxima_bytes
+        self._entradas = OrderedDict()  # ticker -> (instante, datos, bytes)
+        self._en_curso = {}  # ticker -> Future de la descarga en curso
+        self._oyentes = []  # funciones a las que se avisa con los tickers recién descargados
+        self._memoria = 0
+        self._candado = threading.Lock()
+
+    def obtener(self, tickers):
+        """
+        Devuelve los precios históricos de varios tickers.
+
+        Returns:
+        dict: DataFrame de precios por ticker (None si no se pudo descargar).
+        """
+        tickers = list(dict.fromkeys(tickers))
+        precios = {}
+        esperar = {}
+        propios = {}
+        ahora = time.monotonic()
+
+        with self._candado:
+            for ticker in tickers:
+                entrada = self._entradas.get(ticker)
+                if entrada is not None and ahora - entrada[0] <= self.ttl_segundos:
+                    self._entradas.move_to_end(ticker)
+                    precios[ticker] = entrada[1]
+                elif ticker in self._en_curso:
+                    esperar[ticker] = self._en_curso[ticker]
+                else:
+                    propios[ticker] = self._en_curso[ticker] = Future()
+
+        instrumentacion.registrar_cache('almacen_precios', aciertos=len(precios) + len(esperar), fallos=len(propios))
+        if propios:
+            try:
+                descargados = self._cargar_lote(list(propios))
+            except Exception as e:
+                print(f"Error al descargar datos para {', '.join(propios)}: {e}")
+                instrumentacion.registrar_fallo('almacen_precios', e)
+                descargados = {}
+            with self._candado:
+                for ticker, futuro in propios.items():
+                    datos = descargados.get(ticker)
+                    if datos is not None:
+                        self._guardar(ticker, datos)
+                    del self._en_curso[ticker]
+                    futuro.set_result(datos)
+                    precios[ticker] = datos
+            self._avisar([ticker for ticker in propios if descargados.get(ticker) is not None])
+
+        for ticker, futuro in esperar.items():
+            precios[ticker] = futuro.result()
+
+        return {ticker: precios.get(ticker) for ticker in tickers}
+
+    def al_actualizar(self, funcion):
+        """
+        Registra una función a la que se llama con la lista de tickers cada vez que se
+        descargan (por primera vez o porque caducaron), para que quien haya calculado
+        algo a partir de sus precios lo descarte.
+        """
+        self._oyentes.append(funcion)
+
+    def _avisar(self, tickers):
+        """Avisa a los oyentes de los tickers recién descargados (sin el candado tomado)."""
+        if not tickers:
+            return
+        for funcion in self._oyentes:
+            try:
+                funcion(tickers)
+            except Exception as e:
+                print(f"Error al avisar de la actualización de {', '.join(tickers)}: {e}")
+                instrumentacion.registrar_fallo('almacen_precios', e)
+
+    def _guardar(self, ticker, datos):
+        """Guarda un ticker y descarta los menos usados si se supera la memoria máxima (con el candado tomado)."""
+        anterior = self._entradas.pop(ticker, None)
+        if anterior is not None:
+            self._memoria -= anterior[2]
+        tamano = _tamano(datos)
+        self._entradas[ticker] = (time.monotonic(), datos, tamano)
+        self._memoria += tamano
+        while self._memoria > self.memoria_maxima_bytes and len(self._entradas) > 1:
+            _, (_, _, tamano_descartado) = self._entradas.popitem(last=False)
+            self._memoria -= tamano_descartado
+
+    def invalidar(self, tickers=None):
+        """Descarta de memoria los tickers indicados (o todos)."""
+        with self._candado:
+            for ticker in list(self._entradas) if tickers is None else tickers:
+                entrada = self._entradas.pop(ticker, None)
+                if entrada is not None:
+                    self._memoria -= entrada[2]
+
+    @property
+    def memoria(self):
+        """Bytes ocupados actualmente por los precios en memoria."""
+        return self._memoria
@@ -0,0 +1,300 @@
+"""
+API HTTP de solo lectura con las métricas de los ETFs.
+
+Sirve en JSON lo mismo que muestra la app, sin pasar por Streamlit ni por yfinance:
+los datos salen del snapshot vigente (python snapshot.py) o, si no hay ninguno, del
+registro cargado una sola vez al arrancar.
+
+    python api.py --puerto 8502
+
+Rutas:
+    GET /etfs                              Resumen de todos los ETFs.
+    GET /etfs/{ticker}                     Métricas completas de un ETF.
+    GET /etfs/{ticker}/periodos            Rendimiento, riesgo y drawdown por periodo.
+    GET /etfs/{ticker}/cierres?desde=&hasta=   Precios de cierre (fechas AAAA-MM-DD, ambas incluidas).
+
+Todas las respuestas se serializan (y comprimen con gzip) una sola vez por versión
+de los datos y llevan ETag y Last-Modified para que los clientes puedan revalidar
+con una respuesta 304 sin cuerpo.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import numpy as np
+from data import PERIODOS, ETFs_Data
+from snapshot import vigilante_snapshots
+
+PUERTO = int(os.environ.get("SIMULADOR_PUERTO_API", "8502"))
+
+# Las respuestas más pequeñas que esto no se comprimen
+MINIMO_GZIP = 1024
+
+# Número de respuestas de rangos de fechas guardadas en memoria
+MAXIMO_RANGOS = 256
+
+def _json(datos):
+    """Serializa a JSON compacto en bytes."""
+    return json.dumps(datos, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+class Respuesta:
+    """Cuerpo JSON ya serializado, su versión comprimida y el ETag de cada una."""
+
+    __slots__ = ('cuerpo', 'comprimido', 'etag', 'etag_comprimido')
+
+    def __init__(self, cuerpo):
+        self.cuerpo = cuerpo
+        self.comprimido = gzip.compress(cuerpo, compresslevel=6) if len(cuerpo) >= MINIMO_GZIP else None
+        huella = hashlib.sha1(cuerpo).hexdigest()
+        self.etag = f'"{huella}"'
+        # Los bytes enviados con gzip son otros: un ETag fuerte no puede compartirse entre codificaciones
+        self.etag_comprimido = f'"{huella}-gzip"'
+
+def _resumen(etf):
+    return {
+        'nombre': etf.nombre,
+        'simbolo': etf.simbolo,
+        'nombre_corto': etf.nombre_corto,
+        'precio_actual': etf.precio_actual,
+        'rendimiento_log_geom': etf.rendimiento_log_geom,
+        'riesgo_promedio': etf.riesgo_promedio,
+        'ratio_riesgo_rendimiento': etf.ratio_riesgo_rendimiento,
+    }
+
+def _periodos(etf):
+    return {
+        periodo: {
+            'rendimiento': etf.rendimientos.get(periodo),
+            'riesgo': etf.riesgos.get(periodo),
+            'drawdown': etf.drawdowns.get(periodo),
+            'dias_bajo_agua': etf.dias_bajo_agua.get(periodo),
+        }
+        for periodo in PERIODOS
+    }
+
+class DatosAPI:
+    """
+    Respuestas preserializadas de una versión de los datos.
+
+    Las rutas fijas se serializan al crear el objeto. Para los rangos de cierres se
+    guardan ya convertidas a texto cada fecha y cada precio, así que responder un
+    rango es buscar sus extremos y unir fragmentos, sin volver a serializar números.
+    """
+
+    def __init__(self, registro, modificado):
+        self.modificado = modificado.replace(microsecond=0)
+        self.ultima_modificacion = formatdate(modificado.timestamp(), usegmt=True)
+        etfs = [registro.obtener(nombre) for nombre in registro.nombres()]
+        self._respuestas = {'/etfs': Respuesta(_json([_resumen(etf) for etf in etfs]))}
+        self._series = {}
+        self._rangos = OrderedDict()
+        self._candado = threading.Lock()
+
+        for etf in etfs:
+            base = f'/etfs/{etf.simbolo}'
+            self._respuestas[base] = Respuesta(_json({
+                **_resumen(etf),
+                'descripcion_larga': etf.descripcion_larga,
+                'periodos': _periodos(etf),
+            }))
+            self._respuestas[base + '/periodos'] = Respuesta(_json({'simbolo': etf.simbolo, 'periodos': _periodos(etf)}))
+            precios = etf.precios_historicos
+            if precios is None:
+                self._series[etf.simbolo] = (np.array([], dtype='datetime64[D]'), [], [])
+            else:
+                cierre = precios['Close']
+                fechas = cierre.index.to_numpy(dtype='datetime64[D]')
+                self._series[etf.simbolo] = (
+                    fechas,
+                    [f'"{fecha}"'.encode() for fecha in fechas.astype(str)],
+                    [repr(float(valor)).encode() for valor in cierre.to_numpy()],
+                )
+            self._respuestas[base + '/cierres'] = self._rango(etf.simbolo, None, None)
+
+    def _rango(self, simbolo, desde, hasta):
+        """Serializa los cierres de un ticker entre dos fechas (None = sin límite)."""
+        fechas, textos_fecha, textos_cierre = self._series[simbolo]
+        inicio = 0 if desde is None else int(np.searchsorted(fechas, np.datetime64(desde, 'D'), side='left'))
+        fin = len(fechas) if hasta is None else int(np.searchsorted(fechas, np.datetime64(hasta, 'D'), side='right'))
+        return Respuesta(
+            b'{"simbolo":' + _json(simbolo)
+            + b',"fechas":[' + b','.join(textos_fecha[inicio:fin])
+            + b'],"cierres":[' + b','.join(textos_cierre[inicio:fin]) + b']}'
+        )
+
+    def respuesta(self, ruta, consulta):
+        """
+        Devuelve la respuesta de una ruta.
+
+        Returns:
+        Respuesta: La respuesta, o None si la ruta no existe.
+
+        Raises:
+        ValueError: Si los parámetros de la consulta no son válidos.
+        """
+        ruta = ruta.rstrip('/') or '/'
+        partes = ruta.split('/')
+        if len(partes) == 4 and partes[1] == 'etfs' and partes[3] == 'cierres' and consulta:
+            simbolo = partes[2].upper()
+            if simbolo not in self._series:
+                return None
+            parametros = parse_qs(consulta)
+            desde = parametros.get('desde', [None])[0]
+            hasta = parametros.get('hasta', [None])[0]
+            desde = date.fromisoformat(desde) if desde else None
+            hasta = date.fromisoformat(hasta) if hasta else None
+            clave = (simbolo, desde, hasta)
+            with self._candado:
+                respuesta = self._rangos.get(clave)
+                if respuesta is not None:
+                    self._rangos.move_to_end(clave)
+                    return respuesta
+            respuesta = self._rango(simbolo, desde, hasta)
+            with self._candado:
+                self._rangos[clave] = respuesta
+                while len(self._rangos) > MAXIMO_RANGOS:
+                    self._rangos.popitem(last=False)
+            return respuesta
+        if len(partes) >= 3 and partes[1] == 'etfs':
+            partes[2] = partes[2].upper()
+            ruta = '/'.join(partes)
+        return self._respuestas.get(ruta)
+
+_datos = (None, None)  # (origen de los datos, DatosAPI)
+_candado_datos = threading.Lock()
+_registro_cargado_en = None
+
+def datos_actuales():
+    """Respuestas de la versión vigente de los datos; se regeneran cuando aparece un snapshot nuevo."""
+    global _datos
+    snapshot = vigilante_snapshots.actual()
+    origen = snapshot.ruta if snapshot is not None else 'registro'
+    if _datos[0] == origen:
+        return _datos[1]
+    with _candado_datos:
+        if _datos[0] != origen:
+            if snapshot is not None:
+                _datos = (origen, DatosAPI(snapshot.registro, snapshot.creado))
+            else:
+                _datos = (origen, DatosAPI(ETFs_Data, _registro_cargado_en or datetime.now()))
+        return _datos[1]
+
+class ManejadorAPI(BaseHTTPRequestHandler):
+    """Atiende las peticiones GET y HEAD con conexiones persistentes (HTTP/1.1)."""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'SimuladorETFs'
+    # Cabeceras y cuerpo salen en un solo envío (se vacía al terminar cada petición) y sin esperar a Nagle
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+
+    def log_message(self, formato, *args):
+        # Sin un registro por petición: con miles de peticiones por segundo sería el cuello de botella
+        pass
+
+    def _enviar_error(self, codigo, mensaje):
+        cuerpo = _json({'error': mensaje})
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(cuerpo)
+
+    def _no_modificado(self, datos, etag):
+        """Indica si el cliente ya tiene esta versión de la respuesta (If-None-Match o If-Modified-Since)."""
+        etags = self.headers.get('If-None-Match')
+        if etags is not None:
+            # If-None-Match usa la comparación débil: se ignora el prefijo W/
+            return etags.strip() == '*' or etag in [e.strip().removeprefix('W/') for e in etags.split(',')]
+        desde = self.headers.get('If-Modified-Since')
+        if desde is not None:
+            try:
+                return datos.modificado.astimezone() <= parsedate_to_datetime(desde)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def do_GET(self):
+        partes = urlsplit(self.path)
+        try:
+            datos = datos_actuales()
+            respuesta = datos.respuesta(partes.path, partes.query)
+        except ValueError as e:
+            self._enviar_error(400, f"Consulta no válida: {e}")
+            return
+        except Exception as e:
+            print(f"Error al atender {self.path}: {e}")
+            self._enviar_error(500, "Error interno")
+            return
+        if respuesta is None:
+            self._enviar_error(404, "Ruta no encontrada")
+            return
+
+        comprimir = respuesta.comprimido is not None and 'gzip' in self.headers.get('Accept-Encoding', '')
+        cabeceras = {
+            'ETag': respuesta.etag_comprimido if comprimir else respuesta.etag,
+            'Last-Modified': datos.ultima_modificacion,
+            'Cache-Control': 'no-cache',
+            'Vary': 'Accept-Encoding',
+        }
+        if self._no_modificado(datos, cabeceras['ETag']):
+            self.send_response(304)
+            for nombre, valor in cabeceras.items():
+                self.send_header(nombre, valor)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        cuerpo = respuesta.cuerpo
+        if comprimir:
+            cuerpo = respuesta.comprimido
+            cabeceras['Content-Encoding'] = 'gzip'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        for nombre, valor in cabeceras.items():
+            self.send_header(nombre, valor)
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(cuerpo)
+
+    do_HEAD = do_GET
+
+def crear_servidor(host='127.0.0.1', puerto=PUERTO):
+    """Crea el servidor (un hilo por conexión) sin arrancarlo."""
+    servidor = ThreadingHTTPServer((host, puerto), ManejadorAPI)
+    servidor.daemon_threads = True
+    return servidor
+
+def main():
+    global _registro_cargado_en
+    parser = argparse.ArgumentParser(description="API HTTP de solo lectura con las métricas de los ETFs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=PUERTO)
+    args = parser.parse_args()
+
+    if vigilante_snapshots.actual() is None:
+        print("No hay snapshot; se cargan los ETFs una sola vez al arrancar.")
+        ETFs_Data.cargar(ETFs_Data.nombres())
+        _registro_cargado_en = datetime.now()
+    datos_actuales()
+
+    servidor = crear_servidor(args.host, args.puerto)
+    print(f"API escuchando en http://{args.host}:{args.puerto}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,20 @@
-import requests
-from bs4 import BeautifulSoup
 import streamlit as st
-import seaborn as sns
-import matplotlib.pyplot as plt
+import time
 import pandas as pd
-from data import ETFs_Data, descargar_datos_historicos
+from data import ETFs_Data, almacen_precios
+from backtest import backtest
+from computo_paralelo import REFERENCIA, analitica_en_segundo_plano
+from cotizaciones import INTERVALO_SEGUNDOS, servicio_cotizaciones
+from instrumentacion import DEPURACION, iniciar_perfil, instrumentacion, medido, terminar_perfil
+from graficas import grafica_backtest, grafica_bandas, grafica_barras, grafica_comparacion_precios, grafica_frontera, grafica_historica, grafica_movil
+from metricas import analitica_movil
+from montecarlo import rendimientos_log_diarios, simular_valor_futuro
+from portafolio import analizar_portafolio
+from snapshot import vigilante_snapshots
+from noticias import obtener_noticias, precargar_noticias
+
+# Número máximo de ETFs que se ofrecen en la lista de selección
+MAXIMO_OPCIONES = 50
 
 def calcular_valor_futuro(inversion_inicial, rendimiento, periodos):
     """
@@ -20,38 +30,57 @@ def calcular_valor_futuro(inversion_inicial, rendimiento, periodos):
     """
     return inversion_inicial * ((1 + rendimiento) ** periodos)
 
-# Función para obtener noticias de Finviz
+# Función para obtener noticias de Finviz (en caché y compartidas entre sesiones)
+@medido('get_finviz_news', argumento_ticker=0)
 def get_finviz_news(etf_ticker, limit=3):
-    url = f'https://finviz.com/quote.ashx?t={etf_ticker}'
-    response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'})
-    soup = BeautifulSoup(response.content, 'html.parser')
-    
-    news_table = soup.find('table', class_='fullview-news-outer')
-    headlines = []
-
-    for index, row in enumerate(news_table.find_all('tr')):
-        if index >= limit:
-            break
-        news_item = row.find_all('td')
-        date_time = news_item[0].text.strip()
-        title = news_item[1].a.text.strip()
-        link = news_item[1].a['href']
-
-        headlines.append({
-            'date_time': date_time, 
-            'title': title, 
-            'link': link
-        })
-    
-    return headlines
+    return obtener_noticias([etf_ticker], limit)[etf_ticker]
 
 # Función para formatear etiquetas
 def formato_etiqueta(titulo, valor):
     return f"<strong style='font-size: 18px;'>{titulo}:</strong> {valor}"
 
+# Guarda la selección de ETFs en el callback, antes de la siguiente ejecución: cambiar las opciones o
+# el default de la lista crea un widget nuevo, y su default ya debe ser lo que eligió el usuario
+def guardar_seleccion():
+    st.session_state["seleccion_etfs"] = st.session_state["multiselect_etfs"]
+
+# Precio actual que se refresca solo (sin volver a ejecutar el resto de la app) con las cotizaciones compartidas
+@st.fragment(run_every=INTERVALO_SEGUNDOS)
+def mostrar_precio_actual(simbolo, precio_respaldo):
+    precio_actual = servicio_cotizaciones.precio(simbolo)
+    if precio_actual is None:
+        precio_actual = precio_respaldo
+    if precio_actual is not None:
+        st.markdown(formato_etiqueta("Precio Actual", f"${precio_actual:.2f}"), unsafe_allow_html=True)
+    else:
+        st.markdown(formato_etiqueta("Precio Actual", "No disponible"), unsafe_allow_html=True)
+    if servicio_cotizaciones.actualizado is not None:
+        st.caption(f"Cotización actualizada a las {servicio_cotizaciones.actualizado:%H:%M:%S}")
+
+# Vuelve a ejecutar la app cuando termina la analítica en segundo plano para mostrarla sin esperar al usuario
+@st.fragment(run_every=1)
+def esperar_analitica(futuro):
+    if futuro.done():
+        st.rerun()
+
 # Establecer un tema
 st.set_page_config(page_title="Análisis de ETFs", layout="wide")
 
+# Panel de depuración opcional (SIMULADOR_DEPURACION=1 o ?depuracion=1) y perfil cProfile de una ejecución
+depuracion = DEPURACION or st.query_params.get("depuracion") == "1"
+perfil = iniciar_perfil() if depuracion and st.session_state.pop("perfilar", False) else None
+inicio_ejecucion = time.perf_counter()
+
+# Si hay un snapshot precalculado (python snapshot.py) se usa tal cual: no se descarga ni se calcula nada.
+# Si no, se carga la información de los ETFs en segundo plano sin bloquear el primer render
+snapshot_actual = vigilante_snapshots.actual()
+registro = snapshot_actual.registro if snapshot_actual is not None else ETFs_Data
+if snapshot_actual is None:
+    registro.calentar()
+
+# Consultar las cotizaciones en segundo plano (un solo hilo para todas las sesiones)
+servicio_cotizaciones.iniciar()
+
 # Título de la aplicación
 st.markdown("<h1 style='color: darkblue;'>Análisis de ETFs 📈</h1>", unsafe_allow_html=True)
 st.markdown("Explora el rendimiento y los detalles de los ETFs más relevantes de Allianz Patrimonial.")
@@ -62,59 +91,85 @@ st.sidebar.markdown(
     "<h3 style='color: darkred;'>Selecciona uno o más ETFs:</h3>",
     unsafe_allow_html=True
 )
+# Con miles de ETFs no se listan todos: se muestran los que coinciden con la búsqueda
+busqueda = st.sidebar.text_input("Buscar por ticker, nombre o descripción", key="busqueda_etfs")
+if busqueda.strip():
+    encontrados = registro.buscar(busqueda, limite=MAXIMO_OPCIONES)
+else:
+    encontrados = registro.nombres()[:MAXIMO_OPCIONES]
+# La selección actual se conserva aunque ya no coincida con la búsqueda
+seleccion_anterior = st.session_state.get("seleccion_etfs", [])
 etfs_seleccionados = st.sidebar.multiselect(
     "",  # Deja el campo de etiqueta vacío
-    options=[etf['nombre'] for etf in ETFs_Data],
-    default=[]
+    options=seleccion_anterior + [nombre for nombre in encontrados if nombre not in seleccion_anterior],
+    default=seleccion_anterior,
+    key="multiselect_etfs",
+    on_change=guardar_seleccion
 )
 
 # Verificar si hay algún ETF seleccionado
 if etfs_seleccionados:
-    # Descargar precios históricos para los ETFs seleccionados
-    tickers_seleccionados = [etf_info['simbolo'] for etf_info in ETFs_Data if etf_info['nombre'] in etfs_seleccionados]
-    precios_historicos_todos = descargar_datos_historicos(tickers_seleccionados)
+    # Construir de una vez todos los ETFs seleccionados (precios en una petición masiva y metadatos
+    # en paralelo); el bucle de abajo solo lee los ya construidos
+    registro.cargar(etfs_seleccionados)
+
+    # Obtener precios históricos para los ETFs seleccionados (compartidos entre sesiones)
+    tickers_seleccionados = [registro.ticker(etf_name) for etf_name in etfs_seleccionados]
+    if snapshot_actual is not None:
+        precios_historicos_todos = snapshot_actual.precios(tickers_seleccionados)
+    else:
+        precios_historicos_todos = almacen_precios.obtener(tickers_seleccionados)
+
+    # Descargar en segundo plano las noticias para que el botón responda al instante
+    precargar_noticias(tickers_seleccionados)
+
+    # Regresión contra la referencia e intervalos de confianza: se calculan en segundo plano
+    # (una sola vez por ETF) y se muestran cuando terminan, sin bloquear esta ejecución
+    futuro_analitica = analitica_en_segundo_plano(registro, etfs_seleccionados)
+    if futuro_analitica.done():
+        analitica_pendiente = "No disponible"
+    else:
+        analitica_pendiente = "Calculando..."
+        esperar_analitica(futuro_analitica)
 
     for etf_name in etfs_seleccionados:
-        etf_info = next((etf for etf in ETFs_Data if etf['nombre'] == etf_name), None)
+        etf_info = registro.obtener(etf_name)
         if etf_info:
             # Extraer variables reutilizables
-            nombre = etf_info['nombre']
-            simbolo = etf_info['simbolo']
-            nombre_corto = etf_info['nombre_corto']
-            precio_actual = etf_info['precio_actual']  # Obtener el precio actual
+            nombre = etf_info.nombre
+            simbolo = etf_info.simbolo
+            nombre_corto = etf_info.nombre_corto
+            precio_actual = etf_info.precio_actual  # Obtener el precio actual
 
             # Mostrar el nombre del ETF como subheader
-            st.markdown(f"<h3 style='color: #1E3A8A;'>{etf_info['nombre']}</h3>", unsafe_allow_html=True)
+            st.markdown(f"<h3 style='color: #1E3A8A;'>{etf_info.nombre}</h3>", unsafe_allow_html=True)
 
             # Mostrar la información del ETF seleccionado con columnas ajustadas
             col1, col2 = st.columns([2, 1])  
             with col1:
                 st.markdown(formato_etiqueta("Símbolo", simbolo), unsafe_allow_html=True)
-                st.markdown(f"<div style='text-align: justify;'>{formato_etiqueta('Descripción', etf_info['descripcion_larga'])}</div>", unsafe_allow_html=True)
-                # Precio actual
+                st.markdown(f"<div style='text-align: justify;'>{formato_etiqueta('Descripción', etf_info.descripcion_larga)}</div>", unsafe_allow_html=True)
+                # Precio actual (se refresca solo con las cotizaciones en vivo)
                 st.write("")
-                if precio_actual is not None:
-                    st.markdown(formato_etiqueta("Precio Actual", f"${precio_actual:.2f}"), unsafe_allow_html=True)
-                else:
-                    st.markdown(formato_etiqueta("Precio Actual", "No disponible"), unsafe_allow_html=True)
+                mostrar_precio_actual(simbolo, precio_actual)
 
             with col2:
                 # Rendimiento
-                rendimiento = etf_info['rendimiento_log_geom']
+                rendimiento = etf_info.rendimiento_log_geom
                 if rendimiento is not None:
                     st.markdown(formato_etiqueta("Rendimiento Anualizado", f"{rendimiento:.2%}"), unsafe_allow_html=True)
                 else:
                     st.markdown(formato_etiqueta("Rendimiento Anualizado", "No disponible"), unsafe_allow_html=True)
 
                 # Riesgo promedio
-                riesgo_promedio = etf_info['riesgo_promedio']
+                riesgo_promedio = etf_info.riesgo_promedio
                 if riesgo_promedio is not None:
                     st.markdown(formato_etiqueta("Riesgo Promedio", f"{riesgo_promedio:.2%}"), unsafe_allow_html=True)
                 else:
                     st.markdown(formato_etiqueta("Riesgo Promedio", "No disponible"), unsafe_allow_html=True)
 
                 # Ratio riesgo-rendimiento
-                ratio_riesgo_rendimiento = etf_info['ratio_riesgo_rendimiento']
+                ratio_riesgo_rendimiento = etf_info.ratio_riesgo_rendimiento
                 if ratio_riesgo_rendimiento is not None:
                     st.markdown(formato_etiqueta("Ratio Riesgo-Rendimiento", f"{ratio_riesgo_rendimiento:.2f}"), unsafe_allow_html=True)
                 else:
@@ -128,14 +183,11 @@ if etfs_seleccionados:
             if precios_historicos is not None and not precios_historicos.empty:
                 st.markdown("<h4 style='color: #1E3A8A;'>Desempeño Histórico</h4>", unsafe_allow_html=True)  
                 # Graficar precios históricos
-                fig, ax = plt.subplots(figsize=(10, 5))
-                sns.lineplot(x=precios_historicos.index, y=precios_historicos['Close'], ax=ax)
-                ax.set_title(f"{nombre_corto} ({simbolo})", fontsize=16)
-                ax.set_xlabel('Fecha', fontsize=12)
-                ax.set_ylabel('Precio de Cierre', fontsize=12)
-                ax.tick_params(axis='x', rotation=45)
-                
-                st.pyplot(fig)
+                st.image(grafica_historica(f"{nombre_corto} ({simbolo})", precios_historicos), use_column_width=True)
+
+                # Volatilidad, rendimiento móvil y drawdown
+                st.markdown("<h4 style='color: #1E3A8A;'>Volatilidad y Drawdown Móviles</h4>", unsafe_allow_html=True)
+                st.image(grafica_movil(f"{nombre_corto} ({simbolo})", analitica_movil(precios_historicos)), use_column_width=True)
             else:
                 st.markdown(formato_etiqueta("Precios históricos", "No disponibles"), unsafe_allow_html=True)
 
@@ -147,9 +199,16 @@ if etfs_seleccionados:
 
             # Crear un DataFrame para los rendimientos y riesgos
             periodos = ['1m', '3m', '6m', '1y', '3y', '5y', '10y']
+            analitica = etf_info.analitica or {}
             rendimiento_riesgo_data = {
-                "Rendimiento": [etf_info['rendimientos'].get(periodo, None) for periodo in periodos],
-                "Riesgo": [etf_info['riesgos'].get(periodo, None) for periodo in periodos]
+                "Rendimiento": [etf_info.rendimientos.get(periodo, None) for periodo in periodos],
+                "Riesgo": [etf_info.riesgos.get(periodo, None) for periodo in periodos],
+                "Máx. Drawdown": [etf_info.drawdowns.get(periodo, None) for periodo in periodos],
+                "Días bajo el agua": [etf_info.dias_bajo_agua.get(periodo, None) for periodo in periodos],
+                "IC Rendimiento": [analitica.get('intervalos_rendimiento', {}).get(periodo) for periodo in periodos],
+                "IC Riesgo": [analitica.get('intervalos_riesgo', {}).get(periodo) for periodo in periodos],
+                f"Beta vs {REFERENCIA}": [analitica.get('betas', {}).get(periodo) for periodo in periodos],
+                "Error de seguimiento": [analitica.get('errores_seguimiento', {}).get(periodo) for periodo in periodos]
             }
             df_rendimiento_riesgo = pd.DataFrame(rendimiento_riesgo_data, index=periodos)
 
@@ -161,6 +220,12 @@ if etfs_seleccionados:
                 df_rendimiento_riesgo.index.name = 'Periodo'  # Nombrar el índice como 'Periodo'
                 df_rendimiento_riesgo['Rendimiento'] = df_rendimiento_riesgo['Rendimiento'].apply(lambda x: f"{x:.2%}" if x is not None else "No disponible")
                 df_rendimiento_riesgo['Riesgo'] = df_rendimiento_riesgo['Riesgo'].apply(lambda x: f"{x:.2%}" if x is not None else "No disponible")
+                df_rendimiento_riesgo['Máx. Drawdown'] = df_rendimiento_riesgo['Máx. Drawdown'].apply(lambda x: f"{x:.2%}" if x is not None else "No disponible")
+                df_rendimiento_riesgo['Días bajo el agua'] = df_rendimiento_riesgo['Días bajo el agua'].apply(lambda x: f"{x:.0f}" if x is not None else "No disponible")
+                df_rendimiento_riesgo['IC Rendimiento'] = df_rendimiento_riesgo['IC Rendimiento'].apply(lambda x: f"{x[0]:.2%} a {x[1]:.2%}" if x is not None else analitica_pendiente)
+                df_rendimiento_riesgo['IC Riesgo'] = df_rendimiento_riesgo['IC Riesgo'].apply(lambda x: f"{x[0]:.2%} a {x[1]:.2%}" if x is not None else analitica_pendiente)
+                df_rendimiento_riesgo[f'Beta vs {REFERENCIA}'] = df_rendimiento_riesgo[f'Beta vs {REFERENCIA}'].apply(lambda x: f"{x:.2f}" if x is not None else analitica_pendiente)
+                df_rendimiento_riesgo['Error de seguimiento'] = df_rendimiento_riesgo['Error de seguimiento'].apply(lambda x: f"{x:.2%}" if x is not None else analitica_pendiente)
 
                 # Mostrar la tabla en la app con formato
                 st.markdown("<style>div.stDataframe > div > div > div > div:nth-child(1) { font-weight: bold; }</style>", unsafe_allow_html=True)
@@ -170,15 +235,9 @@ if etfs_seleccionados:
 
             else:
                 # Graficar la comparación de rendimiento y riesgo
-                df_rendimiento_riesgo = df_rendimiento_riesgo.reset_index()
+                df_rendimiento_riesgo = df_rendimiento_riesgo[["Rendimiento", "Riesgo"]].reset_index()
                 df_rendimiento_riesgo_melted = pd.melt(df_rendimiento_riesgo, id_vars='index', var_name='Tipo', value_name='Valor')
-                plt.figure(figsize=(12, 6))
-                sns.barplot(data=df_rendimiento_riesgo_melted, x='index', y='Valor', hue='Tipo')
-                plt.title(f"Rendimiento y Riesgo por Periodo: {nombre}", fontsize=16)
-                plt.xlabel('Periodo', fontsize=12)
-                plt.ylabel('Valor', fontsize=12)
-                plt.xticks(rotation=45)
-                st.pyplot(plt)
+                st.image(grafica_barras(df_rendimiento_riesgo_melted, 'index', f"Rendimiento y Riesgo por Periodo: {nombre}", 'Periodo', 'Valor', rotacion=45), use_column_width=True)
 
             # Espacio después de la gráfica
             st.write("")
@@ -197,16 +256,7 @@ if etfs_seleccionados:
     if len(etfs_seleccionados) > 1:
         st.markdown("<h3 style='color: #1E3A8A;'>Comparación de Riesgo y Rendimiento</h3>", unsafe_allow_html=True)
         
-        for ticker in tickers_seleccionados:
-            precios_historicos_ticker = precios_historicos_todos.get(ticker)
-            if precios_historicos_ticker is not None and not precios_historicos_ticker.empty:
-                plt.plot(precios_historicos_ticker.index, precios_historicos_ticker['Close'], label=ticker)
-
-        plt.title("Comparación de Precios Históricos")
-        plt.xlabel("Fecha")
-        plt.ylabel("Precio de Cierre")
-        plt.legend()
-        st.pyplot(plt.gcf())  # Mostrar la gráfica
+        st.image(grafica_comparacion_precios({ticker: precios_historicos_todos.get(ticker) for ticker in tickers_seleccionados}), use_column_width=True)  # Mostrar la gráfica
 
         # Seleccionar periodo
         periodos = ['1m', '3m', '6m', '1y', '3y', '5y', '10y']
@@ -216,10 +266,10 @@ if etfs_seleccionados:
         comparacion_data = {
             "ETF": etfs_seleccionados,
             "Rendimiento": [
-                next((etf['rendimientos'].get(periodo_seleccionado, None) for etf in ETFs_Data if etf['nombre'] == etf_name), None) for etf_name in etfs_seleccionados
+                registro.obtener(etf_name).rendimientos.get(periodo_seleccionado, None) for etf_name in etfs_seleccionados
             ],
             "Riesgo": [
-                next((etf['riesgos'].get(periodo_seleccionado, None) for etf in ETFs_Data if etf['nombre'] == etf_name), None) for etf_name in etfs_seleccionados
+                registro.obtener(etf_name).riesgos.get(periodo_seleccionado, None) for etf_name in etfs_seleccionados
             ],
             "Valor Futuro": []  # Nueva columna para el valor futuro
         }
@@ -233,10 +283,7 @@ if etfs_seleccionados:
 
         # Calcular el valor futuro para cada ETF y agregarlo a la nueva columna
         for etf_name in etfs_seleccionados:
-            rendimiento_promedio = next(
-                (etf['rendimientos'].get(periodo_seleccionado, None) for etf in ETFs_Data if etf['nombre'] == etf_name),
-                None
-            )
+            rendimiento_promedio = registro.obtener(etf_name).rendimientos.get(periodo_seleccionado, None)
             if rendimiento_promedio is not None:
                 rendimiento_decimal = rendimiento_promedio
                 numero_periodos = {
@@ -278,10 +325,10 @@ if etfs_seleccionados:
             comparacion_data_numeric = {
                 "ETF": etfs_seleccionados,
                 "Rendimiento": [
-                    next((etf['rendimientos'].get(periodo_seleccionado, None) for etf in ETFs_Data if etf['nombre'] == etf_name), None) for etf_name in etfs_seleccionados
+                    registro.obtener(etf_name).rendimientos.get(periodo_seleccionado, None) for etf_name in etfs_seleccionados
                 ],
                 "Riesgo": [
-                    next((etf['riesgos'].get(periodo_seleccionado, None) for etf in ETFs_Data if etf['nombre'] == etf_name), None) for etf_name in etfs_seleccionados
+                    registro.obtener(etf_name).riesgos.get(periodo_seleccionado, None) for etf_name in etfs_seleccionados
                 ]
             }
             
@@ -296,15 +343,161 @@ if etfs_seleccionados:
             # Verificar si hay valores para graficar
             if df_comparacion_melted['Valor'].notnull().any():
                 # Graficar la comparación
-                fig, ax = plt.subplots(figsize=(10, 6))
-                sns.barplot(data=df_comparacion_melted.dropna(), x='ETF', y='Valor', hue='Tipo', palette='Blues', ax=ax)
-                ax.set_title('Comparación de Rendimiento y Riesgo', fontsize=16)
-                ax.set_ylabel('Valor (%)', fontsize=12)
-                ax.set_xlabel('ETF', fontsize=12)
-                ax.legend(title='Tipo')
-                st.pyplot(fig)
+                st.image(grafica_barras(df_comparacion_melted, 'ETF', 'Comparación de Rendimiento y Riesgo', 'ETF', 'Valor (%)', tamano=(10, 6), palette='Blues'), use_column_width=True)
             else:
                 st.markdown("No hay datos disponibles para graficar rendimiento y riesgo.")
 
+        # Portafolio óptimo combinando los ETFs seleccionados (tiene en cuenta las correlaciones)
+        st.markdown("<h3 style='color: #1E3A8A;'>Portafolio Óptimo</h3>", unsafe_allow_html=True)
+        try:
+            portafolio = analizar_portafolio(registro.cierres, tickers_seleccionados, periodo_seleccionado)
+        except ValueError as e:
+            portafolio = None
+            st.markdown(f"No se pudo calcular el portafolio: {e}")
+
+        if portafolio is not None:
+            filas_portafolio = {}
+            for etiqueta, datos in (("Mínima Varianza", portafolio['minima_varianza']), ("Máximo Sharpe", portafolio['maximo_sharpe'])):
+                if datos is None:
+                    continue
+                # Cambiar el monto solo escala los pesos ya calculados
+                filas_portafolio[etiqueta] = {
+                    **{ticker: f"{peso:.2%} (${peso * inversion_inicial:,.2f})" for ticker, peso in zip(portafolio['tickers'], datos['pesos'])},
+                    "Rendimiento": f"{datos['rendimiento']:.2%}",
+                    "Riesgo": f"{datos['riesgo']:.2%}",
+                }
+            st.dataframe(pd.DataFrame(filas_portafolio).T)
+            st.markdown("Correlación de los rendimientos diarios:")
+            st.dataframe(pd.DataFrame(portafolio['correlacion'], index=portafolio['tickers'], columns=portafolio['tickers']).style.format("{:.2f}"))
+            st.image(grafica_frontera(portafolio), use_column_width=True)
+
+    # Simulación Monte Carlo del valor futuro de los ETFs seleccionados
+    st.markdown("<h3 style='color: #1E3A8A;'>Simulación Monte Carlo del Valor Futuro</h3>", unsafe_allow_html=True)
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        inversion_simulacion = st.number_input("Monto a invertir (USD):", min_value=0.0, value=1000.0, format="%.2f", step=100.0, key="monto_montecarlo")
+    with col2:
+        anos_simulacion = st.slider("Años:", min_value=1, max_value=10, value=5, key="anos_montecarlo")
+    with col3:
+        metodo_simulacion = st.radio("Método:", ("GBM", "Bootstrap por bloques"), key="metodo_montecarlo")
+    with col4:
+        trayectorias_simulacion = st.selectbox("Trayectorias:", options=[10_000, 100_000, 1_000_000], index=1, format_func=lambda n: f"{n:,}", key="trayectorias_montecarlo")
+
+    if st.button("Simular", key="simular_montecarlo"):
+        simulaciones = {}
+        filas_simulacion = []
+        for etf_name in etfs_seleccionados:
+            etf_info = registro.obtener(etf_name)
+            precios_historicos = etf_info.precios_historicos
+            if precios_historicos is None or len(precios_historicos) < 60:
+                continue
+            simulacion = simular_valor_futuro(
+                inversion_simulacion,
+                rendimientos_log_diarios(precios_historicos['Close']),
+                anos_simulacion,
+                numero_trayectorias=trayectorias_simulacion,
+                metodo='gbm' if metodo_simulacion == "GBM" else 'bootstrap',
+            )
+            simulaciones[etf_info.simbolo] = simulacion
+            # Valor determinista con el rendimiento promedio, como referencia
+            determinista = calcular_valor_futuro(inversion_simulacion, etf_info.rendimiento_log_geom, anos_simulacion) if etf_info.rendimiento_log_geom is not None else None
+            filas_simulacion.append({
+                "ETF": etf_name,
+                "Valor Futuro (promedio)": f"${determinista:,.2f}" if determinista is not None else "No disponible",
+                "Percentil 5": f"${simulacion['percentiles_finales'][5]:,.2f}",
+                "Mediana": f"${simulacion['percentiles_finales'][50]:,.2f}",
+                "Percentil 95": f"${simulacion['percentiles_finales'][95]:,.2f}",
+                "Probabilidad de Pérdida": f"{simulacion['probabilidad_perdida']:.2%}",
+            })
+
+        if simulaciones:
+            st.dataframe(pd.DataFrame(filas_simulacion).set_index("ETF"))
+            st.image(grafica_bandas(simulaciones), use_column_width=True)
+        else:
+            st.markdown("No hay suficientes datos históricos para simular.")
+
+    # Backtest histórico de aportaciones periódicas sobre una cartera de los ETFs seleccionados
+    st.markdown("<h3 style='color: #1E3A8A;'>Backtest de Aportaciones Periódicas</h3>", unsafe_allow_html=True)
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        aportacion_backtest = st.number_input("Aportación mensual (USD):", min_value=0.0, value=100.0, format="%.2f", step=50.0, key="aportacion_backtest")
+    with col2:
+        anos_backtest = st.slider("Años:", min_value=1, max_value=9, value=5, key="anos_backtest")
+    with col3:
+        rebalanceo_backtest = st.selectbox("Rebalanceo:", options=["Sin rebalanceo", "Trimestral", "Anual", "Desviación > 5%"], key="rebalanceo_backtest")
+    with col4:
+        dividendos_backtest = st.radio("Dividendos:", ("Reinvertir", "En efectivo"), key="dividendos_backtest")
+
+    # Pesos de la cartera (por defecto, iguales)
+    columnas_pesos = st.columns(len(tickers_seleccionados))
+    pesos_backtest = {}
+    for columna, ticker in zip(columnas_pesos, tickers_seleccionados):
+        with columna:
+            pesos_backtest[ticker] = st.number_input(f"Peso {ticker} (%):", min_value=0.0, max_value=100.0, value=round(100 / len(tickers_seleccionados), 2), step=5.0, key=f"peso_backtest_{ticker}")
+
+    if st.button("Ejecutar backtest", key="ejecutar_backtest"):
+        try:
+            resultado = backtest(
+                precios_historicos_todos,
+                pesos_backtest,
+                aportacion=aportacion_backtest,
+                anos=anos_backtest,
+                rebalanceo={"Sin rebalanceo": None, "Trimestral": 'Q', "Anual": 'A', "Desviación > 5%": 0.05}[rebalanceo_backtest],
+                dividendos='reinvertir' if dividendos_backtest == "Reinvertir" else 'efectivo',
+            )
+        except ValueError as e:
+            resultado = None
+            st.markdown(f"No se pudo hacer el backtest: {e}")
+
+        if resultado is not None:
+            st.dataframe(pd.DataFrame([{
+                "Fechas de inicio": len(resultado['inicios']),
+                "Total aportado": f"${resultado['aportado'][0]:,.2f}",
+                "Percentil 5": f"${resultado['percentiles'][5]:,.2f}",
+                "Mediana": f"${resultado['percentiles'][50]:,.2f}",
+                "Percentil 95": f"${resultado['percentiles'][95]:,.2f}",
+                "Probabilidad de Pérdida": f"{resultado['probabilidad_perdida']:.2%}",
+            }]).set_index("Fechas de inicio"))
+            st.image(grafica_backtest(resultado), use_column_width=True)
+
 else:
-    st.markdown("Por favor, selecciona al menos un ETF para ver los detalles.")
\ No newline at end of file
+    st.markdown("Por favor, selecciona al menos un ETF para ver los detalles.")
+
+instrumentacion.registrar('ejecucion_app', time.perf_counter() - inicio_ejecucion)
+if perfil is not None:
+    st.session_state["perfil"] = terminar_perfil(perfil)
+
+if depuracion:
+    with st.sidebar.expander("Depuración"):
+        resumen = instrumentacion.resumen()
+        st.markdown("**Latencia por etapa**")
+        st.dataframe(pd.DataFrame({
+            etapa: {
+                "Llamadas": datos['llamadas'],
+                "Fallos": datos['fallos'],
+                "Total (s)": round(datos['segundos_total'], 3),
+                "Promedio (ms)": round(datos['segundos_promedio'] * 1000, 1),
+                "p50 (ms) ≤": datos['p50_segundos'] * 1000 if datos['p50_segundos'] is not None else None,
+                "p95 (ms) ≤": datos['p95_segundos'] * 1000 if datos['p95_segundos'] is not None else None,
+            }
+            for etapa, datos in resumen['etapas'].items()
+        }).T)
+        if resumen['caches']:
+            st.markdown("**Cachés**")
+            st.dataframe(pd.DataFrame(resumen['caches']).T.style.format({"tasa_aciertos": "{:.1%}", "aciertos": "{:.0f}", "fallos": "{:.0f}"}))
+        if resumen['por_ticker']:
+            st.markdown("**Por ticker (segundos)**")
+            st.dataframe(pd.DataFrame({
+                etapa: {ticker: round(datos['segundos_total'], 3) for ticker, datos in tickers.items()}
+                for etapa, tickers in resumen['por_ticker'].items()
+            }))
+        if resumen['errores']:
+            st.markdown("**Errores recientes**")
+            st.dataframe(pd.DataFrame(resumen['errores']))
+        st.download_button("Exportar JSON", instrumentacion.como_json(), file_name="instrumentacion.json", mime="application/json")
+        st.download_button("Exportar Prometheus", instrumentacion.como_prometheus(), file_name="instrumentacion.prom", mime="text/plain")
+        if st.button("Perfilar la siguiente ejecución (cProfile)", key="perfilar_ejecucion"):
+            st.session_state["perfilar"] = True
+            st.rerun()
+        if "perfil" in st.session_state:
+            st.code(st.session_state["perfil"], language=None)
\ No newline at end of file
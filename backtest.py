@@ -0,0 +1,194 @@
+import numpy as np
+import pandas as pd
+from metricas import alinear_cierres
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Frecuencias de aportación y de rebalanceo por calendario: número de meses por periodo
+MESES_POR_PERIODO = {'M': 1, 'Q': 3, 'A': 12}
+
+def alinear_dividendos(precios_por_ticker, fechas, tickers):
+    """Matriz fecha × ticker con los dividendos por acción de la columna 'Dividends' (0 si no hay)."""
+    series = {
+        ticker: precios_por_ticker[ticker]['Dividends'] for ticker in tickers
+        if isinstance(precios_por_ticker.get(ticker), pd.DataFrame) and 'Dividends' in precios_por_ticker[ticker].columns
+    }
+    fechas_dividendos, con_dividendos, matriz = alinear_cierres(series)
+    tabla = pd.DataFrame(matriz, index=fechas_dividendos, columns=con_dividendos)
+    return tabla.reindex(index=fechas, columns=tickers).fillna(0.0).to_numpy()
+
+def precios_sin_dividendos(ajustados, dividendos):
+    """
+    Reconstruye los precios de cierre sin ajustar a partir de los ajustados por dividendos.
+
+    yfinance (auto_adjust=True) multiplica los precios anteriores a cada fecha ex-dividendo
+    por m = 1 - D / P, con P el cierre sin ajustar del día anterior. Recorriendo los
+    dividendos del último al primero se recupera cada m y, con su producto acumulado,
+    el precio sin ajustar. Solo se itera sobre las fechas con dividendos.
+
+    Args:
+    ajustados (ndarray): Cierres ajustados (fecha × ticker), sin huecos.
+    dividendos (ndarray): Dividendos por acción (fecha × ticker).
+
+    Returns:
+    ndarray: Cierres sin ajustar por dividendos.
+    """
+    multiplicadores = np.ones_like(ajustados)
+    posteriores = np.ones(ajustados.shape[1])
+    for fila in np.flatnonzero((dividendos > 0).any(axis=1))[::-1]:
+        if fila == 0:
+            continue
+        anterior = ajustados[fila - 1]
+        d = dividendos[fila]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            m = np.where((d > 0) & np.isfinite(anterior), anterior / (anterior + d * posteriores), 1.0)
+        multiplicadores[fila] = m
+        posteriores = posteriores * m
+    # Factor de cada fecha: producto de los multiplicadores de las fechas ex-dividendo posteriores
+    factores = np.cumprod(multiplicadores[::-1], axis=0)[::-1] / multiplicadores
+    return ajustados / factores
+
+def _fechas_de_periodo(fechas, meses):
+    """Filas del primer día de negociación de cada periodo de 'meses' meses."""
+    periodo = (fechas.year * 12 + fechas.month - 1) // meses
+    return np.flatnonzero(np.r_[True, periodo[1:] != periodo[:-1]])
+
+def backtest(precios_por_ticker, pesos, aportacion=100.0, inversion_inicial=0.0, anos=5,
+             frecuencia='M', rebalanceo=None, dividendos='reinvertir', percentiles=PERCENTILES):
+    """
+    Simula con los precios históricos una cartera con aportaciones periódicas (DCA) desde todas las fechas de inicio posibles.
+
+    En cada fecha de aportación se compra cada ETF según los pesos objetivo. La cartera
+    se rebalancea a los pesos objetivo al inicio de cada periodo de calendario
+    (rebalanceo 'M', 'Q' o 'A') o cuando algún peso se desvía más que el umbral
+    (rebalanceo numérico, revisado al cierre de cada día). Todas las fechas de inicio
+    se simulan a la vez: el estado es una matriz inicio × ticker y solo se recorren
+    las fechas en que ocurre algo (aportación, rebalanceo o fin); entre ellas las
+    unidades no cambian y los dividendos se suman con sumas acumuladas.
+
+    Args:
+    precios_por_ticker (dict): DataFrame de precios (columnas 'Close' y 'Dividends') por ticker.
+    pesos (dict): Peso objetivo por ticker (se normalizan para sumar 1).
+    aportacion (float): Monto de cada aportación periódica.
+    inversion_inicial (float): Monto invertido en la fecha de inicio, además de la primera aportación.
+    anos (int): Horizonte de cada simulación en años.
+    frecuencia (str): Frecuencia de las aportaciones ('M', 'Q' o 'A').
+    rebalanceo: None, frecuencia de calendario ('M', 'Q', 'A') o umbral de desviación (float, p. ej. 0.05).
+    dividendos (str): 'reinvertir' (rendimiento total, precios ajustados) o 'efectivo' (se acumulan aparte).
+    percentiles (tuple): Percentiles del valor final a calcular.
+
+    Returns:
+    dict: 'inicios' (fechas de inicio), 'fines', 'valor_final', 'aportado', 'rendimiento'
+    y 'dividendos' por inicio, más 'percentiles', 'probabilidad_perdida' y 'pesos'.
+    """
+    if frecuencia not in MESES_POR_PERIODO:
+        raise ValueError("Frecuencia no reconocida.")
+    if dividendos not in ('reinvertir', 'efectivo'):
+        raise ValueError("Tratamiento de dividendos no reconocido.")
+    pesos = {ticker: float(peso) for ticker, peso in pesos.items() if peso and peso > 0}
+    if not pesos:
+        raise ValueError("Los pesos deben tener al menos un valor positivo.")
+
+    fechas, tickers, ajustados = alinear_cierres({ticker: precios_por_ticker.get(ticker) for ticker in pesos})
+    if set(tickers) != set(pesos):
+        raise ValueError("Faltan precios históricos de algún ETF de la cartera.")
+    objetivo = np.array([pesos[ticker] for ticker in tickers])
+    objetivo /= objetivo.sum()
+
+    # Desde que cotizan todos; los huecos posteriores se rellenan con el último cierre
+    cotizan = np.isfinite(ajustados).all(axis=1)
+    if not cotizan.any():
+        raise ValueError("Los ETFs de la cartera no tienen fechas en común.")
+    primera = int(np.argmax(cotizan))
+    fechas = fechas[primera:]
+    ajustados = pd.DataFrame(ajustados[primera:]).ffill().to_numpy()
+    por_accion = alinear_dividendos(precios_por_ticker, fechas, tickers)
+    if dividendos == 'efectivo':
+        precios = precios_sin_dividendos(ajustados, por_accion)
+        dividendos_acumulados = np.vstack([np.zeros(len(tickers)), np.cumsum(por_accion, axis=0)])
+    else:
+        precios = ajustados
+
+    meses = MESES_POR_PERIODO[frecuencia]
+    aportaciones = _fechas_de_periodo(fechas, meses)
+    duracion = int(round(anos * 12 / meses))
+    if len(aportaciones) <= duracion:
+        raise ValueError("No hay suficiente historia para el horizonte elegido.")
+    # Cada inicio aporta en 'duracion' fechas y se valora en la fecha de aportación siguiente
+    inicios = aportaciones[:len(aportaciones) - duracion]
+    fines = aportaciones[duracion:]
+    numero_inicios = len(inicios)
+
+    umbral = None
+    es_aportacion = set(aportaciones.tolist())
+    eventos = set(es_aportacion)
+    if isinstance(rebalanceo, str):
+        if rebalanceo not in MESES_POR_PERIODO:
+            raise ValueError("Rebalanceo no reconocido.")
+        rebalanceos = set(_fechas_de_periodo(fechas, MESES_POR_PERIODO[rebalanceo]).tolist())
+        eventos |= rebalanceos
+    else:
+        rebalanceos = set()
+        if rebalanceo is not None:
+            umbral = float(rebalanceo)
+            eventos = set(range(aportaciones[0], fines[-1] + 1))
+    eventos = np.array(sorted(fila for fila in eventos if inicios[0] <= fila <= fines[-1]))
+
+    unidades = np.zeros((numero_inicios, len(tickers)))
+    efectivo = np.zeros(numero_inicios)
+    aportado = np.zeros(numero_inicios)
+    valor_final = np.empty(numero_inicios)
+    # Los inicios y los fines están ordenados: las carteras vivas forman un rango contiguo
+    primera_viva = 0
+    siguiente_inicio = 0
+    fila_anterior = None
+    for fila in eventos:
+        precio = precios[fila]
+        vivas = slice(primera_viva, siguiente_inicio)
+        if dividendos == 'efectivo' and fila_anterior is not None:
+            efectivo[vivas] += unidades[vivas] @ (dividendos_acumulados[fila + 1] - dividendos_acumulados[fila_anterior + 1])
+        fila_anterior = fila
+
+        # Carteras que terminan hoy: se valoran antes de aportar
+        while primera_viva < siguiente_inicio and fines[primera_viva] == fila:
+            valor_final[primera_viva] = unidades[primera_viva] @ precio + efectivo[primera_viva]
+            primera_viva += 1
+        # Carteras que empiezan hoy
+        while siguiente_inicio < numero_inicios and inicios[siguiente_inicio] == fila:
+            unidades[siguiente_inicio] = inversion_inicial * objetivo / precio
+            aportado[siguiente_inicio] = inversion_inicial
+            siguiente_inicio += 1
+        vivas = slice(primera_viva, siguiente_inicio)
+        if primera_viva == siguiente_inicio:
+            continue
+
+        if fila in rebalanceos or umbral is not None:
+            valores = unidades[vivas] * precio
+            total = valores.sum(axis=1)
+            if umbral is None:
+                rebalancear = np.ones(len(total), dtype=bool)
+            else:
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    desviacion = np.abs(valores / total[:, None] - objetivo).max(axis=1)
+                rebalancear = desviacion > umbral
+            if rebalancear.any():
+                unidades[vivas][rebalancear] = total[rebalancear, None] * objetivo / precio
+
+        if fila in es_aportacion:
+            unidades[vivas] += aportacion * objetivo / precio
+            aportado[vivas] += aportacion
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rendimiento = valor_final / aportado - 1
+    return {
+        'tickers': tickers,
+        'pesos': objetivo,
+        'inicios': fechas[inicios],
+        'fines': fechas[fines],
+        'valor_final': valor_final,
+        'aportado': aportado,
+        'rendimiento': rendimiento,
+        'dividendos': efectivo if dividendos == 'efectivo' else np.zeros(numero_inicios),
+        'percentiles': {percentil: float(np.percentile(valor_final, percentil)) for percentil in percentiles},
+        'probabilidad_perdida': float(np.mean(valor_final < aportado)),
+    }
@@ -0,0 +1,388 @@
+"""
+Benchmarks del simulador sin conexión a internet.
+
+Las respuestas de yfinance, Google Translate y Finviz se reproducen desde un
+directorio de fixtures (grabado de las fuentes reales o generado con datos
+sintéticos), así que los tiempos solo miden nuestro código. Los resultados se
+escriben en JSON para poder comparar dos ejecuciones.
+
+Uso:
+    python benchmark.py --sinteticos 17 --anos 10 --salida resultados.json
+    python benchmark.py --sinteticos 5000 --sin-app
+    python benchmark.py --grabar fixtures/
+    python benchmark.py --fixtures fixtures/ --comparar resultados.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import OrderedDict
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+# Una etapa se considera una regresión si tarda más que este factor respecto a la ejecución previa
+FACTOR_REGRESION = 1.2
+
+# Columnas que devuelve yfinance para el historial diario
+COLUMNAS_HISTORIAL = ['Open', 'High', 'Low', 'Close', 'Volume', 'Dividends', 'Stock Splits']
+
+def generar_fixtures_sinteticos(directorio, numero_tickers, anos, semilla=0):
+    """
+    Genera fixtures con precios sintéticos (paseo aleatorio geométrico) para varios tickers.
+
+    Siempre incluye los tickers de data.etf_tickers para que la app pueda usarlos.
+    """
+    from data import etf_nombres, etf_tickers
+
+    os.makedirs(os.path.join(directorio, "historial"), exist_ok=True)
+    tickers = list(etf_tickers) + [f"SINT{i:04d}" for i in range(max(numero_tickers - len(etf_tickers), 0))]
+    nombres = list(etf_nombres) + [f"ETF SINTETICO {ticker}" for ticker in tickers[len(etf_tickers):]]
+    tickers, nombres = tickers[:max(numero_tickers, 1)], nombres[:max(numero_tickers, 1)]
+
+    fin = pd.Timestamp(datetime.now().date()) + pd.Timedelta(days=1)
+    fechas = pd.bdate_range(fin - pd.DateOffset(years=anos), fin, tz='America/New_York')
+    generador = np.random.default_rng(semilla)
+    for ticker in tickers:
+        cierre = 100 * np.exp(np.cumsum(generador.normal(0.0003, 0.012, len(fechas))))
+        historial = pd.DataFrame({
+            'Open': cierre, 'High': cierre * 1.005, 'Low': cierre * 0.995, 'Close': cierre,
+            'Volume': generador.integers(1e5, 1e7, len(fechas)).astype(float),
+            'Dividends': 0.0, 'Stock Splits': 0.0,
+        }, index=pd.DatetimeIndex(fechas, name='Date'))
+        historial.to_parquet(os.path.join(directorio, "historial", f"{ticker}.parquet"))
+
+    info = {
+        ticker: {'shortName': nombre, 'longBusinessSummary': f"The fund seeks to track the {nombre} index."}
+        for ticker, nombre in zip(tickers, nombres)
+    }
+    with open(os.path.join(directorio, "info.json"), "w", encoding="utf-8") as archivo:
+        json.dump({'tickers': tickers, 'nombres': nombres, 'info': info}, archivo)
+
+def grabar_fixtures(directorio):
+    """Graba las respuestas reales de yfinance y Finviz para los ETFs de data.py."""
+    import requests
+    import yfinance as yf
+    from data import etf_nombres, etf_tickers, obtener_fechas_ultimos_diez_anos
+
+    os.makedirs(os.path.join(directorio, "historial"), exist_ok=True)
+    os.makedirs(os.path.join(directorio, "finviz"), exist_ok=True)
+    fecha_inicio, fecha_fin = obtener_fechas_ultimos_diez_anos()
+    info = {}
+    for ticker in etf_tickers:
+        accion = yf.Ticker(ticker)
+        accion.history(start=fecha_inicio, end=fecha_fin).to_parquet(os.path.join(directorio, "historial", f"{ticker}.parquet"))
+        info[ticker] = {clave: accion.info.get(clave) for clave in ('shortName', 'longBusinessSummary')}
+        respuesta = requests.get(f'https://finviz.com/quote.ashx?t={ticker}', headers={'User-Agent': 'Mozilla/5.0'}, timeout=10)
+        with open(os.path.join(directorio, "finviz", f"{ticker}.html"), "wb") as archivo:
+            archivo.write(respuesta.content)
+    with open(os.path.join(directorio, "info.json"), "w", encoding="utf-8") as archivo:
+        json.dump({'tickers': list(etf_tickers), 'nombres': list(etf_nombres), 'info': info}, archivo)
+
+class Reproductor:
+    """Reproduce desde los fixtures las respuestas de yfinance, Google Translate y Finviz."""
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        with open(os.path.join(directorio, "info.json"), encoding="utf-8") as archivo:
+            contenido = json.load(archivo)
+        self.tickers = contenido['tickers']
+        self.nombres = contenido['nombres']
+        self.info = contenido['info']
+        self._historiales = {}
+
+    def historial(self, ticker):
+        if ticker not in self._historiales:
+            ruta = os.path.join(self.directorio, "historial", f"{ticker}.parquet")
+            self._historiales[ticker] = pd.read_parquet(ruta) if os.path.exists(ruta) else pd.DataFrame(columns=COLUMNAS_HISTORIAL)
+        return self._historiales[ticker]
+
+    def _rango(self, ticker, start=None, end=None, period=None):
+        historial = self.historial(ticker)
+        if period is not None:
+            return historial.tail(1)
+        indice = historial.index
+        mascara = np.ones(len(historial), dtype=bool)
+        if start is not None:
+            mascara &= indice >= pd.Timestamp(start).tz_localize(indice.tz)
+        if end is not None:
+            mascara &= indice < pd.Timestamp(end).tz_localize(indice.tz)
+        return historial[mascara].copy()
+
+    def download(self, tickers, start=None, end=None, **kwargs):
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        return pd.concat({ticker: self._rango(ticker, start, end, kwargs.get('period')) for ticker in tickers}, axis=1)
+
+    def ticker(self, simbolo, session=None):
+        reproductor = self
+
+        class TickerGrabado:
+            info = reproductor.info.get(simbolo, {})
+
+            def history(self, start=None, end=None, period=None, **kwargs):
+                return reproductor._rango(simbolo, start, end, period)
+
+        return TickerGrabado()
+
+    def traducir(self, texto, dest='es'):
+        # Como Translator.translate de googletrans 4.0.0rc1: solo acepta un str
+        if not isinstance(texto, str):
+            raise TypeError("translate solo acepta un texto")
+        return type("Traduccion", (), {"text": texto})()
+
+    def get(self, url, *args, **kwargs):
+        ticker = url.rsplit('=', 1)[-1]
+        ruta = os.path.join(self.directorio, "finviz", f"{ticker}.html")
+        respuesta = type("RespuestaGrabada", (), {})()
+        respuesta.status_code = 200
+        respuesta.content = open(ruta, "rb").read() if os.path.exists(ruta) else b"<table class='fullview-news-outer'></table>"
+        respuesta.text = respuesta.content.decode("utf-8", errors="replace")
+        respuesta.raise_for_status = lambda: None
+        return respuesta
+
+    @contextlib.contextmanager
+    def instalar(self, directorio_cache):
+        """Sustituye las fuentes de datos por los fixtures y usa cachés en un directorio temporal."""
+        import cache_precios
+        import descargas
+        import noticias
+        import proveedores
+        import traducciones
+
+        originales = [
+            (descargas.yf, 'download', descargas.yf.download),
+            (descargas, 'crear_ticker', descargas.crear_ticker),
+            (proveedores, 'crear_ticker', proveedores.crear_ticker),
+            (traducciones.translator, 'translate', traducciones.translator.translate),
+            (noticias.SESION, 'get', noticias.SESION.get),
+            (descargas.LIMITADOR, 'por_segundo', descargas.LIMITADOR.por_segundo),
+            (cache_precios, 'DIRECTORIO_CACHE', cache_precios.DIRECTORIO_CACHE),
+            (traducciones, 'ARCHIVO_CACHE', traducciones.ARCHIVO_CACHE),
+            (traducciones, '_cache', traducciones._cache),
+            (noticias, '_cache', noticias._cache),
+        ]
+        descargas.yf.download = self.download
+        descargas.crear_ticker = self.ticker
+        proveedores.crear_ticker = self.ticker
+        traducciones.translator.translate = self.traducir
+        noticias.SESION.get = self.get
+        # Sin red no tiene sentido limitar la tasa de peticiones
+        descargas.LIMITADOR.por_segundo = 0
+        cache_precios.DIRECTORIO_CACHE = os.path.join(directorio_cache, "precios")
+        traducciones.ARCHIVO_CACHE = os.path.join(directorio_cache, "traducciones.json")
+        traducciones._cache = None
+        noticias._cache = OrderedDict()
+        try:
+            yield self
+        finally:
+            for objeto, atributo, valor in originales:
+                setattr(objeto, atributo, valor)
+
+def medir(funcion, repeticiones=1):
+    """
+    Ejecuta una función y devuelve el mejor tiempo, la mediana y el pico de memoria.
+
+    Los tiempos se toman sin tracemalloc (que ralentiza mucho el código); el pico
+    de memoria sale de una ejecución adicional con tracemalloc activo.
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    tracemalloc.start()
+    try:
+        funcion()
+        pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'segundos_min': min(tiempos),
+        'segundos_mediana': float(np.median(tiempos)),
+        'memoria_pico_bytes': pico,
+        'repeticiones': repeticiones,
+    }
+
+def bench_importacion(repeticiones):
+    """Tiempo y memoria de 'import data' en un intérprete nuevo (importación en frío)."""
+    codigo = (
+        "import json, resource, time; inicio = time.perf_counter(); import data; "
+        "print(json.dumps([time.perf_counter() - inicio, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024]))"
+    )
+    tiempos, picos = [], []
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, "-c", codigo], cwd=DIRECTORIO, capture_output=True, text=True, check=True)
+        segundos, pico = json.loads(salida.stdout.strip().splitlines()[-1])
+        tiempos.append(segundos)
+        picos.append(pico)
+    return {
+        'segundos_min': min(tiempos),
+        'segundos_mediana': float(np.median(tiempos)),
+        'memoria_pico_bytes': max(picos),
+        'repeticiones': repeticiones,
+    }
+
+def bench_registro(reproductor, repeticiones):
+    """Construcción completa del registro de ETFs: en frío (cachés vacías) y en caliente."""
+    import data
+
+    def construir():
+        registro = data.RegistroETFs(reproductor.nombres, reproductor.tickers)
+        data.almacen_precios.invalidar()
+        list(registro)
+
+    resultados = {}
+    with tempfile.TemporaryDirectory() as directorio_cache:
+        with reproductor.instalar(directorio_cache):
+            resultados['registro_frio'] = medir(construir)
+            resultados['registro_caliente'] = medir(construir, repeticiones)
+    return resultados
+
+def bench_metricas(reproductor, repeticiones):
+    """Rendimiento y riesgo por periodo de todos los tickers: por ticker y vectorizado."""
+    import data
+    from metricas import calcular_metricas
+
+    precios = {ticker: reproductor.historial(ticker) for ticker in reproductor.tickers}
+
+    def por_ticker():
+        for historial in precios.values():
+            for periodo in data.PERIODOS:
+                data.rendimiento_y_riesgo_por_periodo(historial, periodo)
+
+    return {
+        'metricas_por_ticker': medir(por_ticker, max(1, repeticiones // 3)),
+        'metricas_vectorizadas': medir(lambda: calcular_metricas(precios, data.PERIODOS), repeticiones),
+    }
+
+def bench_proveedor_archivos(reproductor, repeticiones):
+    """Carga de todos los historiales desde archivos locales: consolidación inicial y cargas siguientes."""
+    import shutil
+    import data
+    from proveedores import ProveedorArchivos
+
+    fecha_inicio, fecha_fin = data.obtener_fechas_ultimos_diez_anos()
+    with tempfile.TemporaryDirectory() as directorio:
+        # Los fixtures tienen el formato de ProveedorArchivos (un Parquet por ticker)
+        directorio_datos = os.path.join(directorio, "datos")
+        shutil.copytree(os.path.join(reproductor.directorio, "historial"), directorio_datos)
+
+        def consolidar():
+            shutil.rmtree(os.path.join(directorio_datos, ".consolidado"), ignore_errors=True)
+            ProveedorArchivos(directorio_datos).historiales(reproductor.tickers, fecha_inicio, fecha_fin)
+
+        resultados = {'archivos_consolidacion': medir(consolidar)}
+        resultados['archivos_carga'] = medir(
+            lambda: ProveedorArchivos(directorio_datos).historiales(reproductor.tickers, fecha_inicio, fecha_fin),
+            repeticiones,
+        )
+    return resultados
+
+def bench_analitica(reproductor, repeticiones):
+    """Regresiones e intervalos bootstrap de todos los tickers: en un proceso y repartidos en PROCESOS procesos."""
+    import data
+    from computo_paralelo import PROCESOS, analizar_cierres
+    from metricas import MatrizCierres
+
+    cierres = MatrizCierres()
+    cierres.agregar({ticker: reproductor.historial(ticker) for ticker in reproductor.tickers})
+    repeticiones = max(1, repeticiones // 3)
+    return {
+        'analitica_un_proceso': medir(lambda: analizar_cierres(cierres, data.PERIODOS, procesos=1), repeticiones),
+        'analitica_procesos': medir(lambda: analizar_cierres(cierres, data.PERIODOS, procesos=PROCESOS), repeticiones),
+    }
+
+def bench_app(reproductor, repeticiones):
+    """Simula una sesión de Streamlit: primer render, selección de ETFs y cambio del monto invertido."""
+    from streamlit.testing.v1 import AppTest
+    import data
+
+    resultados = {}
+    with tempfile.TemporaryDirectory() as directorio_cache:
+        with reproductor.instalar(directorio_cache):
+            app = AppTest.from_file(os.path.join(DIRECTORIO, "app.py"), default_timeout=120)
+            resultados['app_primer_render'] = medir(app.run)
+            seleccion = data.etf_nombres[:3]
+            resultados['app_seleccion'] = medir(lambda: app.sidebar.multiselect[0].set_value(seleccion).run())
+            montos = iter(range(1000, 1000 + 100 * repeticiones * 2, 100))
+            resultados['app_rerun_monto'] = medir(lambda: app.number_input[0].set_value(float(next(montos))).run(), repeticiones)
+            if app.exception:
+                resultados['app_error'] = str(app.exception[0].value)
+    return resultados
+
+def comparar(actual, previo, factor=FACTOR_REGRESION):
+    """Devuelve las etapas que empeoraron más de 'factor' respecto a una ejecución previa."""
+    regresiones = {}
+    for etapa, medida in actual['resultados'].items():
+        anterior = previo.get('resultados', {}).get(etapa)
+        if not isinstance(medida, dict) or not isinstance(anterior, dict):
+            continue
+        for clave in ('segundos_min', 'memoria_pico_bytes'):
+            if anterior.get(clave) and medida[clave] > anterior[clave] * factor:
+                regresiones.setdefault(etapa, {})[clave] = {'antes': anterior[clave], 'ahora': medida[clave]}
+    return regresiones
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del simulador sin conexión.")
+    parser.add_argument("--fixtures", help="Directorio de fixtures grabados o sintéticos.")
+    parser.add_argument("--grabar", metavar="DIRECTORIO", help="Graba fixtures reales en el directorio y termina.")
+    parser.add_argument("--sinteticos", type=int, default=17, help="Número de tickers sintéticos si no se indica --fixtures.")
+    parser.add_argument("--anos", type=int, default=10, help="Años de historia sintética.")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--sin-app", action="store_true", help="No simular la app de Streamlit.")
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto, la salida estándar).")
+    parser.add_argument("--comparar", help="JSON de una ejecución previa para detectar regresiones.")
+    args = parser.parse_args()
+
+    sys.path.insert(0, DIRECTORIO)
+    if args.grabar:
+        grabar_fixtures(args.grabar)
+        return 0
+
+    with tempfile.TemporaryDirectory() as directorio_sintetico:
+        directorio_fixtures = args.fixtures
+        if directorio_fixtures is None:
+            directorio_fixtures = directorio_sintetico
+            generar_fixtures_sinteticos(directorio_fixtures, args.sinteticos, args.anos)
+        reproductor = Reproductor(directorio_fixtures)
+
+        resultados = {'importacion_data': bench_importacion(args.repeticiones)}
+        resultados.update(bench_registro(reproductor, args.repeticiones))
+        resultados.update(bench_metricas(reproductor, args.repeticiones))
+        resultados.update(bench_proveedor_archivos(reproductor, args.repeticiones))
+        resultados.update(bench_analitica(reproductor, args.repeticiones))
+        if not args.sin_app:
+            resultados.update(bench_app(reproductor, args.repeticiones))
+
+    informe = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'fixtures': args.fixtures or f"sinteticos:{args.sinteticos}x{args.anos}",
+        'tickers': len(reproductor.tickers),
+        'resultados': resultados,
+    }
+    codigo_salida = 0
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            informe['regresiones'] = comparar(informe, json.load(archivo))
+        codigo_salida = 1 if informe['regresiones'] else 0
+
+    texto = json.dumps(informe, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            archivo.write(texto)
+    else:
+        print(texto)
+    return codigo_salida
+
+if __name__ == "__main__":
+    sys.exit(main())
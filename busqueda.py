@@ -0,0 +1,126 @@
+import bisect
+import unicodedata
+import numpy as np
+
+# Peso de cada campo al ordenar los resultados por prefijo
+PESO_TICKER = 4
+PESO_NOMBRE = 2
+PESO_DESCRIPCION = 1
+
+# Fracción mínima de los trigramas de la consulta que debe tener un resultado aproximado
+SIMILITUD_MINIMA = 0.5
+
+def normalizar(texto):
+    """Pasa a minúsculas, quita los acentos y cambia todo lo que no es letra o número por espacios."""
+    texto = unicodedata.normalize('NFKD', texto or '').lower()
+    return ''.join(c if c.isalnum() else ' ' for c in texto if not unicodedata.combining(c))
+
+def _trigramas(texto):
+    """Trigramas de las palabras de un texto normalizado, con un espacio de relleno en los extremos de cada una."""
+    return {f" {palabra} "[i:i + 3] for palabra in texto.split() for i in range(len(palabra))}
+
+def _indice_invertido(listas):
+    """
+    Convierte {clave: [ids]} en un vocabulario ordenado y listas de ids contiguas (formato CSR).
+
+    Returns:
+    tuple: (claves ordenadas, desplazamientos int64, ids int32).
+    """
+    claves = sorted(listas)
+    desplazamientos = np.zeros(len(claves) + 1, dtype=np.int64)
+    desplazamientos[1:] = np.cumsum([len(listas[clave]) for clave in claves])
+    ids = np.fromiter((i for clave in claves for i in listas[clave]), dtype=np.int32, count=int(desplazamientos[-1]))
+    return claves, desplazamientos, ids
+
+class IndiceBusqueda:
+    """
+    Índice para buscar ETFs por ticker, nombre y descripción en milisegundos.
+
+    Cada palabra de la consulta se busca como prefijo en el vocabulario ordenado
+    (búsqueda binaria) y deben aparecer todas. Si hay pocos resultados se completan
+    con búsqueda aproximada por trigramas sobre ticker y nombre, que tolera errores
+    de escritura. Las listas de ids se guardan en arreglos contiguos, no en un
+    objeto por ETF, así que la memoria es proporcional al vocabulario.
+    """
+
+    def __init__(self, tickers, nombres, descripciones=None):
+        self.tickers = list(tickers)
+        self.nombres = list(nombres)
+        descripciones = descripciones or [None] * len(self.tickers)
+
+        palabras = {}  # palabra -> {id: peso}
+        trigramas = {}  # trigrama -> [ids]
+        for i, (ticker, nombre, descripcion) in enumerate(zip(self.tickers, self.nombres, descripciones)):
+            for texto, peso in ((ticker, PESO_TICKER), (nombre, PESO_NOMBRE), (descripcion, PESO_DESCRIPCION)):
+                for palabra in normalizar(texto).split():
+                    pesos = palabras.setdefault(palabra, {})
+                    pesos[i] = max(pesos.get(i, 0), peso)
+            for trigrama in _trigramas(normalizar(f"{ticker} {nombre}")):
+                trigramas.setdefault(trigrama, []).append(i)
+
+        self._vocabulario, self._desplazamientos, self._ids = _indice_invertido({palabra: list(pesos) for palabra, pesos in palabras.items()})
+        self._pesos = np.fromiter(
+            (peso for palabra in self._vocabulario for peso in palabras[palabra].values()),
+            dtype=np.int8, count=len(self._ids),
+        )
+        claves, self._desplazamientos_trigramas, self._ids_trigramas = _indice_invertido(trigramas)
+        self._trigramas = {trigrama: j for j, trigrama in enumerate(claves)}
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def _por_prefijo(self, palabra):
+        """Mejor peso de cada ETF que tiene alguna palabra que empieza por 'palabra'."""
+        inicio = bisect.bisect_left(self._vocabulario, palabra)
+        fin = bisect.bisect_left(self._vocabulario, palabra + '\uffff', lo=inicio)
+        puntos = np.zeros(len(self.tickers), dtype=np.int16)
+        desde, hasta = self._desplazamientos[inicio], self._desplazamientos[fin]
+        np.maximum.at(puntos, self._ids[desde:hasta], self._pesos[desde:hasta])
+        # La palabra completa cuenta un poco más que un prefijo
+        if inicio < len(self._vocabulario) and self._vocabulario[inicio] == palabra:
+            exactos = slice(self._desplazamientos[inicio], self._desplazamientos[inicio + 1])
+            np.maximum.at(puntos, self._ids[exactos], self._pesos[exactos] + 1)
+        return puntos
+
+    def _aproximados(self, consulta):
+        """Fracción de los trigramas de la consulta que aparecen en el ticker o el nombre de cada ETF."""
+        propios = _trigramas(consulta)
+        posiciones = [self._trigramas[trigrama] for trigrama in propios if trigrama in self._trigramas]
+        if not posiciones:
+            return np.zeros(len(self.tickers))
+        ids = np.concatenate([self._ids_trigramas[self._desplazamientos_trigramas[j]:self._desplazamientos_trigramas[j + 1]] for j in posiciones])
+        comunes = np.bincount(ids, minlength=len(self.tickers))
+        return comunes / len(propios)
+
+    def buscar(self, consulta, limite=50):
+        """
+        Busca ETFs por ticker, nombre o descripción.
+
+        Args:
+        consulta (str): Texto a buscar (prefijos de palabras, con o sin errores de escritura).
+        limite (int): Número máximo de resultados.
+
+        Returns:
+        list: Posiciones de los ETFs encontrados, de más a menos relevante.
+        """
+        consulta = normalizar(consulta)
+        palabras = consulta.split()
+        if not palabras:
+            return []
+
+        puntos = None
+        for palabra in palabras:
+            por_palabra = self._por_prefijo(palabra)
+            # Deben aparecer todas las palabras
+            puntos = por_palabra if puntos is None else np.where((puntos > 0) & (por_palabra > 0), puntos + por_palabra, 0)
+        encontrados = np.flatnonzero(puntos)
+        # Más puntos primero; a igualdad, el orden del archivo del universo
+        resultados = encontrados[np.lexsort((encontrados, -puntos[encontrados]))][:limite].tolist()
+
+        if len(resultados) < limite:
+            similitud = self._aproximados(consulta)
+            similitud[encontrados] = 0
+            candidatos = np.flatnonzero(similitud >= SIMILITUD_MINIMA)
+            candidatos = candidatos[np.argsort(-similitud[candidatos], kind='stable')]
+            resultados += candidatos[:limite - len(resultados)].tolist()
+        return resultados
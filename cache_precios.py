@@ -0,0 +1,162 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Directorio donde se guardan los precios ya descargados (un archivo Parquet por ticker)
+DIRECTORIO_CACHE = os.environ.get("SIMULADOR_CACHE_PRECIOS", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache_precios"))
+
+# Número de barras ya guardadas que se vuelven a pedir para detectar ajustes por splits/dividendos
+BARRAS_SOLAPADAS = 5
+
+# Tolerancia relativa al comparar las barras solapadas
+TOLERANCIA_AJUSTE = 1e-6
+
+def _ruta_cache(ticker):
+    """Devuelve la ruta del archivo de caché de un ticker."""
+    return os.path.join(DIRECTORIO_CACHE, f"{ticker}.parquet")
+
+def leer_cache(ticker):
+    """Lee los precios guardados de un ticker. Devuelve None si no hay caché o está dañada."""
+    ruta = _ruta_cache(ticker)
+    if not os.path.exists(ruta):
+        return None
+    try:
+        return pd.read_parquet(ruta)
+    except Exception as e:
+        print(f"Error al leer la caché de {ticker}: {e}")
+        return None
+
+def guardar_cache(ticker, datos):
+    """Guarda los precios de un ticker de forma atómica (escribe a un temporal y lo renombra)."""
+    if datos is None or datos.empty:
+        return
+    os.makedirs(DIRECTORIO_CACHE, exist_ok=True)
+    ruta = _ruta_cache(ticker)
+    ruta_temporal = f"{ruta}.{os.getpid()}.tmp"
+    try:
+        datos.to_parquet(ruta_temporal)
+        os.replace(ruta_temporal, ruta)
+    except Exception as e:
+        print(f"Error al guardar la caché de {ticker}: {e}")
+        if os.path.exists(ruta_temporal):
+            os.remove(ruta_temporal)
+
+def _coinciden(cache, nuevos):
+    """
+    Indica si las barras que aparecen en ambos DataFrames tienen el mismo precio de cierre.
+
+    La última barra guardada no se compara: puede ser la de la sesión en curso, cuyo
+    cierre cambia hasta que termina el día, y se sobrescribe con la nueva.
+    """
+    comunes = cache.index[:-1].intersection(nuevos.index)
+    if len(comunes) == 0:
+        return False
+    return np.allclose(
+        cache.loc[comunes, 'Close'].to_numpy(dtype=float),
+        nuevos.loc[comunes, 'Close'].to_numpy(dtype=float),
+        rtol=TOLERANCIA_AJUSTE,
+        equal_nan=True,
+    )
+
+def _fecha(indice):
+    """Convierte una marca de tiempo del índice a texto 'YYYY-MM-DD'."""
+    return pd.Timestamp(indice).strftime("%Y-%m-%d")
+
+def _tz_igual(indice, fecha):
+    """Convierte una fecha en texto a Timestamp con la misma zona horaria que el índice."""
+    marca = pd.Timestamp(fecha)
+    if indice.tz is not None:
+        marca = marca.tz_localize(indice.tz)
+    return marca
+
+def actualizar_precios_lote(tickers, fecha_inicio, fecha_fin, descargar_lote):
+    """
+    Devuelve los precios de varios tickers entre dos fechas usando la caché local.
+
+    Solo se descargan las barras posteriores a la última fecha guardada (más unas
+    cuantas barras solapadas). Si las barras solapadas ya no coinciden con las
+    guardadas (por ejemplo, por un split o un dividendo que ajusta la serie), se
+    vuelve a descargar el historial completo del ticker. Los tickers que necesitan
+    el mismo rango se piden juntos en una sola llamada a descargar_lote.
+
+    Args:
+    tickers (list): Símbolos de los ETFs.
+    fecha_inicio (str): Fecha inicial en formato 'YYYY-MM-DD'.
+    fecha_fin (str): Fecha final (exclusiva) en formato 'YYYY-MM-DD'.
+    descargar_lote (callable): Función descargar_lote(tickers, inicio, fin) que devuelve un DataFrame por ticker.
+
+    Returns:
+    dict: Precios históricos de cada ticker en el rango pedido (None si no hay datos).
+    """
+    precios = {}
+    caches = {}
+    grupos_delta = {}
+    completos = []
+
+    for ticker in tickers:
+        cache = leer_cache(ticker)
+        # Sin caché, o la caché no cubre la fecha inicial pedida: descarga completa
+        if cache is None or cache.empty or cache.attrs.get('fecha_inicio', _fecha(cache.index[0])) > fecha_inicio:
+            completos.append(ticker)
+            continue
+        caches[ticker] = cache
+        inicio_delta = _fecha(cache.index[max(len(cache) - BARRAS_SOLAPADAS, 0)])
+        if inicio_delta < fecha_fin:
+            grupos_delta.setdefault(inicio_delta, []).append(ticker)
+
+    for inicio_delta, grupo in grupos_delta.items():
+        nuevos_por_ticker = descargar_lote(grupo, inicio_delta, fecha_fin)
+        for ticker in grupo:
+            cache = caches[ticker]
+            nuevos = nuevos_por_ticker.get(ticker)
+            if nuevos is None or nuevos.empty:
+                continue
+            if not _coinciden(cache, nuevos):
+                # La serie fue reajustada: se descarga de nuevo completa
+                completos.append(ticker)
+                del caches[ticker]
+                continue
+            # La última barra guardada se reemplaza por la nueva (pudo cambiar si era de la sesión en curso)
+            agregados = nuevos[nuevos.index >= cache.index[-1]]
+            hay_nuevas = (agregados.index > cache.index[-1]).any()
+            ultima_cambio = cache.index[-1] in agregados.index and not np.isclose(
+                cache['Close'].iloc[-1], agregados.loc[cache.index[-1], 'Close'], rtol=TOLERANCIA_AJUSTE, equal_nan=True,
+            )
+            if hay_nuevas or ultima_cambio:
+                attrs = dict(cache.attrs)
+                cache = pd.concat([cache[cache.index < agregados.index[0]], agregados])
+                cache.attrs.update(attrs)
+                guardar_cache(ticker, cache)
+                caches[ticker] = cache
+
+    for ticker, cache in caches.items():
+        precios[ticker] = cache[(cache.index >= _tz_igual(cache.index, fecha_inicio)) & (cache.index < _tz_igual(cache.index, fecha_fin))]
+
+    if completos:
+        descargados = descargar_lote(completos, fecha_inicio, fecha_fin)
+        for ticker in completos:
+            datos = descargados.get(ticker)
+            if datos is not None and not datos.empty:
+                datos.attrs['fecha_inicio'] = fecha_inicio
+                guardar_cache(ticker, datos)
+            precios[ticker] = datos
+
+    return precios
+
+def actualizar_precios(ticker, fecha_inicio, fecha_fin, descargar):
+    """
+    Devuelve los precios de un solo ticker usando la caché local (ver actualizar_precios_lote).
+
+    Args:
+    ticker (str): Símbolo del ETF.
+    fecha_inicio (str): Fecha inicial en formato 'YYYY-MM-DD'.
+    fecha_fin (str): Fecha final (exclusiva) en formato 'YYYY-MM-DD'.
+    descargar (callable): Función descargar(ticker, inicio, fin) que devuelve un DataFrame.
+
+    Returns:
+    DataFrame: Precios históricos del ticker en el rango pedido.
+    """
+    def descargar_lote(tickers, inicio, fin):
+        return {t: descargar(t, inicio, fin) for t in tickers}
+
+    return actualizar_precios_lote([ticker], fecha_inicio, fecha_fin, descargar_lote).get(ticker)
@@ -0,0 +1,347 @@
+"""
+Analítica pesada de los ETFs repartida en varios procesos: regresión contra una
+referencia (beta, alfa, R², error de seguimiento) e intervalos de confianza
+bootstrap del rendimiento y el riesgo, por ticker y periodo. La matriz de cierres
+se comparte entre procesos sin copiarla (multiprocessing.shared_memory).
+
+    python computo_paralelo.py --procesos 32 --remuestreos 1000
+"""
+import argparse
+import math
+import os
+import threading
+import time
+import weakref
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+from multiprocessing import get_context, shared_memory
+import numpy as np
+from instrumentacion import instrumentacion, medido
+from metricas import DIAS_POR_ANO, fila_inicio_periodo, valor_o_none
+
+# Número de procesos (por defecto, uno por núcleo)
+PROCESOS = int(os.environ.get("SIMULADOR_PROCESOS", str(os.cpu_count() or 1)))
+
+# Ticker contra el que se calculan beta, alfa y error de seguimiento
+REFERENCIA = 'SPY'
+
+# Remuestreos bootstrap y nivel de confianza de los intervalos
+REMUESTREOS = 1000
+NIVEL_CONFIANZA = 0.95
+
+# Semilla de los remuestreos: con la misma semilla los intervalos no cambian entre ejecuciones
+SEMILLA = 0
+
+# Con menos tickers que esto se calcula en el proceso actual: arrancar procesos costaría más
+MINIMO_PARA_PROCESOS = 64
+
+# Tareas por proceso, para repartir bien la carga cuando unos tickers tienen más historia que otros
+TAREAS_POR_PROCESO = 4
+
+# Número de cálculos en segundo plano (registro, ETFs seleccionados, huella de sus cierres) que se recuerdan
+MAXIMO_EN_CACHE = 64
+
+# Resultados de cada tarea: una matriz ticker × periodo por métrica
+METRICAS = (
+    'beta', 'alfa', 'r_cuadrado', 'error_seguimiento',
+    'rendimiento_inferior', 'rendimiento_superior', 'riesgo_inferior', 'riesgo_superior',
+)
+
+def _rendimientos(precios):
+    """
+    Rendimientos logarítmicos diarios de una serie de precios, como los de MotorMetricas.
+
+    Returns:
+    tuple: (posiciones con precio válido, rendimientos con NaN donde no hay precio o precio previo).
+    """
+    n = len(precios)
+    validos = np.isfinite(precios) & (precios > 0)
+    anterior = np.maximum.accumulate(np.where(validos, np.arange(n), -1))
+    log_precios = np.where(anterior >= 0, np.log(np.where(validos, precios, 1.0))[np.maximum(anterior, 0)], np.nan)
+    rendimientos = np.full(n, np.nan)
+    rendimientos[1:] = np.where(validos[1:] & (anterior[:-1] >= 0), np.diff(log_precios), np.nan)
+    return np.flatnonzero(validos), rendimientos
+
+def _regresion(rendimientos, referencia):
+    """Beta, alfa anualizada, R² y error de seguimiento anualizado de unos rendimientos diarios frente a la referencia."""
+    desvio = rendimientos - rendimientos.mean()
+    desvio_referencia = referencia - referencia.mean()
+    varianza_referencia = desvio_referencia @ desvio_referencia
+    varianza = desvio @ desvio
+    covarianza = desvio @ desvio_referencia
+    if varianza_referencia <= 0:
+        return np.nan, np.nan, np.nan, np.nan
+    beta = covarianza / varianza_referencia
+    alfa = (rendimientos.mean() - beta * referencia.mean()) * DIAS_POR_ANO
+    r_cuadrado = covarianza ** 2 / (varianza * varianza_referencia) if varianza > 0 else np.nan
+    error_seguimiento = np.std(rendimientos - referencia, ddof=1) * np.sqrt(DIAS_POR_ANO)
+    return beta, alfa, r_cuadrado, error_seguimiento
+
+def _intervalos(rendimientos, numero_precios, remuestreos, nivel, generador):
+    """
+    Intervalos de confianza bootstrap del rendimiento y el riesgo anualizados de una ventana.
+
+    Cada remuestreo toma con reemplazo tantos rendimientos diarios como tiene la
+    ventana y calcula ambas métricas con las mismas fórmulas que MotorMetricas.
+
+    Returns:
+    tuple: ((rendimiento inferior, superior), (riesgo inferior, superior)).
+    """
+    m = len(rendimientos)
+    muestras = rendimientos[generador.integers(0, m, size=(remuestreos, m))]
+    sumas = muestras.sum(axis=1)
+    varianzas = np.maximum(np.einsum('ij,ij->i', muestras, muestras) - sumas ** 2 / m, 0.0) / (m - 1)
+    colas = [50 * (1 - nivel), 100 - 50 * (1 - nivel)]
+    return (
+        np.percentile(sumas / (numero_precios / DIAS_POR_ANO), colas),
+        np.percentile(np.sqrt(varianzas * DIAS_POR_ANO), colas),
+    )
+
+def analizar_columnas(matriz, columnas, semillas, filas_inicio, referencia, remuestreos, nivel):
+    """
+    Calcula la analítica de varias filas de una matriz de cierres ticker × fecha.
+
+    Args:
+    matriz (ndarray): Cierres, una fila por ticker (NaN donde no hay precio).
+    columnas (list): Filas de la matriz a analizar.
+    semillas (list): Semilla de los remuestreos de cada fila.
+    filas_inicio (list): Primera fecha (columna de la matriz) de cada periodo.
+    referencia (ndarray): Rendimientos diarios de la referencia (None para no calcular la regresión).
+    remuestreos (int): Número de remuestreos bootstrap.
+    nivel (float): Nivel de confianza de los intervalos.
+
+    Returns:
+    dict: Por métrica de METRICAS, una matriz (fila analizada × periodo) con NaN donde no hay datos.
+    """
+    resultados = {metrica: np.full((len(columnas), len(filas_inicio)), np.nan) for metrica in METRICAS}
+    for i, (columna, semilla) in enumerate(zip(columnas, semillas)):
+        posiciones, rendimientos = _rendimientos(np.asarray(matriz[columna], dtype=np.float64))
+        if not len(posiciones):
+            continue
+        ultimo = posiciones[-1]
+        for k, fila_inicio in enumerate(filas_inicio):
+            # Igual que MotorMetricas: del primer precio válido del periodo al último disponible
+            desde = np.searchsorted(posiciones, fila_inicio)
+            if desde >= len(posiciones):
+                continue
+            primero = posiciones[desde]
+            ventana = rendimientos[primero + 1:ultimo + 1]
+            con_rendimiento = np.isfinite(ventana)
+            if con_rendimiento.sum() >= 2:
+                generador = np.random.default_rng([semilla, k])
+                (
+                    (resultados['rendimiento_inferior'][i, k], resultados['rendimiento_superior'][i, k]),
+                    (resultados['riesgo_inferior'][i, k], resultados['riesgo_superior'][i, k]),
+                ) = _intervalos(ventana[con_rendimiento], len(posiciones) - desde, remuestreos, nivel, generador)
+            if referencia is not None:
+                ventana_referencia = referencia[primero + 1:ultimo + 1]
+                ambos = con_rendimiento & np.isfinite(ventana_referencia)
+                if ambos.sum() >= 3:
+                    (
+                        resultados['beta'][i, k], resultados['alfa'][i, k],
+                        resultados['r_cuadrado'][i, k], resultados['error_seguimiento'][i, k],
+                    ) = _regresion(ventana[ambos], ventana_referencia[ambos])
+    return resultados
+
+# Estado de cada proceso de trabajo: la matriz compartida y los rendimientos de la referencia
+_compartida = None
+_matriz = None
+_referencia = None
+
+def _iniciar_proceso(nombre, forma, fila_referencia):
+    """Se conecta a la matriz compartida (una vez por proceso, sin copiarla)."""
+    global _compartida, _matriz, _referencia
+    _compartida = shared_memory.SharedMemory(name=nombre)
+    _matriz = np.ndarray(forma, dtype=np.float64, buffer=_compartida.buf)
+    _referencia = _rendimientos(_matriz[fila_referencia])[1] if fila_referencia is not None else None
+
+def _tarea(columnas, semillas, filas_inicio, remuestreos, nivel):
+    return analizar_columnas(_matriz, columnas, semillas, filas_inicio, _referencia, remuestreos, nivel)
+
+def _semilla(semilla, ticker):
+    """Semilla de los remuestreos de un ticker: no depende de su posición en la matriz ni del reparto en tareas."""
+    return [semilla, zlib.crc32(ticker.encode('utf-8'))]
+
+@medido('analitica')
+def analizar_cierres(cierres, periodos, tickers=None, referencia=REFERENCIA, remuestreos=REMUESTREOS,
+                     nivel=NIVEL_CONFIANZA, procesos=PROCESOS, semilla=SEMILLA):
+    """
+    Calcula la analítica de varios tickers de una matriz de cierres.
+
+    Args:
+    cierres (MatrizCierres): Cierres alineados (deben incluir la referencia para la regresión).
+    periodos (list): Periodos con nombre ('1m'…'10y', 'YTD').
+    tickers (list): Tickers a analizar (todos los de la matriz si es None).
+    referencia (str): Ticker de referencia de la regresión.
+    remuestreos (int): Número de remuestreos bootstrap.
+    nivel (float): Nivel de confianza de los intervalos.
+    procesos (int): Número de procesos; con 1 (o pocos tickers) se calcula en el proceso actual.
+    semilla (int): Semilla de los remuestreos.
+
+    Returns:
+    dict: Por ticker, un diccionario con 'betas', 'alfas', 'r_cuadrados' y
+    'errores_seguimiento' por periodo, e 'intervalos_rendimiento' e 'intervalos_riesgo'
+    por periodo como (inferior, superior), además de 'referencia' y 'nivel_confianza'.
+    """
+    fechas, todos, valores = cierres.instantanea()
+    posicion = {ticker: j for j, ticker in enumerate(todos)}
+    tickers = [ticker for ticker in (todos if tickers is None else tickers) if ticker in posicion]
+    if not tickers or len(fechas) == 0:
+        return {}
+    filas_inicio = [fila_inicio_periodo(fechas, periodo) for periodo in periodos]
+    semillas = [_semilla(semilla, ticker) for ticker in tickers]
+
+    if procesos <= 1 or len(tickers) < MINIMO_PARA_PROCESOS:
+        matriz = valores.T
+        rendimientos_referencia = _rendimientos(np.asarray(matriz[posicion[referencia]], dtype=np.float64))[1] if referencia in posicion else None
+        resultados = analizar_columnas(matriz, [posicion[ticker] for ticker in tickers], semillas, filas_inicio, rendimientos_referencia, remuestreos, nivel)
+    else:
+        # Solo las filas que se analizan (más la referencia), un ticker por fila contigua
+        filas = [posicion[ticker] for ticker in tickers]
+        fila_referencia = None
+        if referencia in posicion:
+            if referencia in tickers:
+                fila_referencia = tickers.index(referencia)
+            else:
+                fila_referencia = len(filas)
+                filas.append(posicion[referencia])
+        forma = (len(filas), len(fechas))
+        compartida = shared_memory.SharedMemory(create=True, size=max(int(np.prod(forma)) * 8, 1))
+        try:
+            matriz = np.ndarray(forma, dtype=np.float64, buffer=compartida.buf)
+            matriz[:] = np.asarray(valores[:, filas], dtype=np.float64).T
+            del matriz
+            tamano = max(1, math.ceil(len(tickers) / (procesos * TAREAS_POR_PROCESO)))
+            inicios = range(0, len(tickers), tamano)
+            # 'spawn': hacer fork de un proceso con hilos (Streamlit, descargas) no es seguro
+            with ProcessPoolExecutor(
+                max_workers=procesos, mp_context=get_context('spawn'),
+                initializer=_iniciar_proceso, initargs=(compartida.name, forma, fila_referencia),
+            ) as pool:
+                partes = list(pool.map(
+                    _tarea,
+                    [list(range(inicio, min(inicio + tamano, len(tickers)))) for inicio in inicios],
+                    [semillas[inicio:inicio + tamano] for inicio in inicios],
+                    repeat(filas_inicio), repeat(remuestreos), repeat(nivel),
+                ))
+        finally:
+            compartida.close()
+            compartida.unlink()
+        resultados = {metrica: np.concatenate([parte[metrica] for parte in partes]) for metrica in METRICAS}
+
+    def por_periodo(metrica, i):
+        return {periodo: valor_o_none(resultados[metrica][i, k]) for k, periodo in enumerate(periodos)}
+
+    def intervalos(nombre, i):
+        inferiores, superiores = por_periodo(f'{nombre}_inferior', i), por_periodo(f'{nombre}_superior', i)
+        return {
+            periodo: (inferiores[periodo], superiores[periodo]) if inferiores[periodo] is not None else None
+            for periodo in periodos
+        }
+
+    return {
+        ticker: {
+            'referencia': referencia if referencia in posicion else None,
+            'nivel_confianza': nivel,
+            'betas': por_periodo('beta', i),
+            'alfas': por_periodo('alfa', i),
+            'r_cuadrados': por_periodo('r_cuadrado', i),
+            'errores_seguimiento': por_periodo('error_seguimiento', i),
+            'intervalos_rendimiento': intervalos('rendimiento', i),
+            'intervalos_riesgo': intervalos('riesgo', i),
+        }
+        for i, ticker in enumerate(tickers)
+    }
+
+def _cargar(registro, nombres, referencia):
+    """Carga en el registro los ETFs indicados y la referencia (si pertenece al universo)."""
+    try:
+        nombre_referencia = [registro.nombre(referencia)]
+    except KeyError:
+        nombre_referencia = []
+    registro.cargar(list(nombres) + nombre_referencia)
+
+def calcular_analitica(registro, nombres=None, referencia=REFERENCIA, remuestreos=REMUESTREOS,
+                       nivel=NIVEL_CONFIANZA, procesos=PROCESOS, semilla=SEMILLA):
+    """
+    Calcula la analítica de los ETFs indicados (todos si es None) y la guarda en el atributo 'analitica' de cada ETF.
+
+    Solo se recalculan los ETFs cuyos cierres (o los de la referencia) cambiaron desde
+    la última vez. La referencia se carga en el registro si pertenece al universo; si
+    no, solo se calculan los intervalos.
+    """
+    # data se importa aquí: los procesos de trabajo importan este módulo y no necesitan cargarlo
+    from data import PERIODOS
+
+    nombres = registro.nombres() if nombres is None else list(nombres)
+    _cargar(registro, nombres, referencia)
+    huellas = {nombre: registro.cierres.huella([registro.ticker(nombre), referencia]) for nombre in nombres}
+    pendientes = [nombre for nombre in nombres if registro.obtener(nombre).huella_analitica != huellas[nombre]]
+    if not pendientes:
+        return
+    analitica = analizar_cierres(
+        registro.cierres, PERIODOS, [registro.ticker(nombre) for nombre in pendientes],
+        referencia, remuestreos, nivel, procesos, semilla,
+    )
+    for nombre in pendientes:
+        etf = registro.obtener(nombre)
+        etf.analitica = analitica.get(registro.ticker(nombre))
+        etf.huella_analitica = huellas[nombre]
+
+# Cálculos lanzados desde la app: un solo hilo, para no competir entre sesiones por los procesos
+_pool = ThreadPoolExecutor(max_workers=1)
+_futuros = OrderedDict()  # (registro, nombres, huella de sus cierres) -> Future
+_candado = threading.Lock()
+
+def _calcular_en_segundo_plano(clave, registro, nombres):
+    try:
+        calcular_analitica(registro, nombres)
+    except Exception as e:
+        print(f"Error al calcular la analítica de {', '.join(nombres)}: {e}")
+        instrumentacion.registrar_fallo('analitica', e)
+        # Los errores no se recuerdan: la siguiente ejecución vuelve a intentarlo
+        with _candado:
+            _futuros.pop(clave, None)
+
+def analitica_en_segundo_plano(registro, nombres, referencia=REFERENCIA):
+    """
+    Lanza calcular_analitica en segundo plano y devuelve su Future sin esperar.
+
+    Los ETFs se cargan antes de lanzarla, y el cálculo se lanza una sola vez por
+    registro, ETFs y huella de sus cierres: llamarla en cada ejecución de la app no
+    recalcula nada, y con precios nuevos o corregidos se vuelve a lanzar.
+    """
+    nombres = tuple(nombres)
+    _cargar(registro, nombres, referencia)
+    huella = registro.cierres.huella([registro.ticker(nombre) for nombre in nombres] + [referencia])
+    # Referencia débil: la caché no impide liberar un registro que ya no se usa
+    clave = (weakref.ref(registro), nombres, huella)
+    with _candado:
+        futuro = _futuros.get(clave)
+        if futuro is None:
+            futuro = _futuros[clave] = _pool.submit(_calcular_en_segundo_plano, clave, registro, nombres)
+            while len(_futuros) > MAXIMO_EN_CACHE:
+                _futuros.popitem(last=False)
+        else:
+            _futuros.move_to_end(clave)
+        return futuro
+
+def main():
+    parser = argparse.ArgumentParser(description="Calcula en varios procesos la analítica de todos los ETFs.")
+    parser.add_argument("--procesos", type=int, default=PROCESOS, help="Número de procesos.")
+    parser.add_argument("--remuestreos", type=int, default=REMUESTREOS, help="Remuestreos bootstrap por ticker y periodo.")
+    parser.add_argument("--referencia", default=REFERENCIA, help="Ticker de referencia de la regresión.")
+    args = parser.parse_args()
+
+    from data import ETFs_Data
+
+    ETFs_Data.cargar(ETFs_Data.nombres())
+    inicio = time.perf_counter()
+    calcular_analitica(ETFs_Data, referencia=args.referencia, remuestreos=args.remuestreos, procesos=args.procesos)
+    segundos = time.perf_counter() - inicio
+    print(f"Analítica de {len(ETFs_Data)} ETFs en {segundos:.2f} s con {args.procesos} procesos ({len(ETFs_Data) / segundos:.1f} ETFs/s)")
+
+if __name__ == "__main__":
+    main()
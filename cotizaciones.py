@@ -0,0 +1,91 @@
+import os
+import threading
+import time
+from datetime import datetime
+from instrumentacion import instrumentacion
+from proveedores import proveedor_datos
+
+# Segundos entre dos consultas de cotizaciones
+INTERVALO_SEGUNDOS = int(os.environ.get("SIMULADOR_INTERVALO_COTIZACIONES", "60"))
+
+# Un ticker deja de consultarse si nadie pidió su cotización durante este número de intervalos
+INTERVALOS_SIN_CONSULTAS = 5
+
+class ServicioCotizaciones:
+    """
+    Cotizaciones en vivo de los tickers que se están mostrando, consultadas en segundo plano.
+
+    Un solo hilo pide los últimos precios de todos los tickers que alguna sesión
+    mostró recientemente en una petición masiva cada 'intervalo' segundos, y todas
+    las sesiones leen el mismo resultado, así que el tráfico hacia Yahoo no depende
+    del número de usuarios ni del tamaño del universo. Leer una cotización no hace
+    ninguna petición.
+    """
+
+    def __init__(self, descargar=proveedor_datos.cotizaciones, intervalo=INTERVALO_SEGUNDOS):
+        self.intervalo = intervalo
+        self._descargar = descargar
+        # Precios e instante de la última actualización, reemplazados juntos
+        self._datos = ({}, None)
+        self._consultados = {}  # ticker -> instante de la última vez que se pidió
+        self._despertar = threading.Event()
+        self._hilo = None
+        self._candado = threading.Lock()
+
+    def iniciar(self):
+        """Arranca el hilo de consultas (solo la primera vez que se llama)."""
+        with self._candado:
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._bucle, name='cotizaciones', daemon=True)
+                self._hilo.start()
+            return self._hilo
+
+    def _bucle(self):
+        while True:
+            self._despertar.clear()
+            # Un fallo en una consulta no debe detener las cotizaciones de todas las sesiones
+            try:
+                self.actualizar()
+            except Exception as e:
+                print(f"Error al actualizar las cotizaciones: {e}")
+                instrumentacion.registrar_fallo('cotizaciones', e)
+            self._despertar.wait(self.intervalo)
+
+    def tickers(self):
+        """Tickers cuya cotización se pidió en los últimos INTERVALOS_SIN_CONSULTAS intervalos."""
+        limite = time.monotonic() - self.intervalo * INTERVALOS_SIN_CONSULTAS
+        with self._candado:
+            for ticker in [ticker for ticker, instante in self._consultados.items() if instante < limite]:
+                del self._consultados[ticker]
+            return list(self._consultados)
+
+    def actualizar(self):
+        """Consulta ahora los últimos precios de los tickers que se están mostrando."""
+        tickers = self.tickers()
+        if not tickers:
+            return
+        with instrumentacion.medir('cotizaciones'):
+            nuevos = self._descargar(tickers)
+        # Solo se conservan los tickers que se siguen mostrando; si uno no cotizó se queda su último precio
+        with self._candado:
+            precios = {ticker: precio for ticker, precio in self._datos[0].items() if ticker in self._consultados}
+        precios.update({ticker: precio for ticker, precio in nuevos.items() if precio is not None})
+        self._datos = (precios, datetime.now())
+
+    def precio(self, ticker):
+        """Último precio conocido de un ticker (None si aún no hay)."""
+        with self._candado:
+            nuevo = ticker not in self._consultados
+            self._consultados[ticker] = time.monotonic()
+        if nuevo:
+            # Un ticker nuevo se consulta enseguida en lugar de esperar al siguiente intervalo
+            self._despertar.set()
+        return self._datos[0].get(ticker)
+
+    @property
+    def actualizado(self):
+        """Instante de la última consulta (None si aún no hubo ninguna)."""
+        return self._datos[1]
+
+# Servicio compartido por todas las sesiones de la app
+servicio_cotizaciones = ServicioCotizaciones()
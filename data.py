@@ -1,127 +1,117 @@
-import yfinance as yf
+import csv
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from googletrans import Translator
-import numpy as np
-
-# Inicializar el traductor
-translator = Translator()
-
-# Lista de nombres de ETFs y sus símbolos
-etf_nombres = [
-    "AZ QQQ NASDAQ 100",
-    "AZ SPDR S&P 500 ETF TRUST",
-    "AZ SPDR DJIA TRUST",
-    "AZ VANGUARD EMERGING MARKET ETF",
-    "AZ FINANCIAL SELECT SECTOR SPDR",
-    "AZ HEALTH CARE SELECT SECTOR",
-    "AZ DJ US HOME CONSTRUCT",
-    "AZ SILVER TRUST",
-    "AZ MSCI TAIWAN INDEX FD",
-    "AZ MSCI UNITED KINGDOM",
-    "AZ MSCI SOUTH KOREA IND",
-    "AZ MSCI EMU",
-    "AZ MSCI JAPAN INDEX FD",
-    "AZ MSCI CANADA",
-    "AZ MSCI GERMANY INDEX",
-    "AZ MSCI AUSTRALIA INDEX",
-    "AZ BARCLAYS AGGREGATE"
-]
-
-# Tickers correspondientes a los ETFs
-etf_tickers = [
-    "QQQ",
-    "SPY",
-    "DIA",
-    "VWO",
-    "XLF",
-    "XLV",
-    "ITB",
-    "SLV",
-    "EWT",
-    "EWU",
-    "EWY",
-    "EZU",
-    "EWJ",
-    "EWC",
-    "EWG",
-    "EWA",
-    "AGG"
-]
+from almacen_precios import AlmacenPrecios
+from descargas import en_paralelo
+from instrumentacion import instrumentacion, medido
+from metricas import MatrizCierres, MotorMetricas, valor_o_none, calcular_metricas
+from proveedores import proveedor_datos
+from traducciones import traducir_textos
+from busqueda import IndiceBusqueda
+
+# Archivo con el universo de ETFs: columnas 'ticker', 'nombre' y, opcionalmente, 'descripcion'
+ARCHIVO_UNIVERSO = os.environ.get("SIMULADOR_UNIVERSO", os.path.join(os.path.dirname(os.path.abspath(__file__)), "etfs.csv"))
+
+def cargar_universo(ruta=ARCHIVO_UNIVERSO):
+    """
+    Lee la lista de ETFs del archivo del universo.
+
+    Returns:
+    tuple: (nombres, tickers, descripciones), en el orden del archivo y sin tickers repetidos.
+    """
+    nombres, tickers, descripciones = [], [], []
+    vistos = set()
+    nombres_vistos = set()
+    with open(ruta, newline='', encoding='utf-8-sig') as archivo:
+        for fila in csv.DictReader(archivo):
+            ticker = (fila.get('ticker') or '').strip().upper()
+            if not ticker or ticker in vistos:
+                continue
+            vistos.add(ticker)
+            nombre = (fila.get('nombre') or '').strip() or ticker
+            # Los ETFs se buscan por nombre: un nombre repetido se distingue con el ticker
+            if nombre in nombres_vistos:
+                nombre = f"{nombre} ({ticker})"
+            nombres_vistos.add(nombre)
+            tickers.append(ticker)
+            nombres.append(nombre)
+            descripciones.append((fila.get('descripcion') or '').strip() or None)
+    return nombres, tickers, descripciones
+
+# Lista de nombres de ETFs, sus símbolos y descripciones (si el archivo las trae)
+etf_nombres, etf_tickers, etf_descripciones = cargar_universo()
 
 def obtener_fechas_ultimos_diez_anos():
     """Obtiene las fechas de inicio y fin para los últimos 10 años."""
     fecha_fin = datetime.now()
     fecha_inicio = fecha_fin - timedelta(days=365 * 10)  # 10 años
+    fecha_fin = fecha_fin + timedelta(days=1)  # La fecha fin es exclusiva: incluir la barra de hoy
     return fecha_inicio.strftime("%Y-%m-%d"), fecha_fin.strftime("%Y-%m-%d")
 
+@medido('descargar_datos_historicos')
 def descargar_datos_historicos(tickers):
-    """Descarga los precios históricos de los últimos 10 años para una lista de tickers."""
+    """
+    Descarga los precios históricos de los últimos 10 años para una lista de tickers.
+
+    Los precios salen del proveedor de datos configurado. Con yfinance se guardan en
+    una caché local, de modo que en cada actualización solo se descargan las barras
+    nuevas desde la última fecha guardada, y los tickers que faltan se piden juntos
+    en una sola descarga masiva.
+    """
     fecha_inicio, fecha_fin = obtener_fechas_ultimos_diez_anos()
-    precios_historicos = {}
+    tickers = list(tickers)
     
-    for ticker in tickers:
-        try:
-            accion = yf.Ticker(ticker)
-            datos = accion.history(start=fecha_inicio, end=fecha_fin)
-            precios_historicos[ticker] = datos
-        except Exception as e:
-            print(f"Error al descargar datos para {ticker}: {e}")
-            precios_historicos[ticker] = None
+    try:
+        precios_historicos = proveedor_datos.historiales(tickers, fecha_inicio, fecha_fin)
+    except Exception as e:
+        print(f"Error al descargar datos para {', '.join(tickers)}: {e}")
+        instrumentacion.registrar_fallo('descargar_datos_historicos', e)
+        precios_historicos = {}
     
-    return precios_historicos
+    return {ticker: precios_historicos.get(ticker) for ticker in tickers}
 
-def obtener_data(ticker):
-    """Obtiene el nombre corto y la descripción larga de un ETF dado su ticker."""
+@medido('obtener_info', argumento_ticker=0)
+def obtener_info(ticker):
+    """Obtiene el nombre corto y la descripción larga (sin traducir) de un ETF dado su ticker."""
     try:
-        accion = yf.Ticker(ticker)
-        info = accion.info
-        nombre_corto = info.get('shortName', 'No disponible')
-        descripcion_larga = info.get('longBusinessSummary', 'Descripción no disponible')
-        descripcion_traducida = traducir_texto(descripcion_larga)  # Traducir la descripción
-        return nombre_corto, descripcion_traducida
+        return proveedor_datos.info(ticker)
     except Exception as e:
         print(f"Error al obtener datos para {ticker}: {e}")
+        instrumentacion.registrar_fallo('obtener_info', e, ticker)
         return 'No disponible', 'Descripción no disponible'
 
+@medido('obtener_data', argumento_ticker=0)
+def obtener_data(ticker):
+    """Obtiene el nombre corto y la descripción larga traducida de un ETF dado su ticker."""
+    nombre_corto, descripcion_larga = obtener_info(ticker)
+    descripcion_traducida = traducir_texto(descripcion_larga)  # Traducir la descripción
+    return nombre_corto, descripcion_traducida
+
+@medido('traducir_texto')
 def traducir_texto(texto):
-    """Traduce un texto al español utilizando Google Translate."""
-    try:
-        traduccion = translator.translate(texto, dest='es')
-        return traduccion.text
-    except Exception as e:
-        print(f"Error al traducir el texto: {e}")
-        return 'Traducción no disponible'
+    """Traduce un texto al español utilizando Google Translate (con caché persistente)."""
+    return traducir_textos([texto])[0]
 
+@medido('obtener_precio_actual', argumento_ticker=0)
 def obtener_precio_actual(ticker):
     """Obtiene el precio de cierre más reciente de un ETF o acción dado su ticker."""
     try:
-        # Crear el objeto del ticker
-        accion = yf.Ticker(ticker)
-        # Descargar el precio de cierre del último día de negociación
-        precio_actual = accion.history(period='1d')['Close'].iloc[-1]
-        return precio_actual
+        return proveedor_datos.precio_actual(ticker)
     except Exception as e:
         print(f"Error al obtener el precio actual para {ticker}: {e}")
+        instrumentacion.registrar_fallo('obtener_precio_actual', e, ticker)
         return None
 
 def rendimiento_logaritmico(precios_historicos):
     """Calcula el rendimiento logarítmico anualizado a partir de los precios históricos."""
-    precios = precios_historicos['Close']
-    primer_precio = precios.iloc[0]
-    ultimo_precio = precios.iloc[-1]
-    
-    rendimiento_log = np.log(ultimo_precio / primer_precio)
-    rendimiento_log_anualizado = rendimiento_log / 10  # Dividir entre 10 años
-    
-    return rendimiento_log_anualizado
+    return MotorMetricas({'': precios_historicos}).rendimiento_logaritmico()[0]
 
 def calcular_riesgo_promedio(precios_historicos):
     """Calcula el riesgo promedio (desviación estándar anualizada) basado en precios de cierre históricos."""
-    precios = precios_historicos['Close']
-    rendimientos_diarios = np.log(precios / precios.shift(1)).dropna()
-    desviacion_diaria = rendimientos_diarios.std()
-    riesgo_promedio_anualizado = desviacion_diaria * np.sqrt(252)  # 252 días de negociación en un año
-    return riesgo_promedio_anualizado
+    return MotorMetricas({'': precios_historicos}).riesgo_promedio()[0]
 
 def calcular_ratio_riesgo_rendimiento(rendimiento_anualizado, riesgo_promedio):
     """Calcula el ratio riesgo-rendimiento."""
@@ -130,92 +120,326 @@ def calcular_ratio_riesgo_rendimiento(rendimiento_anualizado, riesgo_promedio):
     else:
         return None
 
+@medido('rendimiento_y_riesgo_por_periodo')
 def rendimiento_y_riesgo_por_periodo(precios_historicos, periodo):
-    """Calcula el rendimiento y riesgo para un periodo específico."""
+    """
+    Calcula el rendimiento y riesgo para un periodo específico.
+
+    Para varios tickers o periodos es mucho más eficiente usar MotorMetricas
+    directamente, que comparte las sumas acumuladas entre todas las ventanas.
+    """
     try:
-        if periodo == '1m':
-            datos_periodo = precios_historicos.last('1M')
-        elif periodo == '3m':
-            datos_periodo = precios_historicos.last('3M')
-        elif periodo == '6m':
-            datos_periodo = precios_historicos.last('6M')
-        elif periodo == '1y':
-            datos_periodo = precios_historicos.last('1Y')
-        elif periodo == 'YTD':
-            datos_periodo = precios_historicos[precios_historicos.index >= datetime.now().replace(month=1, day=1)]
-        elif periodo == '3y':
-            datos_periodo = precios_historicos.last('3Y')
-        elif periodo == '5y':
-            datos_periodo = precios_historicos.last('5Y')
-        elif periodo == '10y':
-            datos_periodo = precios_historicos.last('10Y')
-        else:
-            raise ValueError("Periodo no reconocido.")
-
-        # Calcular el rendimiento logarítmico
-        rendimiento_log = np.log(datos_periodo['Close'].iloc[-1] / datos_periodo['Close'].iloc[0])
-        rendimiento_anualizado = rendimiento_log / (datos_periodo.shape[0] / 252)  # Ajustar por días de negociación
-
-        # Calcular el riesgo
-        rendimientos_diarios = np.log(datos_periodo['Close'] / datos_periodo['Close'].shift(1)).dropna()
-        desviacion_diaria = rendimientos_diarios.std()
-        riesgo_anualizado = desviacion_diaria * np.sqrt(252)
-
-        return rendimiento_anualizado, riesgo_anualizado
+        rendimientos, riesgos = MotorMetricas({'': precios_historicos}).rendimiento_y_riesgo_periodo(periodo)
+        return valor_o_none(rendimientos[0]), valor_o_none(riesgos[0])
     except Exception as e:
         print(f"Error al calcular rendimiento y riesgo para el periodo {periodo}: {e}")
+        instrumentacion.registrar_fallo('rendimiento_y_riesgo_por_periodo', e)
         return None, None
 
-# Variable para almacenar la información de los ETFs
-ETFs_Data = []
+# Periodos para los que se calcula el rendimiento y el riesgo
+PERIODOS = ['1m', '3m', '6m', '1y', 'YTD', '3y', '5y', '10y']
 
-# Descargar precios históricos para todos los tickers
-precios_historicos_todos = descargar_datos_historicos(etf_tickers)
+class ETF:
+    """
+    Información de un ETF.
 
-# Iterar sobre los ETFs y obtener la información
-for nombre, ticker in zip(etf_nombres, etf_tickers):
-    nombre_corto, descripcion_larga = obtener_data(ticker)
-    
-    # Obtener los precios históricos del ticker actual
-    precios_historicos = precios_historicos_todos.get(ticker)
-    
-    # Obtener el precio actual
-    precio_actual = obtener_precio_actual(ticker)
+    Usa __slots__ para ocupar poca memoria y no guarda su DataFrame de precios: los
+    cierres viven en la matriz compartida del registro y el resto de columnas
+    (Open, High, Low, Volume, Dividends…) se piden al almacén de precios solo si se
+    necesitan.
+    """
 
-    # Calcular el rendimiento logarítmico anualizado
-    if precios_historicos is not None and not precios_historicos.empty:
-        rendimiento_log_geom = rendimiento_logaritmico(precios_historicos)
-        riesgo_promedio = calcular_riesgo_promedio(precios_historicos)
-        ratio_riesgo_rendimiento = calcular_ratio_riesgo_rendimiento(rendimiento_log_geom, riesgo_promedio)
+    __slots__ = (
+        'nombre', 'simbolo', 'nombre_corto', 'descripcion_larga', 'precio_actual',
+        'rendimiento_log_geom', 'riesgo_promedio', 'ratio_riesgo_rendimiento',
+        'rendimientos', 'riesgos', 'drawdowns', 'dias_bajo_agua', 'analitica', 'huella_analitica', '_cierres',
+    )
+
+    def __init__(self, nombre, simbolo, nombre_corto, descripcion_larga, precio_actual,
+                 rendimiento_log_geom, riesgo_promedio, ratio_riesgo_rendimiento,
+                 rendimientos, riesgos, drawdowns, dias_bajo_agua, cierres):
+        self.nombre = nombre
+        self.simbolo = simbolo
+        self.nombre_corto = nombre_corto
+        self.descripcion_larga = descripcion_larga
+        self.precio_actual = precio_actual
+        self.rendimiento_log_geom = rendimiento_log_geom
+        self.riesgo_promedio = riesgo_promedio
+        self.ratio_riesgo_rendimiento = ratio_riesgo_rendimiento
+        self.rendimientos = rendimientos
+        self.riesgos = riesgos
+        self.drawdowns = drawdowns
+        self.dias_bajo_agua = dias_bajo_agua
+        # Regresión contra la referencia e intervalos de confianza (computo_paralelo.calcular_analitica)
+        self.analitica = None
+        # Huella de los cierres (del ETF y de la referencia) con que se calculó la analítica
+        self.huella_analitica = None
+        self._cierres = cierres
+
+    @property
+    def precios_historicos(self):
+        """Precios de cierre del ETF (DataFrame con la columna 'Close'), o None si no hay."""
+        if self.simbolo not in self._cierres.columnas:
+            return None
+        return self._cierres.serie(self.simbolo).to_frame()
+
+    def precios_completos(self):
+        """Precios históricos con todas las columnas de yfinance, pedidos al almacén de precios."""
+        return almacen_precios.obtener([self.simbolo])[self.simbolo]
 
-        # Calcular rendimiento y riesgo para diferentes periodos
-        periodos = ['1m', '3m', '6m', '1y', 'YTD', '3y', '5y', '10y']
-        rendimientos = {}
-        riesgos = {}
-        
-        for periodo in periodos:
-            rendimiento, riesgo = rendimiento_y_riesgo_por_periodo(precios_historicos, periodo)
-            rendimientos[periodo] = rendimiento
-            riesgos[periodo] = riesgo
+def construir_etf(nombre, ticker, data, metricas, cierres):
+    """
+    Calcula toda la información de un ETF a partir de sus datos ya descargados.
 
+    Args:
+    nombre (str): Nombre del ETF.
+    ticker (str): Símbolo del ETF.
+    data (tuple): Nombre corto y descripción traducida devueltos por obtener_data.
+    metricas (dict): Métricas del ticker calculadas por calcular_metricas (o None).
+    cierres (MatrizCierres): Matriz de cierres del registro.
+    """
+    nombre_corto, descripcion_larga = data
+    
+    # El precio actual es el cierre de la última barra ya descargada; solo si no hay
+    # historial se hace una petición aparte
+    precio_actual = cierres.ultimo(ticker) if ticker in cierres.columnas else None
+    if precio_actual is None:
+        precio_actual = obtener_precio_actual(ticker)
+
+    if metricas is not None:
+        rendimiento_log_geom = metricas['rendimiento_log_geom']
+        riesgo_promedio = metricas['riesgo_promedio']
+        rendimientos = metricas['rendimientos']
+        riesgos = metricas['riesgos']
+        drawdowns = metricas['drawdowns']
+        dias_bajo_agua = metricas['dias_bajo_agua']
     else:
         rendimiento_log_geom = None
         riesgo_promedio = None
+        rendimientos = {periodo: None for periodo in PERIODOS}
+        riesgos = {periodo: None for periodo in PERIODOS}
+        drawdowns = {periodo: None for periodo in PERIODOS}
+        dias_bajo_agua = {periodo: None for periodo in PERIODOS}
+
+    if rendimiento_log_geom is not None and riesgo_promedio is not None:
+        ratio_riesgo_rendimiento = calcular_ratio_riesgo_rendimiento(rendimiento_log_geom, riesgo_promedio)
+    else:
         ratio_riesgo_rendimiento = None
-        rendimientos = {periodo: None for periodo in periodos}
-        riesgos = {periodo: None for periodo in periodos}
     
-    # Añadir la información a la lista de ETFs
-    ETFs_Data.append({
-        "nombre": nombre,
-        "simbolo": ticker,
-        "nombre_corto": nombre_corto,
-        "descripcion_larga": descripcion_larga,
-        "precios_historicos": precios_historicos,
-        "precio_actual": precio_actual,
-        "rendimiento_log_geom": rendimiento_log_geom,
-        "riesgo_promedio": riesgo_promedio,
-        "ratio_riesgo_rendimiento": ratio_riesgo_rendimiento,
-        "rendimientos": rendimientos,
-        "riesgos": riesgos
-    })
+    return ETF(
+        nombre, ticker, nombre_corto, descripcion_larga, precio_actual,
+        rendimiento_log_geom, riesgo_promedio, ratio_riesgo_rendimiento,
+        rendimientos, riesgos, drawdowns, dias_bajo_agua, cierres,
+    )
+
+# Universo máximo que se carga completo en segundo plano al arrancar la app
+MAXIMO_PARA_CALENTAR = 50
+
+class RegistroETFs:
+    """
+    Registro perezoso de ETFs.
+
+    Importar el módulo no descarga nada: cada ETF se construye la primera vez que
+    se pide (o en segundo plano con calentar()) y el resultado se reutiliza hasta que
+    pasan ttl_segundos o el almacén vuelve a descargar sus precios. Los ETFs se buscan por nombre o por ticker en O(1), o por texto con buscar(), y sus
+    precios de cierre se guardan juntos en una MatrizCierres con un único índice de
+    fechas. Solo ocupan memoria los ETFs que se llegan a pedir.
+    """
+
+    def __init__(self, nombres, tickers, descripciones=None, ttl_segundos=None):
+        self._tickers = dict(zip(nombres, tickers))
+        self._nombres = dict(zip(tickers, nombres))
+        self._descripciones = descripciones
+        self._indice = None
+        self._datos = {}
+        # Un ETF se reconstruye pasado este tiempo (None: nunca), para no quedarse atrás de sus precios
+        self.ttl_segundos = ttl_segundos
+        self._instantes = {}  # nombre -> instante (time.monotonic) en que se construyó
+        self._caducados = {}  # nombre -> ETF descartado, para reutilizar sus metadatos al reconstruirlo
+        self._en_curso = {}  # nombre -> Future de la carga en curso
+        self.cierres = MatrizCierres()
+        self._candado = threading.Lock()
+        self._hilo_calentamiento = None
+        self._candado_calentamiento = threading.Lock()
+
+    @classmethod
+    def precargado(cls, etfs, cierres):
+        """Crea un registro con todos los ETFs ya construidos (por ejemplo, leídos de un snapshot)."""
+        registro = cls([etf.nombre for etf in etfs], [etf.simbolo for etf in etfs], [etf.descripcion_larga for etf in etfs])
+        registro.cierres = cierres
+        registro._datos = {etf.nombre: etf for etf in etfs}
+        return registro
+
+    def __len__(self):
+        return len(self._tickers)
+
+    def __iter__(self):
+        self.cargar(self.nombres())
+        for nombre in self._tickers:
+            yield self._construido(nombre)
+
+    def __contains__(self, nombre):
+        return nombre in self._tickers
+
+    def nombres(self):
+        """Devuelve los nombres de todos los ETFs sin descargar nada."""
+        return list(self._tickers)
+
+    def ticker(self, nombre):
+        """Devuelve el ticker de un ETF sin descargar nada."""
+        return self._tickers[nombre]
+
+    def nombre(self, ticker):
+        """Devuelve el nombre de un ETF a partir de su ticker sin descargar nada."""
+        return self._nombres[ticker]
+
+    def buscar(self, consulta, limite=50):
+        """Busca ETFs por ticker, nombre o descripción (prefijos y aproximada) y devuelve sus nombres."""
+        with self._candado_calentamiento:
+            # El índice se construye la primera vez que se busca
+            if self._indice is None:
+                self._indice = IndiceBusqueda(list(self._nombres), list(self._tickers), self._descripciones)
+        return [self._indice.nombres[i] for i in self._indice.buscar(consulta, limite)]
+
+    def cargado(self, nombre):
+        """Indica si el ETF ya fue construido."""
+        return self._vigente(nombre) is not None
+
+    def _vigente(self, nombre):
+        """ETF construido que aún no caducó (o None)."""
+        datos = self._datos.get(nombre)
+        if datos is not None and self.ttl_segundos is not None:
+            if time.monotonic() - self._instantes.get(nombre, 0.0) > self.ttl_segundos:
+                return None
+        return datos
+
+    def obtener(self, nombre):
+        """Devuelve la información de un ETF, construyéndola si es la primera vez."""
+        datos = self._vigente(nombre)
+        if datos is not None:
+            return datos
+        self.cargar([nombre])
+        return self._construido(nombre)
+
+    def _construido(self, nombre):
+        """ETF ya cargado; si se invalidó justo después de construirlo, el recién descartado."""
+        with self._candado:
+            return self._datos.get(nombre) or self._caducados[nombre]
+
+    def por_ticker(self, ticker):
+        """Devuelve la información de un ETF a partir de su ticker."""
+        return self.obtener(self._nombres[ticker])
+
+    def cargar(self, nombres):
+        """
+        Construye los ETFs indicados que aún no estén cargados.
+
+        Los precios se descargan en una sola petición masiva y los metadatos en un
+        pool de hilos, de modo que la latencia depende del ticker más lento y no de
+        la suma de todos.
+        """
+        esperar = {}
+        propios = {}
+        # El candado solo reparte el trabajo: dos sesiones que piden el mismo ETF esperan a la misma carga
+        with self._candado:
+            for nombre in dict.fromkeys(nombres):
+                if self._vigente(nombre) is not None:
+                    continue
+                if nombre in self._datos:
+                    # Caducado: se reconstruye conservando sus metadatos
+                    self._caducados[nombre] = self._datos.pop(nombre)
+                if nombre in self._en_curso:
+                    esperar[nombre] = self._en_curso[nombre]
+                else:
+                    propios[nombre] = self._en_curso[nombre] = Future()
+
+        if propios:
+            try:
+                etfs = self._construir(list(propios))
+            except Exception as e:
+                with self._candado:
+                    for nombre, futuro in propios.items():
+                        del self._en_curso[nombre]
+                        futuro.set_exception(e)
+                raise
+            with self._candado:
+                for nombre, futuro in propios.items():
+                    del self._en_curso[nombre]
+                    futuro.set_result(etfs[nombre])
+
+        for futuro in esperar.values():
+            futuro.result()
+
+    def _construir(self, faltantes):
+        """Descarga, construye y publica los ETFs indicados (el candado solo se toma para publicarlos) y los devuelve."""
+        tickers = [self._tickers[nombre] for nombre in faltantes]
+        with self._candado:
+            # Un ETF que se reconstruye porque cambiaron sus precios conserva nombre corto y descripción
+            datos_por_ticker = {
+                self._tickers[nombre]: (etf.nombre_corto, etf.descripcion_larga)
+                for nombre, etf in self._caducados.items() if nombre in faltantes
+            }
+        sin_info = [ticker for ticker in tickers if ticker not in datos_por_ticker]
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            # Los precios se descargan mientras se obtienen los metadatos
+            futuro_precios = pool.submit(almacen_precios.obtener, tickers)
+            info_por_ticker = en_paralelo(obtener_info, sin_info)
+            descripciones = [info_por_ticker[ticker][1] for ticker in sin_info]
+            # Todas las descripciones se traducen en una sola llamada (o salen de la caché)
+            traducciones = traducir_textos(descripciones) if proveedor_datos.traducir_descripciones else descripciones
+            datos_por_ticker.update({
+                ticker: (info_por_ticker[ticker][0], traduccion)
+                for ticker, traduccion in zip(sin_info, traducciones)
+            })
+            precios_todos = futuro_precios.result()
+        # Todas las métricas de todos los tickers y periodos salen de una sola pasada
+        metricas = calcular_metricas(precios_todos, PERIODOS)
+        with self._candado:
+            # Solo los cierres se quedan en memoria; el resto de columnas sigue en el almacén
+            self.cierres.agregar(precios_todos)
+        etfs = {
+            nombre: construir_etf(nombre, ticker, datos_por_ticker[ticker], metricas.get(ticker), self.cierres)
+            for nombre, ticker in zip(faltantes, tickers)
+        }
+        with self._candado:
+            self._datos.update(etfs)
+            instante = time.monotonic()
+            for nombre in etfs:
+                self._instantes[nombre] = instante
+                self._caducados.pop(nombre, None)
+        return etfs
+
+    def invalidar(self, tickers):
+        """
+        Descarta los ETFs de los tickers indicados para que se reconstruyan con sus precios nuevos.
+
+        Se registra en almacen_precios.al_actualizar: así las métricas y el precio actual
+        no se quedan atrás de los precios que muestran las gráficas.
+        """
+        with self._candado:
+            for ticker in tickers:
+                nombre = self._nombres.get(ticker)
+                etf = self._datos.pop(nombre, None)
+                if etf is not None:
+                    self._caducados[nombre] = etf
+
+    def calentar(self):
+        """
+        Construye todos los ETFs en un hilo en segundo plano (solo la primera vez que se llama).
+
+        Con un universo de más de MAXIMO_PARA_CALENTAR ETFs no hace nada: solo se
+        cargan los que se piden.
+        """
+        with self._candado_calentamiento:
+            if self._hilo_calentamiento is None and len(self) <= MAXIMO_PARA_CALENTAR:
+                self._hilo_calentamiento = threading.Thread(target=self.cargar, args=(self.nombres(),), daemon=True)
+                self._hilo_calentamiento.start()
+            return self._hilo_calentamiento
+
+# Precios históricos en memoria compartidos por todas las sesiones de la app
+almacen_precios = AlmacenPrecios(descargar_datos_historicos)
+
+# Variable para almacenar la información de los ETFs (se llena bajo demanda)
+ETFs_Data = RegistroETFs(etf_nombres, etf_tickers, etf_descripciones, ttl_segundos=almacen_precios.ttl_segundos)
+# Cuando el almacén vuelve a descargar unos precios, los ETFs construidos con los anteriores se descartan
+almacen_precios.al_actualizar(ETFs_Data.invalidar)
@@ -0,0 +1,172 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import requests
+import yfinance as yf
+
+# Número máximo de peticiones simultáneas a yfinance
+CONCURRENCIA = int(os.environ.get("SIMULADOR_CONCURRENCIA", "8"))
+
+# Peticiones por segundo permitidas hacia el proveedor
+PETICIONES_POR_SEGUNDO = float(os.environ.get("SIMULADOR_PETICIONES_POR_SEGUNDO", "5"))
+
+# Reintentos ante errores de red y espera inicial (se duplica en cada intento)
+REINTENTOS = int(os.environ.get("SIMULADOR_REINTENTOS", "3"))
+ESPERA_INICIAL = 0.5
+
+class LimitadorTasa:
+    """Limitador de tasa tipo cubeta de fichas, compartido por todos los hilos."""
+
+    def __init__(self, por_segundo, rafaga=None):
+        self.por_segundo = por_segundo
+        self.capacidad = rafaga if rafaga is not None else max(1.0, por_segundo)
+        self._fichas = self.capacidad
+        self._ultimo = time.monotonic()
+        self._candado = threading.Lock()
+
+    def esperar(self):
+        """Bloquea hasta que haya una ficha disponible y la consume."""
+        if self.por_segundo <= 0:
+            return
+        while True:
+            with self._candado:
+                ahora = time.monotonic()
+                self._fichas = min(self.capacidad, self._fichas + (ahora - self._ultimo) * self.por_segundo)
+                self._ultimo = ahora
+                if self._fichas >= 1:
+                    self._fichas -= 1
+                    return
+                faltante = (1 - self._fichas) / self.por_segundo
+            time.sleep(faltante)
+
+def _crear_sesion():
+    """Crea una sesión HTTP con un pool de conexiones del tamaño de la concurrencia."""
+    sesion = requests.Session()
+    adaptador = requests.adapters.HTTPAdapter(pool_connections=CONCURRENCIA, pool_maxsize=CONCURRENCIA)
+    sesion.mount("https://", adaptador)
+    sesion.mount("http://", adaptador)
+    return sesion
+
+# Sesión y limitador compartidos por todas las peticiones del proceso
+SESION = _crear_sesion()
+LIMITADOR = LimitadorTasa(PETICIONES_POR_SEGUNDO)
+
+def con_reintentos(funcion, *args, **kwargs):
+    """
+    Ejecuta una petición respetando el limitador y reintentando con espera exponencial.
+
+    Se relanza la última excepción si fallan todos los intentos.
+    """
+    for intento in range(REINTENTOS):
+        LIMITADOR.esperar()
+        try:
+            return funcion(*args, **kwargs)
+        except Exception:
+            if intento == REINTENTOS - 1:
+                raise
+            time.sleep(ESPERA_INICIAL * (2 ** intento) * (1 + random.random()))
+
+def en_paralelo(funcion, elementos, max_hilos=None):
+    """Aplica una función a cada elemento en un pool de hilos acotado y devuelve un diccionario."""
+    elementos = list(elementos)
+    if not elementos:
+        return {}
+    max_hilos = min(max_hilos or CONCURRENCIA, len(elementos))
+    with ThreadPoolExecutor(max_workers=max_hilos) as pool:
+        return dict(zip(elementos, pool.map(funcion, elementos)))
+
+def crear_ticker(ticker):
+    """Crea un objeto yf.Ticker que usa la sesión compartida."""
+    return yf.Ticker(ticker, session=SESION)
+
+def _columnas_de(datos, ticker):
+    """Extrae el DataFrame de un ticker del resultado de yf.download."""
+    if not isinstance(datos.columns, pd.MultiIndex):
+        return datos
+    if ticker in datos.columns.get_level_values(0):
+        return datos[ticker]
+    if ticker in datos.columns.get_level_values(1):
+        return datos.xs(ticker, axis=1, level=1)
+    return None
+
+def _descargar_lote(tickers, fecha_inicio, fecha_fin):
+    """Llama a yf.download y falla si la respuesta llega vacía para poder reintentar."""
+    datos = yf.download(
+        tickers,
+        start=fecha_inicio,
+        end=fecha_fin,
+        group_by='ticker',
+        actions=True,
+        auto_adjust=True,
+        ignore_tz=False,
+        threads=min(CONCURRENCIA, len(tickers)),
+        progress=False,
+        session=SESION,
+    )
+    if datos is None or datos.empty:
+        raise ValueError(f"Respuesta vacía para {', '.join(tickers)}")
+    return datos
+
+def descargar_historiales(tickers, fecha_inicio, fecha_fin):
+    """
+    Descarga en una sola petición masiva los precios de varios tickers entre dos fechas.
+
+    Returns:
+    dict: DataFrame por ticker (con las mismas columnas que Ticker.history), o None si falló.
+    """
+    tickers = list(tickers)
+    try:
+        datos = con_reintentos(_descargar_lote, tickers, fecha_inicio, fecha_fin)
+    except Exception as e:
+        print(f"Error al descargar datos para {', '.join(tickers)}: {e}")
+        return {ticker: None for ticker in tickers}
+
+    historiales = {}
+    for ticker in tickers:
+        columnas = _columnas_de(datos, ticker)
+        if columnas is None:
+            historiales[ticker] = None
+            continue
+        columnas = columnas.dropna(how='all')
+        historiales[ticker] = columnas if not columnas.empty else None
+    return historiales
+
+def _descargar_cotizaciones_lote(tickers):
+    """Pide a yf.download las barras de un minuto del día y falla si la respuesta llega vacía."""
+    datos = yf.download(
+        tickers,
+        period='1d',
+        interval='1m',
+        group_by='ticker',
+        auto_adjust=True,
+        threads=min(CONCURRENCIA, len(tickers)),
+        progress=False,
+        session=SESION,
+    )
+    if datos is None or datos.empty:
+        raise ValueError(f"Respuesta vacía para {', '.join(tickers)}")
+    return datos
+
+def descargar_cotizaciones(tickers):
+    """
+    Obtiene el último precio de varios tickers en una sola petición masiva.
+
+    Returns:
+    dict: Último precio por ticker, o None si no hubo cotización.
+    """
+    tickers = list(tickers)
+    try:
+        datos = con_reintentos(_descargar_cotizaciones_lote, tickers)
+    except Exception as e:
+        print(f"Error al obtener cotizaciones para {', '.join(tickers)}: {e}")
+        return {ticker: None for ticker in tickers}
+
+    cotizaciones = {}
+    for ticker in tickers:
+        columnas = _columnas_de(datos, ticker)
+        cierre = columnas['Close'].dropna() if columnas is not None and 'Close' in columnas else None
+        cotizaciones[ticker] = float(cierre.iloc[-1]) if cierre is not None and not cierre.empty else None
+    return cotizaciones
@@ -0,0 +1,261 @@
+import io
+import threading
+from collections import OrderedDict
+import numpy as np
+import seaborn as sns
+from matplotlib.figure import Figure
+from instrumentacion import instrumentacion
+
+# Resolución con la que se dibujan las gráficas
+DPI = 100
+
+# Número máximo de imágenes guardadas en memoria
+MAXIMO_IMAGENES = 256
+
+_imagenes = OrderedDict()
+_candado = threading.Lock()
+
+def lttb(x, y, umbral):
+    """
+    Reduce una serie a 'umbral' puntos con el algoritmo Largest-Triangle-Three-Buckets.
+
+    Conserva la forma visual de la serie (picos y valles) mucho mejor que tomar un
+    punto cada k.
+
+    Args:
+    x (ndarray): Valores del eje x (numéricos y crecientes).
+    y (ndarray): Valores del eje y.
+    umbral (int): Número de puntos deseado.
+
+    Returns:
+    ndarray: Índices de los puntos conservados.
+    """
+    n = len(x)
+    if umbral >= n or umbral < 3:
+        return np.arange(n)
+
+    indices = np.empty(umbral, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    # Límites de los umbral - 2 grupos centrales
+    limites = np.linspace(1, n - 1, umbral - 1).astype(np.int64)
+    anterior = 0
+    for i in range(umbral - 2):
+        inicio, fin = limites[i], limites[i + 1]
+        # Promedio del grupo siguiente (o el último punto para el último grupo)
+        if i + 2 < len(limites):
+            sig_inicio, sig_fin = limites[i + 1], limites[i + 2]
+            x_medio = x[sig_inicio:sig_fin].mean()
+            y_medio = y[sig_inicio:sig_fin].mean()
+        else:
+            x_medio, y_medio = x[-1], y[-1]
+        # Punto del grupo que forma el triángulo de mayor área
+        areas = np.abs((x[anterior] - x_medio) * (y[inicio:fin] - y[anterior]) - (x[anterior] - x[inicio:fin]) * (y_medio - y[anterior]))
+        anterior = inicio + int(np.argmax(areas))
+        indices[i + 1] = anterior
+    return indices
+
+def reducir_serie(serie, puntos):
+    """Reduce una Serie de precios indexada por fecha a como máximo 'puntos' puntos."""
+    serie = serie.dropna()
+    if len(serie) <= puntos:
+        return serie
+    x = serie.index.asi8.astype(float)
+    indices = lttb(x, serie.to_numpy(dtype=float), puntos)
+    return serie.iloc[indices]
+
+def _a_png(figura):
+    """Convierte una figura a bytes PNG."""
+    buffer = io.BytesIO()
+    figura.savefig(buffer, format='png', dpi=DPI, bbox_inches='tight')
+    # Las figuras se crean sin pyplot (no quedan registradas en el estado global);
+    # se limpian para liberar su memoria de inmediato
+    figura.clear()
+    return buffer.getvalue()
+
+def _con_cache(clave, dibujar):
+    """Devuelve la imagen guardada para la clave o la dibuja y la guarda (LRU)."""
+    with _candado:
+        imagen = _imagenes.get(clave)
+        if imagen is not None:
+            _imagenes.move_to_end(clave)
+            instrumentacion.registrar_cache('graficas', aciertos=1)
+            return imagen
+    instrumentacion.registrar_cache('graficas', fallos=1)
+    with instrumentacion.medir(f'grafica_{clave[0]}'):
+        imagen = _a_png(dibujar())
+    with _candado:
+        _imagenes[clave] = imagen
+        while len(_imagenes) > MAXIMO_IMAGENES:
+            _imagenes.popitem(last=False)
+    return imagen
+
+def _huella(serie):
+    """
+    Resumen barato de una serie para usarlo en la clave de la caché.
+
+    Incluye un hash de todos los valores: una historia reajustada (splits, dividendos)
+    conserva fechas, longitud y último cierre, pero no se debe reutilizar su gráfica.
+    """
+    if serie is None or len(serie) == 0:
+        return None
+    valores = np.ascontiguousarray(serie.to_numpy(dtype=float))
+    return (str(serie.index[0]), str(serie.index[-1]), len(serie), float(serie.iloc[-1]), hash(valores.tobytes()))
+
+def grafica_historica(titulo, precios_historicos, tamano=(10, 5)):
+    """Gráfica del precio de cierre de un ETF, reducida al ancho en píxeles de la imagen."""
+    cierre = precios_historicos['Close']
+    clave = ('historica', titulo, _huella(cierre), tamano)
+
+    def dibujar():
+        serie = reducir_serie(cierre, int(tamano[0] * DPI))
+        figura = Figure(figsize=tamano)
+        ax = figura.subplots()
+        ax.plot(serie.index, serie.to_numpy())
+        ax.set_title(titulo, fontsize=16)
+        ax.set_xlabel('Fecha', fontsize=12)
+        ax.set_ylabel('Precio de Cierre', fontsize=12)
+        ax.tick_params(axis='x', rotation=45)
+        return figura
+
+    return _con_cache(clave, dibujar)
+
+def grafica_movil(titulo, analitica, tamano=(10, 7)):
+    """Volatilidad y rendimiento móviles (arriba) y drawdown (abajo) calculados por analitica_movil."""
+    clave = ('movil', titulo, tuple(analitica.columns), _huella(analitica['Drawdown']), tamano)
+
+    def dibujar():
+        puntos = int(tamano[0] * DPI)
+        figura = Figure(figsize=tamano)
+        ax_volatilidad, ax_drawdown = figura.subplots(2, 1, sharex=True, height_ratios=(2, 1))
+        for columna in analitica.columns:
+            if columna.startswith('Volatilidad') or columna.startswith('Rendimiento'):
+                serie = reducir_serie(analitica[columna], puntos)
+                ax_volatilidad.plot(serie.index, serie.to_numpy(), label=columna, linestyle='-' if columna.startswith('Volatilidad') else ':')
+        ax_volatilidad.axhline(0, color='gray', linewidth=0.5)
+        ax_volatilidad.set_title(titulo, fontsize=16)
+        ax_volatilidad.set_ylabel('Anualizada / del periodo', fontsize=12)
+        ax_volatilidad.legend(fontsize=8, ncol=2)
+        drawdown = reducir_serie(analitica['Drawdown'], puntos)
+        ax_drawdown.fill_between(drawdown.index, drawdown.to_numpy(), 0, color='firebrick', alpha=0.4)
+        ax_drawdown.set_ylabel('Drawdown', fontsize=12)
+        ax_drawdown.set_xlabel('Fecha', fontsize=12)
+        ax_drawdown.tick_params(axis='x', rotation=45)
+        return figura
+
+    return _con_cache(clave, dibujar)
+
+def grafica_comparacion_precios(precios_por_ticker, tamano=(10, 5)):
+    """Gráfica con el precio de cierre de varios ETFs, cada serie reducida al ancho de la imagen."""
+    series = {
+        ticker: precios['Close']
+        for ticker, precios in precios_por_ticker.items()
+        if precios is not None and not precios.empty
+    }
+    clave = ('comparacion', tuple((ticker, _huella(serie)) for ticker, serie in series.items()), tamano)
+
+    def dibujar():
+        figura = Figure(figsize=tamano)
+        ax = figura.subplots()
+        for ticker, cierre in series.items():
+            serie = reducir_serie(cierre, int(tamano[0] * DPI))
+            ax.plot(serie.index, serie.to_numpy(), label=ticker)
+        ax.set_title("Comparación de Precios Históricos")
+        ax.set_xlabel("Fecha")
+        ax.set_ylabel("Precio de Cierre")
+        ax.legend()
+        return figura
+
+    return _con_cache(clave, dibujar)
+
+def grafica_barras(datos, x, titulo, xlabel, ylabel, tamano=(12, 6), palette=None, rotacion=0):
+    """Gráfica de barras agrupadas por la columna 'Tipo' (rendimiento y riesgo)."""
+    datos = datos.dropna()
+    clave = ('barras', titulo, x, tuple(map(tuple, datos.to_numpy().tolist())), tamano, palette, rotacion)
+
+    def dibujar():
+        figura = Figure(figsize=tamano)
+        ax = figura.subplots()
+        sns.barplot(data=datos, x=x, y='Valor', hue='Tipo', palette=palette, ax=ax)
+        ax.set_title(titulo, fontsize=16)
+        ax.set_xlabel(xlabel, fontsize=12)
+        ax.set_ylabel(ylabel, fontsize=12)
+        ax.tick_params(axis='x', rotation=rotacion)
+        ax.legend(title='Tipo')
+        return figura
+
+    return _con_cache(clave, dibujar)
+
+def grafica_bandas(simulaciones, tamano=(10, 5)):
+    """Gráfica de la mediana y la banda entre los percentiles 5 y 95 de varias simulaciones Monte Carlo."""
+    clave = ('bandas', tuple(
+        (etiqueta, tuple(np.round(simulacion['bandas'][50], 2)), tuple(np.round(simulacion['bandas'][5], 2)), tuple(np.round(simulacion['bandas'][95], 2)))
+        for etiqueta, simulacion in simulaciones.items()
+    ), tamano)
+
+    def dibujar():
+        figura = Figure(figsize=tamano)
+        ax = figura.subplots()
+        for etiqueta, simulacion in simulaciones.items():
+            linea, = ax.plot(simulacion['anos'], simulacion['bandas'][50], label=f"{etiqueta} (mediana)")
+            ax.fill_between(simulacion['anos'], simulacion['bandas'][5], simulacion['bandas'][95], color=linea.get_color(), alpha=0.15)
+        ax.set_title("Simulación Monte Carlo del Valor Futuro (percentiles 5–95)", fontsize=16)
+        ax.set_xlabel('Años', fontsize=12)
+        ax.set_ylabel('Valor (USD)', fontsize=12)
+        ax.legend()
+        return figura
+
+    return _con_cache(clave, dibujar)
+
+def grafica_frontera(portafolio, tamano=(10, 6)):
+    """Frontera eficiente con los ETFs individuales y los portafolios de mínima varianza y máximo Sharpe."""
+    frontera = portafolio['frontera']
+    especiales = [('Mínima varianza', portafolio['minima_varianza']), ('Máximo Sharpe', portafolio['maximo_sharpe'])]
+    especiales = [(etiqueta, datos) for etiqueta, datos in especiales if datos is not None]
+    clave = (
+        'frontera', tuple(portafolio['tickers']), portafolio['periodo'], portafolio['dias'],
+        tuple(np.round(frontera['riesgos'], 6)), tamano,
+    )
+
+    def dibujar():
+        figura = Figure(figsize=tamano)
+        ax = figura.subplots()
+        ax.plot(frontera['riesgos'], frontera['rendimientos'], color='darkblue', label='Frontera eficiente')
+        ax.scatter(portafolio['riesgos'], portafolio['rendimientos'], color='gray')
+        for ticker, riesgo, rendimiento in zip(portafolio['tickers'], portafolio['riesgos'], portafolio['rendimientos']):
+            ax.annotate(ticker, (riesgo, rendimiento), textcoords='offset points', xytext=(4, 4))
+        for etiqueta, datos in especiales:
+            ax.scatter([datos['riesgo']], [datos['rendimiento']], marker='*', s=200, label=etiqueta, zorder=3)
+        ax.set_title('Frontera Eficiente', fontsize=16)
+        ax.set_xlabel('Riesgo (desviación estándar anual)', fontsize=12)
+        ax.set_ylabel('Rendimiento anual', fontsize=12)
+        ax.legend()
+        return figura
+
+    return _con_cache(clave, dibujar)
+
+def grafica_backtest(resultado, tamano=(10, 7)):
+    """Valor final de cada fecha de inicio del backtest (arriba) y distribución de los rendimientos (abajo)."""
+    clave = (
+        'backtest', tuple(resultado['tickers']), tuple(np.round(resultado['pesos'], 6)),
+        tuple(np.round(resultado['valor_final'], 2)), tuple(np.round(resultado['aportado'], 2)), tamano,
+    )
+
+    def dibujar():
+        figura = Figure(figsize=tamano)
+        ax_valor, ax_distribucion = figura.subplots(2, 1, height_ratios=(3, 2))
+        ax_valor.plot(resultado['inicios'], resultado['valor_final'], label='Valor final')
+        ax_valor.plot(resultado['inicios'], resultado['aportado'], color='gray', linestyle='--', label='Total aportado')
+        ax_valor.set_title('Backtest por Fecha de Inicio', fontsize=16)
+        ax_valor.set_xlabel('Fecha de inicio', fontsize=12)
+        ax_valor.set_ylabel('Valor (USD)', fontsize=12)
+        ax_valor.legend()
+        rendimientos = resultado['rendimiento'][np.isfinite(resultado['rendimiento'])]
+        ax_distribucion.hist(rendimientos, bins=min(30, max(5, len(rendimientos) // 3)), color='steelblue', alpha=0.8)
+        ax_distribucion.axvline(0, color='firebrick', linewidth=1)
+        ax_distribucion.set_xlabel('Rendimiento total sobre lo aportado', fontsize=12)
+        ax_distribucion.set_ylabel('Fechas de inicio', fontsize=12)
+        figura.tight_layout()
+        return figura
+
+    return _con_cache(clave, dibujar)
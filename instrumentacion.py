@@ -0,0 +1,202 @@
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Límites (en segundos) de los intervalos del histograma de latencias, como los de Prometheus
+LIMITES_SEGUNDOS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Número de errores recientes que se conservan para el panel de depuración
+MAXIMO_ERRORES = 50
+
+# Muestra el panel de depuración en la barra lateral (también con ?depuracion=1 en la URL)
+DEPURACION = os.environ.get('SIMULADOR_DEPURACION', '') == '1'
+
+def _etiquetas(**etiquetas):
+    """Etiquetas en formato Prometheus, con comillas y barras escapadas."""
+    return ','.join(f'{nombre}="{str(valor).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for nombre, valor in etiquetas.items())
+
+class Instrumentacion:
+    """
+    Latencias, fallos y aciertos de caché de cada etapa de la app.
+
+    Cada llamada medida suma su duración a un histograma por etapa (y a un total
+    por ticker cuando se conoce), así que el costo por llamada es constante y la
+    memoria no crece con el número de llamadas.
+    """
+
+    def __init__(self):
+        self._candado = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Descarta todo lo registrado."""
+        with self._candado:
+            self._etapas = {}  # etapa -> [cuentas por intervalo, llamadas, segundos, fallos]
+            self._por_ticker = {}  # (etapa, ticker) -> [llamadas, segundos, fallos]
+            self._caches = {}  # nombre -> [aciertos, fallos]
+            self._errores = deque(maxlen=MAXIMO_ERRORES)
+
+    def _etapa(self, etapa):
+        datos = self._etapas.get(etapa)
+        if datos is None:
+            datos = self._etapas[etapa] = [[0] * (len(LIMITES_SEGUNDOS) + 1), 0, 0.0, 0]
+        return datos
+
+    def registrar(self, etapa, segundos, ticker=None, fallo=False):
+        """Registra una llamada a una etapa con su duración."""
+        intervalo = next((i for i, limite in enumerate(LIMITES_SEGUNDOS) if segundos <= limite), len(LIMITES_SEGUNDOS))
+        with self._candado:
+            datos = self._etapa(etapa)
+            datos[0][intervalo] += 1
+            datos[1] += 1
+            datos[2] += segundos
+            datos[3] += int(fallo)
+            if ticker is not None:
+                por_ticker = self._por_ticker.setdefault((etapa, ticker), [0, 0.0, 0])
+                por_ticker[0] += 1
+                por_ticker[1] += segundos
+                por_ticker[2] += int(fallo)
+
+    def registrar_fallo(self, etapa, error, ticker=None):
+        """Registra un error que la etapa capturó y manejó por su cuenta (sin relanzarlo)."""
+        with self._candado:
+            self._etapa(etapa)[3] += 1
+            if ticker is not None:
+                self._por_ticker.setdefault((etapa, ticker), [0, 0.0, 0])[2] += 1
+            self._errores.append({
+                'instante': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'etapa': etapa,
+                'ticker': ticker,
+                'error': f"{type(error).__name__}: {error}",
+            })
+
+    def registrar_cache(self, nombre, aciertos=0, fallos=0):
+        """Suma aciertos y fallos de una caché."""
+        if not aciertos and not fallos:
+            return
+        with self._candado:
+            cuentas = self._caches.setdefault(nombre, [0, 0])
+            cuentas[0] += aciertos
+            cuentas[1] += fallos
+
+    @contextmanager
+    def medir(self, etapa, ticker=None):
+        """Mide la duración del bloque; si lanza una excepción se cuenta como fallo y se relanza."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.registrar(etapa, time.perf_counter() - inicio, ticker, fallo=True)
+            raise
+        self.registrar(etapa, time.perf_counter() - inicio, ticker)
+
+    def resumen(self):
+        """
+        Devuelve todo lo registrado en un diccionario serializable a JSON.
+
+        Los percentiles se estiman con el límite superior del intervalo del histograma
+        en que caen (None si caen en el último intervalo, sin límite).
+        """
+        with self._candado:
+            etapas = {etapa: (list(datos[0]), datos[1], datos[2], datos[3]) for etapa, datos in self._etapas.items()}
+            por_ticker = {clave: tuple(datos) for clave, datos in self._por_ticker.items()}
+            caches = {nombre: tuple(cuentas) for nombre, cuentas in self._caches.items()}
+            errores = list(self._errores)
+
+        def percentil(cuentas, llamadas, fraccion):
+            acumulado = 0
+            for limite, cuenta in zip(LIMITES_SEGUNDOS + (None,), cuentas):
+                acumulado += cuenta
+                if acumulado >= fraccion * llamadas:
+                    return limite
+            return None
+
+        resumen = {'etapas': {}, 'por_ticker': {}, 'caches': {}, 'errores': errores}
+        for etapa, (cuentas, llamadas, segundos, fallos) in sorted(etapas.items()):
+            resumen['etapas'][etapa] = {
+                'llamadas': llamadas,
+                'fallos': fallos,
+                'segundos_total': segundos,
+                'segundos_promedio': segundos / llamadas if llamadas else None,
+                'p50_segundos': percentil(cuentas, llamadas, 0.5) if llamadas else None,
+                'p95_segundos': percentil(cuentas, llamadas, 0.95) if llamadas else None,
+                'histograma': dict(zip([str(limite) for limite in LIMITES_SEGUNDOS] + ['+Inf'], cuentas)),
+            }
+        for (etapa, ticker), (llamadas, segundos, fallos) in sorted(por_ticker.items()):
+            resumen['por_ticker'].setdefault(etapa, {})[ticker] = {'llamadas': llamadas, 'segundos_total': segundos, 'fallos': fallos}
+        for nombre, (aciertos, fallos) in sorted(caches.items()):
+            resumen['caches'][nombre] = {'aciertos': aciertos, 'fallos': fallos, 'tasa_aciertos': aciertos / (aciertos + fallos)}
+        return resumen
+
+    def como_json(self):
+        """Exporta el resumen como texto JSON."""
+        return json.dumps(self.resumen(), ensure_ascii=False, indent=2)
+
+    def como_prometheus(self):
+        """Exporta las métricas en el formato de texto de Prometheus."""
+        resumen = self.resumen()
+        lineas = [
+            '# HELP simulador_latencia_segundos Duración de cada llamada por etapa.',
+            '# TYPE simulador_latencia_segundos histogram',
+        ]
+        for etapa, datos in resumen['etapas'].items():
+            acumulado = 0
+            for limite, cuenta in datos['histograma'].items():
+                acumulado += cuenta
+                lineas.append(f"simulador_latencia_segundos_bucket{{{_etiquetas(etapa=etapa, le=limite)}}} {acumulado}")
+            lineas.append(f"simulador_latencia_segundos_sum{{{_etiquetas(etapa=etapa)}}} {datos['segundos_total']}")
+            lineas.append(f"simulador_latencia_segundos_count{{{_etiquetas(etapa=etapa)}}} {datos['llamadas']}")
+        lineas += ['# HELP simulador_fallos_total Errores por etapa.', '# TYPE simulador_fallos_total counter']
+        for etapa, datos in resumen['etapas'].items():
+            lineas.append(f"simulador_fallos_total{{{_etiquetas(etapa=etapa)}}} {datos['fallos']}")
+        lineas += ['# HELP simulador_ticker_segundos_total Tiempo por etapa y ticker.', '# TYPE simulador_ticker_segundos_total counter']
+        for etapa, tickers in resumen['por_ticker'].items():
+            for ticker, datos in tickers.items():
+                lineas.append(f"simulador_ticker_segundos_total{{{_etiquetas(etapa=etapa, ticker=ticker)}}} {datos['segundos_total']}")
+        lineas += ['# HELP simulador_cache_total Consultas a cada caché por resultado.', '# TYPE simulador_cache_total counter']
+        for nombre, datos in resumen['caches'].items():
+            lineas.append(f"simulador_cache_total{{{_etiquetas(cache=nombre, resultado='acierto')}}} {datos['aciertos']}")
+            lineas.append(f"simulador_cache_total{{{_etiquetas(cache=nombre, resultado='fallo')}}} {datos['fallos']}")
+        return '\n'.join(lineas) + '\n'
+
+# Instrumentación compartida por todas las sesiones de la app
+instrumentacion = Instrumentacion()
+
+def medido(etapa, argumento_ticker=None):
+    """
+    Decorador que mide cada llamada a la función como la etapa indicada.
+
+    Args:
+    etapa (str): Nombre de la etapa.
+    argumento_ticker (int): Posición del argumento con el ticker, para el desglose por ticker.
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            ticker = None
+            if argumento_ticker is not None and len(args) > argumento_ticker and isinstance(args[argumento_ticker], str):
+                ticker = args[argumento_ticker]
+            with instrumentacion.medir(etapa, ticker):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+def iniciar_perfil():
+    """Empieza a perfilar con cProfile el hilo actual (el de la ejecución del script)."""
+    perfil = cProfile.Profile()
+    perfil.enable()
+    return perfil
+
+def terminar_perfil(perfil, lineas=40):
+    """Detiene el perfil y devuelve las funciones con más tiempo acumulado como texto."""
+    perfil.disable()
+    salida = io.StringIO()
+    pstats.Stats(perfil, stream=salida).sort_stats('cumulative').print_stats(lineas)
+    return salida.getvalue()
@@ -0,0 +1,502 @@
+from collections import deque
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from instrumentacion import medido
+
+# Días de negociación en un año
+DIAS_POR_ANO = 252
+
+# Años de historia que se descargan (rendimiento_logaritmico divide entre este valor)
+ANOS_HISTORIA = 10
+
+# Ventanas (en días de negociación) de la volatilidad y el rendimiento móviles
+VENTANAS_MOVILES = (21, 63, 252)
+
+# Desplazamiento de cada periodo respecto a la última fecha disponible
+DESPLAZAMIENTOS = {
+    '1m': pd.DateOffset(months=1),
+    '3m': pd.DateOffset(months=3),
+    '6m': pd.DateOffset(months=6),
+    '1y': pd.DateOffset(years=1),
+    '3y': pd.DateOffset(years=3),
+    '5y': pd.DateOffset(years=5),
+    '10y': pd.DateOffset(years=10),
+}
+
+def _fechas_sin_zona(indice):
+    """Quita la zona horaria de un índice de fechas conservando la hora local."""
+    indice = pd.DatetimeIndex(indice)
+    if indice.tz is not None:
+        indice = indice.tz_localize(None)
+    return indice
+
+def alinear_cierres(precios_por_ticker):
+    """
+    Alinea los precios de cierre de varios tickers en una sola matriz fecha × ticker.
+
+    Args:
+    precios_por_ticker (dict): DataFrame (con columna 'Close') o Serie por ticker.
+
+    Returns:
+    tuple: (fechas, tickers, matriz) donde la matriz es float64 con NaN donde no hay precio.
+    """
+    series = {}
+    for ticker, precios in precios_por_ticker.items():
+        if precios is None or len(precios) == 0:
+            continue
+        cierre = precios['Close'] if isinstance(precios, pd.DataFrame) else precios
+        cierre = pd.Series(cierre.to_numpy(dtype=float), index=_fechas_sin_zona(cierre.index))
+        series[ticker] = cierre[~cierre.index.duplicated(keep='last')]
+    if not series:
+        return pd.DatetimeIndex([]), [], np.empty((0, 0))
+    tabla = pd.concat(series, axis=1).sort_index()
+    return tabla.index, list(tabla.columns), tabla.to_numpy(dtype=float)
+
+# Tipo de los precios en la matriz de cierres (np.float32 reduce la memoria a la mitad)
+TIPO_CIERRES = np.float64
+
+class MatrizCierres:
+    """
+    Precios de cierre de varios tickers alineados sobre un único índice de fechas.
+
+    Guarda una columna por ticker en una sola matriz, en lugar de un DataFrame
+    OHLCV completo por ticker. Se pueden agregar tickers poco a poco.
+    """
+
+    __slots__ = ('_datos', 'columnas')
+
+    def __init__(self, tipo=TIPO_CIERRES):
+        # Fechas y valores se reemplazan juntos para que otros hilos nunca vean una mezcla
+        self._datos = (pd.DatetimeIndex([]), np.empty((0, 0), dtype=tipo))
+        self.columnas = {}
+
+    @classmethod
+    def desde_arreglos(cls, fechas, tickers, valores):
+        """Crea la matriz directamente a partir de arreglos ya alineados (por ejemplo, mapeados desde disco)."""
+        matriz = cls(valores.dtype)
+        matriz._datos = (fechas, valores)
+        matriz.columnas = {ticker: j for j, ticker in enumerate(tickers)}
+        return matriz
+
+    @property
+    def fechas(self):
+        return self._datos[0]
+
+    @property
+    def valores(self):
+        return self._datos[1]
+
+    @property
+    def tickers(self):
+        return list(self.columnas)
+
+    def instantanea(self):
+        """Devuelve (fechas, tickers, valores) de un mismo estado de la matriz, aunque otro hilo esté agregando tickers."""
+        # 'columnas' se reemplaza después de '_datos': leída primero, nunca tiene columnas que falten en los valores
+        columnas = self.columnas
+        fechas, valores = self._datos
+        return fechas, list(columnas), valores
+
+    def agregar(self, precios_por_ticker):
+        """Agrega (o reemplaza) los cierres de varios tickers realineando la matriz si hay fechas nuevas."""
+        fechas_nuevas, tickers_nuevos, cierres_nuevos = alinear_cierres(precios_por_ticker)
+        if not tickers_nuevos:
+            return
+        fechas_actuales, valores_actuales = self._datos
+        fechas = fechas_actuales.union(fechas_nuevas)
+        columnas = dict(self.columnas)
+        for ticker in tickers_nuevos:
+            columnas.setdefault(ticker, len(columnas))
+        valores = np.full((len(fechas), len(columnas)), np.nan, dtype=valores_actuales.dtype)
+        if valores_actuales.size:
+            valores[fechas.get_indexer(fechas_actuales), :valores_actuales.shape[1]] = valores_actuales
+        filas = fechas.get_indexer(fechas_nuevas)
+        for j, ticker in enumerate(tickers_nuevos):
+            columna = valores[:, columnas[ticker]]
+            columna[:] = np.nan
+            columna[filas] = cierres_nuevos[:, j]
+        self._datos = (fechas, valores)
+        self.columnas = columnas
+
+    def serie(self, ticker):
+        """Devuelve los cierres de un ticker como Serie, sin las fechas en que no cotizó."""
+        fechas, valores = self._datos
+        columna = valores[:, self.columnas[ticker]]
+        validos = ~np.isnan(columna)
+        return pd.Series(columna[validos], index=fechas[validos], name='Close')
+
+    def huella(self, tickers):
+        """
+        Resumen barato de los cierres de varios tickers para usarlo como clave de caché.
+
+        Cambia si se agrega o se corrige algún precio de esos tickers, pero no si solo
+        se agregan otros tickers a la matriz.
+        """
+        fechas, valores = self._datos
+        partes = []
+        for ticker in tickers:
+            if ticker not in self.columnas:
+                partes.append(None)
+                continue
+            columna = valores[:, self.columnas[ticker]]
+            validos = ~np.isnan(columna)
+            partes.append((hash(fechas.asi8[validos].tobytes()), hash(columna[validos].tobytes())))
+        return hash(tuple(partes))
+
+    def ultimo(self, ticker):
+        """Devuelve el último cierre disponible de un ticker (o None)."""
+        columna = self.valores[:, self.columnas[ticker]]
+        validos = np.flatnonzero(~np.isnan(columna))
+        return float(columna[validos[-1]]) if len(validos) else None
+
+def inicio_periodo(fechas, periodo):
+    """Devuelve la fecha inicial de un periodo con nombre ('1m'…'10y', 'YTD') y si esa fecha se incluye."""
+    if periodo == 'YTD':
+        return datetime.now().replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0), True
+    if periodo not in DESPLAZAMIENTOS:
+        raise ValueError("Periodo no reconocido.")
+    # Igual que DataFrame.last: fechas estrictamente posteriores a (última fecha - periodo)
+    return fechas[-1] - DESPLAZAMIENTOS[periodo], False
+
+def fila_inicio_periodo(fechas, periodo):
+    """Primera fila de un índice de fechas (sin zona horaria) que cae dentro de un periodo con nombre."""
+    fecha_inicio, inclusivo = inicio_periodo(fechas, periodo)
+    return int(fechas.searchsorted(pd.Timestamp(fecha_inicio), side='left' if inclusivo else 'right'))
+
+class MotorMetricas:
+    """
+    Calcula rendimiento y riesgo anualizados para todos los tickers y cualquier ventana.
+
+    Los precios se alinean en una matriz fecha × ticker y se calculan una sola vez las
+    sumas acumuladas de los rendimientos logarítmicos diarios y de sus cuadrados. Con
+    ellas, el rendimiento y la desviación estándar de cualquier ventana se obtienen con
+    unas pocas restas por celda, sin volver a recorrer los precios.
+    """
+
+    def __init__(self, precios_por_ticker):
+        if isinstance(precios_por_ticker, MatrizCierres):
+            tickers = precios_por_ticker.tickers
+            self.fechas, cierres = precios_por_ticker._datos
+            self.tickers = tickers[:cierres.shape[1]]
+            cierres = cierres.astype(float, copy=False)
+        else:
+            self.fechas, self.tickers, cierres = alinear_cierres(precios_por_ticker)
+        n = len(self.fechas)
+        validos = np.isfinite(cierres) & (cierres > 0)
+        posiciones = np.arange(n)[:, None]
+
+        # Logaritmo del precio arrastrando el último valor conocido sobre los huecos
+        anterior = np.where(validos, posiciones, -1)
+        np.maximum.accumulate(anterior, axis=0, out=anterior)
+        log_precios = np.log(np.where(validos, cierres, 1.0))
+        columnas = np.arange(cierres.shape[1])[None, :]
+        self._log_precios = np.where(anterior >= 0, log_precios[np.maximum(anterior, 0), columnas], np.nan)
+        self._anterior_valido = anterior
+
+        # Índice del primer precio válido en o después de cada fecha (n si no hay)
+        siguiente = np.where(validos, posiciones, n)
+        self._siguiente_valido = np.minimum.accumulate(siguiente[::-1], axis=0)[::-1]
+
+        # Rendimientos diarios: solo en fechas con precio y con un precio previo
+        con_rendimiento = validos.copy()
+        con_rendimiento[1:] &= anterior[:-1] >= 0
+        con_rendimiento[:1] = False
+        rendimientos = np.zeros_like(self._log_precios)
+        rendimientos[1:] = np.diff(self._log_precios, axis=0)
+        rendimientos = np.where(con_rendimiento, rendimientos, 0.0)
+
+        self._acum_precios = np.cumsum(validos, axis=0)
+        self._acum_cuenta = np.cumsum(con_rendimiento, axis=0)
+        self._acum_suma = np.cumsum(rendimientos, axis=0)
+        self._acum_cuadrados = np.cumsum(rendimientos ** 2, axis=0)
+
+    def _extremos(self, inicio, fin):
+        """Devuelve los índices del primer y último precio válido de cada ticker en [inicio, fin]."""
+        n = len(self.fechas)
+        primero = self._siguiente_valido[inicio] if inicio < n else np.full(len(self.tickers), n)
+        ultimo = self._anterior_valido[fin] if fin >= 0 else np.full(len(self.tickers), -1)
+        return primero, ultimo
+
+    def _indices(self, fecha_inicio=None, fecha_fin=None, inclusivo=True):
+        """Convierte un rango de fechas a índices de la matriz."""
+        inicio = 0
+        if fecha_inicio is not None:
+            fecha_inicio = pd.Timestamp(fecha_inicio)
+            if fecha_inicio.tz is not None:
+                fecha_inicio = fecha_inicio.tz_localize(None)
+            inicio = self.fechas.searchsorted(fecha_inicio, side='left' if inclusivo else 'right')
+        fin = len(self.fechas) - 1
+        if fecha_fin is not None:
+            fecha_fin = pd.Timestamp(fecha_fin)
+            if fecha_fin.tz is not None:
+                fecha_fin = fecha_fin.tz_localize(None)
+            fin = self.fechas.searchsorted(fecha_fin, side='right') - 1
+        return inicio, fin
+
+    def rendimiento_y_riesgo(self, fecha_inicio=None, fecha_fin=None, inclusivo=True):
+        """
+        Calcula el rendimiento y el riesgo anualizados de todos los tickers en una ventana.
+
+        Args:
+        fecha_inicio: Primera fecha de la ventana (None para el inicio de los datos).
+        fecha_fin: Última fecha de la ventana (None para el final de los datos).
+        inclusivo (bool): Si la fecha inicial se incluye en la ventana.
+
+        Returns:
+        tuple: (rendimientos, riesgos) como arreglos con un valor por ticker (NaN si no hay datos).
+        """
+        if not self.tickers:
+            return np.empty(0), np.empty(0)
+        inicio, fin = self._indices(fecha_inicio, fecha_fin, inclusivo)
+        primero, ultimo = self._extremos(inicio, fin)
+        hay_datos = primero <= ultimo
+        columnas = np.arange(len(self.tickers))
+        p = np.where(hay_datos, primero, 0)
+        u = np.where(hay_datos, ultimo, 0)
+
+        numero_precios = self._acum_precios[u, columnas] - self._acum_precios[p, columnas] + 1
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rendimiento_log = self._log_precios[u, columnas] - self._log_precios[p, columnas]
+            rendimiento = rendimiento_log / (numero_precios / DIAS_POR_ANO)
+
+            cuenta = self._acum_cuenta[u, columnas] - self._acum_cuenta[p, columnas]
+            suma = self._acum_suma[u, columnas] - self._acum_suma[p, columnas]
+            cuadrados = self._acum_cuadrados[u, columnas] - self._acum_cuadrados[p, columnas]
+            varianza = np.maximum(cuadrados - suma ** 2 / cuenta, 0.0) / (cuenta - 1)
+            riesgo = np.sqrt(varianza) * np.sqrt(DIAS_POR_ANO)
+
+        rendimiento = np.where(hay_datos, rendimiento, np.nan)
+        riesgo = np.where(hay_datos & (cuenta >= 2), riesgo, np.nan)
+        return rendimiento, riesgo
+
+    def _inicio_periodo(self, periodo):
+        """Devuelve la fecha inicial de un periodo con nombre y si esa fecha se incluye."""
+        return inicio_periodo(self.fechas, periodo)
+
+    def rendimiento_y_riesgo_periodo(self, periodo):
+        """Calcula rendimiento y riesgo de todos los tickers para un periodo con nombre ('1m'…'10y', 'YTD')."""
+        if len(self.fechas) == 0:
+            return np.full(len(self.tickers), np.nan), np.full(len(self.tickers), np.nan)
+        fecha_inicio, inclusivo = self._inicio_periodo(periodo)
+        return self.rendimiento_y_riesgo(fecha_inicio, inclusivo=inclusivo)
+
+    def drawdown_periodo(self, periodo=None):
+        """
+        Calcula la caída máxima y el tiempo bajo el agua de todos los tickers en un periodo.
+
+        Ambos salen de un solo recorrido O(n) con el máximo acumulado: la caída es la
+        distancia al máximo previo y el tiempo bajo el agua es la racha más larga de
+        días de cotización del ticker sin volver a ese máximo.
+
+        Returns:
+        tuple: (caída máxima como fracción negativa, días bajo el agua) por ticker.
+        """
+        numero_tickers = len(self.tickers)
+        if len(self.fechas) == 0:
+            return np.full(numero_tickers, np.nan), np.full(numero_tickers, np.nan)
+        inicio = 0
+        if periodo is not None:
+            fecha_inicio, inclusivo = self._inicio_periodo(periodo)
+            inicio = self._indices(fecha_inicio, None, inclusivo)[0]
+        log_precios = self._log_precios[inicio:]
+        if len(log_precios) == 0:
+            return np.full(numero_tickers, np.nan), np.full(numero_tickers, np.nan)
+
+        caida = np.nan_to_num(log_precios - np.fmax.accumulate(log_precios, axis=0))
+        # Los días se cuentan sobre las fechas en que cotiza cada ticker, no sobre las de toda la matriz
+        posiciones = self._acum_precios[inicio:] - (self._acum_precios[inicio - 1] if inicio > 0 else 0)
+        ultimo_maximo = np.maximum.accumulate(np.where(caida >= 0, posiciones, -1), axis=0)
+        dias_bajo_agua = (posiciones - ultimo_maximo).max(axis=0).astype(float)
+
+        hay_datos = np.isfinite(log_precios).any(axis=0)
+        maxima_caida = np.expm1(caida.min(axis=0))
+        return np.where(hay_datos, maxima_caida, np.nan), np.where(hay_datos, dias_bajo_agua, np.nan)
+
+    def rendimiento_logaritmico(self):
+        """Rendimiento logarítmico de toda la historia dividido entre ANOS_HISTORIA, por ticker."""
+        primero, ultimo = self._extremos(0, len(self.fechas) - 1)
+        hay_datos = primero <= ultimo
+        columnas = np.arange(len(self.tickers))
+        rendimiento_log = self._log_precios[np.where(hay_datos, ultimo, 0), columnas] - self._log_precios[np.where(hay_datos, primero, 0), columnas]
+        return np.where(hay_datos, rendimiento_log / ANOS_HISTORIA, np.nan)
+
+    def riesgo_promedio(self):
+        """Desviación estándar anualizada de toda la historia, por ticker."""
+        return self.rendimiento_y_riesgo()[1]
+
+def valor_o_none(valor):
+    """Convierte NaN a None para que la app lo muestre como 'No disponible'."""
+    return None if valor is None or not np.isfinite(valor) else float(valor)
+
+@medido('calcular_metricas')
+def calcular_metricas(precios_por_ticker, periodos):
+    """
+    Calcula en una sola pasada todas las métricas de varios tickers.
+
+    Returns:
+    dict: Por ticker, un diccionario con 'rendimiento_log_geom', 'riesgo_promedio',
+    'rendimientos', 'riesgos', 'drawdowns' y 'dias_bajo_agua' (los cuatro últimos
+    indexados por periodo).
+    """
+    motor = MotorMetricas(precios_por_ticker)
+    rendimiento_log = motor.rendimiento_logaritmico()
+    riesgo_promedio = motor.riesgo_promedio()
+    por_periodo = {periodo: motor.rendimiento_y_riesgo_periodo(periodo) for periodo in periodos}
+    drawdowns = {periodo: motor.drawdown_periodo(periodo) for periodo in periodos}
+
+    metricas = {}
+    for j, ticker in enumerate(motor.tickers):
+        metricas[ticker] = {
+            "rendimiento_log_geom": valor_o_none(rendimiento_log[j]),
+            "riesgo_promedio": valor_o_none(riesgo_promedio[j]),
+            "rendimientos": {periodo: valor_o_none(por_periodo[periodo][0][j]) for periodo in periodos},
+            "riesgos": {periodo: valor_o_none(por_periodo[periodo][1][j]) for periodo in periodos},
+            "drawdowns": {periodo: valor_o_none(drawdowns[periodo][0][j]) for periodo in periodos},
+            "dias_bajo_agua": {periodo: valor_o_none(drawdowns[periodo][1][j]) for periodo in periodos},
+        }
+    return metricas
+
+def analitica_movil(precios, ventanas=VENTANAS_MOVILES):
+    """
+    Calcula series móviles de volatilidad, rendimiento y drawdown en O(n).
+
+    La volatilidad y el rendimiento de cada ventana salen de las sumas acumuladas de
+    los rendimientos logarítmicos (y de sus cuadrados) y el drawdown del máximo
+    acumulado, sin recorrer la ventana en cada fecha.
+
+    Args:
+    precios: DataFrame con columna 'Close' o Serie de precios de cierre.
+    ventanas (tuple): Ventanas en días de negociación.
+
+    Returns:
+    DataFrame: Columnas 'Volatilidad {w}d' (anualizada), 'Rendimiento {w}d' (simple)
+    para cada ventana, y 'Drawdown'; NaN mientras no hay datos suficientes.
+    """
+    cierre = precios['Close'] if isinstance(precios, pd.DataFrame) else precios
+    cierre = cierre.dropna()
+    cierre = cierre[cierre > 0]
+    valores = cierre.to_numpy(dtype=float)
+    n = len(valores)
+    rendimientos = np.diff(np.log(valores))
+    suma = np.concatenate(([0.0], np.cumsum(rendimientos)))
+    cuadrados = np.concatenate(([0.0], np.cumsum(rendimientos ** 2)))
+
+    columnas = {}
+    for ventana in ventanas:
+        volatilidad = np.full(n, np.nan)
+        rendimiento = np.full(n, np.nan)
+        if n > ventana:
+            suma_ventana = suma[ventana:] - suma[:-ventana]
+            cuadrados_ventana = cuadrados[ventana:] - cuadrados[:-ventana]
+            varianza = np.maximum(cuadrados_ventana - suma_ventana ** 2 / ventana, 0.0) / (ventana - 1)
+            volatilidad[ventana:] = np.sqrt(varianza * DIAS_POR_ANO)
+            rendimiento[ventana:] = np.expm1(suma_ventana)
+        columnas[f'Volatilidad {ventana}d'] = volatilidad
+        columnas[f'Rendimiento {ventana}d'] = rendimiento
+    columnas['Drawdown'] = valores / np.maximum.accumulate(valores) - 1 if n else np.empty(0)
+    return pd.DataFrame(columnas, index=cierre.index)
+
+class AnaliticaIncremental:
+    """
+    Volatilidad y rendimiento móviles, caída máxima y tiempo bajo el agua actualizables en O(1).
+
+    Se inicializa con la historia (desde_precios, vectorizado) y luego cada barra
+    nueva se incorpora con agregar() sin recalcular los años anteriores: cada ventana
+    mantiene la suma y la suma de cuadrados de sus rendimientos y el drawdown solo
+    necesita el máximo acumulado y la racha actual.
+    """
+
+    def __init__(self, ventanas=VENTANAS_MOVILES):
+        self.ventanas = tuple(ventanas)
+        self._rendimientos = {ventana: deque() for ventana in self.ventanas}
+        self._sumas = {ventana: 0.0 for ventana in self.ventanas}
+        self._cuadrados = {ventana: 0.0 for ventana in self.ventanas}
+        self.ultimo_precio = None
+        self.maximo = None
+        self.maxima_caida = 0.0
+        self.racha_bajo_agua = 0
+        self.maxima_racha_bajo_agua = 0
+
+    @classmethod
+    def desde_precios(cls, precios, ventanas=VENTANAS_MOVILES):
+        """Crea el estado a partir de toda la historia con operaciones vectorizadas."""
+        analitica = cls(ventanas)
+        cierre = precios['Close'] if isinstance(precios, pd.DataFrame) else pd.Series(precios)
+        valores = cierre.dropna().to_numpy(dtype=float)
+        valores = valores[valores > 0]
+        if len(valores) == 0:
+            return analitica
+        rendimientos = np.diff(np.log(valores))
+        for ventana in analitica.ventanas:
+            ultimos = rendimientos[-ventana:]
+            analitica._rendimientos[ventana].extend(ultimos.tolist())
+            analitica._sumas[ventana] = float(ultimos.sum())
+            analitica._cuadrados[ventana] = float((ultimos ** 2).sum())
+        maximos = np.maximum.accumulate(valores)
+        analitica.ultimo_precio = float(valores[-1])
+        analitica.maximo = float(maximos[-1])
+        analitica.maxima_caida = float((valores / maximos - 1).min())
+        posiciones = np.arange(len(valores))
+        ultimo_maximo = np.maximum.accumulate(np.where(valores >= maximos, posiciones, 0))
+        rachas = posiciones - ultimo_maximo
+        analitica.racha_bajo_agua = int(rachas[-1])
+        analitica.maxima_racha_bajo_agua = int(rachas.max())
+        return analitica
+
+    def agregar(self, precio):
+        """Incorpora el cierre de una barra nueva en O(1) por ventana."""
+        precio = float(precio)
+        if not np.isfinite(precio) or precio <= 0:
+            return
+        if self.ultimo_precio is not None:
+            rendimiento = float(np.log(precio / self.ultimo_precio))
+            for ventana in self.ventanas:
+                cola = self._rendimientos[ventana]
+                cola.append(rendimiento)
+                self._sumas[ventana] += rendimiento
+                self._cuadrados[ventana] += rendimiento ** 2
+                if len(cola) > ventana:
+                    saliente = cola.popleft()
+                    self._sumas[ventana] -= saliente
+                    self._cuadrados[ventana] -= saliente ** 2
+        self.ultimo_precio = precio
+        if self.maximo is None or precio >= self.maximo:
+            self.maximo = precio
+            self.racha_bajo_agua = 0
+        else:
+            self.racha_bajo_agua += 1
+            self.maxima_racha_bajo_agua = max(self.maxima_racha_bajo_agua, self.racha_bajo_agua)
+            self.maxima_caida = min(self.maxima_caida, precio / self.maximo - 1)
+
+    def volatilidad(self, ventana):
+        """Volatilidad anualizada de la ventana (None si aún no está completa)."""
+        m = len(self._rendimientos[ventana])
+        if m < ventana or m < 2:
+            return None
+        varianza = max(self._cuadrados[ventana] - self._sumas[ventana] ** 2 / m, 0.0) / (m - 1)
+        return float(np.sqrt(varianza * DIAS_POR_ANO))
+
+    def rendimiento(self, ventana):
+        """Rendimiento simple de la ventana (None si aún no está completa)."""
+        if len(self._rendimientos[ventana]) < ventana:
+            return None
+        return float(np.expm1(self._sumas[ventana]))
+
+    def drawdown(self):
+        """Caída actual respecto al máximo histórico."""
+        if self.maximo is None:
+            return None
+        return self.ultimo_precio / self.maximo - 1
+
+    def resumen(self):
+        """Diccionario con todas las métricas actuales."""
+        resumen = {}
+        for ventana in self.ventanas:
+            resumen[f'Volatilidad {ventana}d'] = self.volatilidad(ventana)
+            resumen[f'Rendimiento {ventana}d'] = self.rendimiento(ventana)
+        resumen['Drawdown'] = self.drawdown()
+        resumen['Máximo Drawdown'] = self.maxima_caida if self.maximo is not None else None
+        resumen['Días bajo el agua'] = self.racha_bajo_agua
+        resumen['Máximo de días bajo el agua'] = self.maxima_racha_bajo_agua
+        return resumen
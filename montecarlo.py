@@ -0,0 +1,192 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# Días de negociación por paso de la simulación (≈ un mes); también es el tamaño de bloque del bootstrap
+DIAS_POR_PASO = 21
+
+# Días de negociación en un año
+DIAS_POR_ANO = 252
+
+# Memoria máxima que puede ocupar cada lote de trayectorias (64 MB)
+MEMORIA_MAXIMA_BYTES = 64 * 1024 * 1024
+
+# Número de intervalos del histograma con el que se estiman los percentiles en cada paso
+NUMERO_INTERVALOS = 2000
+
+# Anchura del histograma en desviaciones estándar a cada lado de la media
+DESVIACIONES_HISTOGRAMA = 10
+
+# Por debajo de este número de trayectorias no compensa repartir el trabajo entre procesos
+MINIMO_PARA_PROCESOS = 200_000
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+_pool = None
+_candado_pool = threading.Lock()
+
+def _obtener_pool():
+    """Pool de procesos compartido, creado la primera vez que se necesita."""
+    global _pool
+    with _candado_pool:
+        if _pool is None:
+            # 'spawn' funciona igual en Windows y evita copiar los hilos del servidor de Streamlit
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+def rendimientos_log_diarios(precios):
+    """Rendimientos logarítmicos diarios a partir de una Serie o arreglo de precios de cierre."""
+    precios = np.asarray(precios, dtype=float)
+    precios = precios[np.isfinite(precios) & (precios > 0)]
+    return np.diff(np.log(precios))
+
+def _limites_histograma(media_paso, desviacion_paso, pasos):
+    """Rango del histograma del rendimiento logarítmico acumulado en cada paso."""
+    t = np.arange(1, pasos + 1)
+    centro = media_paso * t
+    ancho = DESVIACIONES_HISTOGRAMA * max(desviacion_paso, 1e-12) * np.sqrt(t)
+    return centro - ancho, centro + ancho
+
+def _simular_lote(metodo, parametros, pasos, numero_trayectorias, tamano_lote, semilla, inferior, superior):
+    """
+    Simula un grupo de trayectorias en lotes de tamaño fijo y acumula un histograma por paso.
+
+    Devuelve el histograma (pasos × NUMERO_INTERVALOS), el número de trayectorias con
+    pérdida al final y la suma de los valores finales relativos (para la media).
+    """
+    generador = np.random.default_rng(semilla)
+    histograma = np.zeros(pasos * NUMERO_INTERVALOS, dtype=np.int64)
+    perdidas = 0
+    suma_final = 0.0
+    # Se trabaja en float32: sobra precisión para ubicar cada valor en su intervalo
+    inferior = inferior.astype(np.float32)
+    ancho_intervalo = ((superior - inferior) / NUMERO_INTERVALOS).astype(np.float32)
+    desplazamiento = np.arange(pasos, dtype=np.int32) * NUMERO_INTERVALOS
+
+    restantes = numero_trayectorias
+    while restantes > 0:
+        n = min(tamano_lote, restantes)
+        restantes -= n
+        if metodo == 'gbm':
+            media_paso, desviacion_paso = parametros
+            # La suma de DIAS_POR_PASO rendimientos normales es normal: se simula paso a paso
+            incrementos = generador.standard_normal(size=(n, pasos), dtype=np.float32)
+            incrementos *= desviacion_paso
+            incrementos += media_paso
+        else:
+            sumas_bloque = parametros
+            # Block bootstrap: cada paso es un bloque de días consecutivos de la historia real
+            incrementos = sumas_bloque[generador.integers(0, len(sumas_bloque), size=(n, pasos))]
+        acumulado = np.cumsum(incrementos, axis=1, out=incrementos)
+
+        intervalos = ((acumulado - inferior) / ancho_intervalo).astype(np.int32)
+        np.clip(intervalos, 0, NUMERO_INTERVALOS - 1, out=intervalos)
+        intervalos += desplazamiento
+        histograma += np.bincount(intervalos.ravel(), minlength=histograma.size)
+
+        final = acumulado[:, -1]
+        perdidas += int(np.count_nonzero(final < 0))
+        suma_final += float(np.exp(final.astype(np.float64)).sum())
+
+    return histograma.reshape(pasos, NUMERO_INTERVALOS), perdidas, suma_final
+
+def _percentiles_de_histograma(histograma, inferior, superior, percentiles):
+    """Estima percentiles por paso interpolando linealmente dentro de cada intervalo."""
+    pasos = histograma.shape[0]
+    acumulado = np.cumsum(histograma, axis=1)
+    total = acumulado[:, -1:]
+    ancho_intervalo = (superior - inferior) / NUMERO_INTERVALOS
+    resultado = np.empty((len(percentiles), pasos))
+    for i, percentil in enumerate(percentiles):
+        objetivo = total[:, 0] * percentil / 100
+        indice = np.minimum((acumulado < objetivo[:, None]).sum(axis=1), NUMERO_INTERVALOS - 1)
+        filas = np.arange(pasos)
+        anterior = np.where(indice > 0, acumulado[filas, np.maximum(indice - 1, 0)], 0)
+        en_intervalo = np.maximum(histograma[filas, indice], 1)
+        fraccion = np.clip((objetivo - anterior) / en_intervalo, 0, 1)
+        resultado[i] = inferior + (indice + fraccion) * ancho_intervalo
+    return resultado
+
+def simular_valor_futuro(inversion_inicial, rendimientos_diarios, anos, numero_trayectorias=100_000,
+                         metodo='gbm', percentiles=PERCENTILES, memoria_maxima_bytes=MEMORIA_MAXIMA_BYTES,
+                         procesos=None, semilla=None):
+    """
+    Simula por Monte Carlo la distribución del valor futuro de una inversión.
+
+    Extiende calcular_valor_futuro: en lugar de un solo número con el rendimiento
+    promedio, genera muchas trayectorias a partir de los rendimientos históricos y
+    devuelve bandas de percentiles y la probabilidad de pérdida.
+
+    Las trayectorias avanzan en pasos de DIAS_POR_PASO días. Con 'gbm' cada paso es
+    normal con la media y varianza históricas (movimiento browniano geométrico); con
+    'bootstrap' cada paso es la suma de un bloque de días consecutivos de la historia,
+    lo que conserva colas pesadas y autocorrelación de corto plazo. Las trayectorias
+    se procesan en lotes que no superan memoria_maxima_bytes y se reparten entre
+    procesos; los percentiles se estiman con un histograma fino por paso, así que
+    nunca se guarda la matriz completa de trayectorias.
+
+    Args:
+    inversion_inicial (float): Monto de la inversión inicial.
+    rendimientos_diarios (ndarray): Rendimientos logarítmicos diarios históricos.
+    anos (float): Horizonte de inversión en años.
+    numero_trayectorias (int): Número de trayectorias a simular.
+    metodo (str): 'gbm' o 'bootstrap'.
+    percentiles (tuple): Percentiles a calcular en cada paso.
+    memoria_maxima_bytes (int): Memoria máxima de cada lote de trayectorias.
+    procesos (int): Número de procesos (None para usar todos los núcleos, 1 para no usar procesos).
+    semilla (int): Semilla para reproducir los resultados.
+
+    Returns:
+    dict: 'anos' (tiempo de cada paso), 'bandas' (valor por percentil y paso),
+    'probabilidad_perdida', 'valor_medio' y 'percentiles_finales'.
+    """
+    rendimientos_diarios = np.asarray(rendimientos_diarios, dtype=float)
+    rendimientos_diarios = rendimientos_diarios[np.isfinite(rendimientos_diarios)]
+    if len(rendimientos_diarios) < 2 * DIAS_POR_PASO:
+        raise ValueError("No hay suficientes rendimientos históricos para simular.")
+    if metodo not in ('gbm', 'bootstrap'):
+        raise ValueError("Método no reconocido.")
+
+    pasos = max(1, int(round(anos * DIAS_POR_ANO / DIAS_POR_PASO)))
+    media_paso = rendimientos_diarios.mean() * DIAS_POR_PASO
+    desviacion_paso = rendimientos_diarios.std(ddof=1) * np.sqrt(DIAS_POR_PASO)
+    if metodo == 'gbm':
+        parametros = (media_paso, desviacion_paso)
+    else:
+        acumulado = np.concatenate(([0.0], np.cumsum(rendimientos_diarios)))
+        parametros = (acumulado[DIAS_POR_PASO:] - acumulado[:-DIAS_POR_PASO]).astype(np.float32)
+    inferior, superior = _limites_histograma(media_paso, desviacion_paso, pasos)
+
+    # Incrementos, temporales e índices de intervalo: unas tres matrices de 4 bytes por celda
+    tamano_lote = max(1, memoria_maxima_bytes // (pasos * 4 * 3))
+    if procesos is None:
+        procesos = os.cpu_count() or 1
+    if numero_trayectorias < MINIMO_PARA_PROCESOS:
+        procesos = 1
+    semillas = np.random.SeedSequence(semilla).spawn(procesos)
+    reparto = [numero_trayectorias // procesos + (1 if i < numero_trayectorias % procesos else 0) for i in range(procesos)]
+    argumentos = [
+        (metodo, parametros, pasos, n, tamano_lote, s, inferior, superior)
+        for n, s in zip(reparto, semillas) if n > 0
+    ]
+    if procesos == 1:
+        resultados = [_simular_lote(*args) for args in argumentos]
+    else:
+        pool = _obtener_pool()
+        resultados = [futuro.result() for futuro in [pool.submit(_simular_lote, *args) for args in argumentos]]
+
+    histograma = sum(resultado[0] for resultado in resultados)
+    perdidas = sum(resultado[1] for resultado in resultados)
+    suma_final = sum(resultado[2] for resultado in resultados)
+
+    bandas_log = _percentiles_de_histograma(histograma, inferior, superior, percentiles)
+    bandas = inversion_inicial * np.exp(bandas_log)
+    return {
+        'anos': np.arange(1, pasos + 1) * DIAS_POR_PASO / DIAS_POR_ANO,
+        'bandas': {percentil: bandas[i] for i, percentil in enumerate(percentiles)},
+        'percentiles_finales': {percentil: float(bandas[i, -1]) for i, percentil in enumerate(percentiles)},
+        'probabilidad_perdida': perdidas / numero_trayectorias,
+        'valor_medio': inversion_inicial * suma_final / numero_trayectorias,
+    }
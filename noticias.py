@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+from instrumentacion import instrumentacion, medido
+
+# lxml es mucho más rápido que html.parser; se usa si está instalado
+try:
+    import lxml  # noqa: F401
+    PARSER = 'lxml'
+except ImportError:
+    PARSER = 'html.parser'
+
+URL_FINVIZ = 'https://finviz.com/quote.ashx?t={ticker}'
+
+# Tiempo de vida de las noticias en caché (10 minutos)
+TTL_SEGUNDOS = 10 * 60
+
+# Número máximo de tickers con noticias en caché
+MAXIMO_EN_CACHE = 256
+
+# Tiempo máximo de espera a Finviz
+TIMEOUT_SEGUNDOS = 10
+
+# Número máximo de peticiones simultáneas a Finviz
+CONCURRENCIA = 16
+
+# Solo se analiza la tabla de noticias, no la página completa
+SOLO_TABLA_NOTICIAS = SoupStrainer('table', class_='fullview-news-outer')
+
+def _crear_sesion():
+    """Crea una sesión HTTP que reutiliza las conexiones con Finviz."""
+    sesion = requests.Session()
+    sesion.headers.update({'User-Agent': 'Mozilla/5.0'})
+    adaptador = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=CONCURRENCIA)
+    sesion.mount('https://', adaptador)
+    return sesion
+
+SESION = _crear_sesion()
+_pool = ThreadPoolExecutor(max_workers=CONCURRENCIA, thread_name_prefix='noticias')
+_cache = OrderedDict()  # ticker -> (instante, Future con la lista de titulares), del menos al más reciente
+_candado = threading.Lock()
+
+def analizar_noticias(html, limit=None):
+    """Extrae fecha, título y enlace de las filas de la tabla de noticias de Finviz."""
+    soup = BeautifulSoup(html, PARSER, parse_only=SOLO_TABLA_NOTICIAS)
+    headlines = []
+
+    for row in soup.find_all('tr'):
+        if limit is not None and len(headlines) >= limit:
+            break
+        news_item = row.find_all('td')
+        if len(news_item) < 2 or news_item[1].a is None:
+            continue
+        headlines.append({
+            'date_time': news_item[0].text.strip(),
+            'title': news_item[1].a.text.strip(),
+            'link': news_item[1].a['href']
+        })
+
+    return headlines
+
+@medido('finviz', argumento_ticker=0)
+def _descargar_noticias(ticker):
+    """Descarga y analiza todas las noticias de un ticker."""
+    respuesta = SESION.get(URL_FINVIZ.format(ticker=ticker), timeout=TIMEOUT_SEGUNDOS)
+    respuesta.raise_for_status()
+    return analizar_noticias(respuesta.content)
+
+def _futuro(ticker):
+    """Devuelve la descarga en caché (o en curso) de un ticker, o lanza una nueva."""
+    ahora = time.monotonic()
+    with _candado:
+        entrada = _cache.get(ticker)
+        if entrada is not None and ahora - entrada[0] <= TTL_SEGUNDOS:
+            instrumentacion.registrar_cache('noticias', aciertos=1)
+            _cache.move_to_end(ticker)
+            return entrada[1]
+        instrumentacion.registrar_cache('noticias', fallos=1)
+        futuro = _pool.submit(_descargar_noticias, ticker)
+        _cache[ticker] = (ahora, futuro)
+        _cache.move_to_end(ticker)
+        while len(_cache) > MAXIMO_EN_CACHE:
+            _cache.popitem(last=False)
+        return futuro
+
+def precargar_noticias(tickers):
+    """Empieza a descargar en segundo plano las noticias de los tickers que no estén en caché."""
+    for ticker in tickers:
+        _futuro(ticker)
+
+def obtener_noticias(tickers, limit=3):
+    """
+    Devuelve las últimas noticias de varios tickers.
+
+    Las descargas se hacen en paralelo sobre conexiones reutilizadas y se guardan en
+    caché durante TTL_SEGUNDOS, así que repetir la consulta es inmediato.
+
+    Returns:
+    dict: Lista de titulares (date_time, title, link) por ticker.
+    """
+    futuros = {ticker: _futuro(ticker) for ticker in tickers}
+    noticias = {}
+    for ticker, futuro in futuros.items():
+        try:
+            noticias[ticker] = futuro.result()[:limit]
+        except Exception as e:
+            print(f"Error al obtener noticias para {ticker}: {e}")
+            instrumentacion.registrar_fallo('finviz', e, ticker)
+            # No se guardan los errores en la caché: el siguiente intento vuelve a pedirlas
+            with _candado:
+                if _cache.get(ticker, (None, None))[1] is futuro:
+                    del _cache[ticker]
+            noticias[ticker] = []
+    return noticias
@@ -0,0 +1,127 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+from metricas import DIAS_POR_ANO, fila_inicio_periodo
+
+# Número de combinaciones (tickers, periodo) cuyo resultado se guarda en memoria
+MAXIMO_EN_CACHE = 64
+
+# Número de puntos de la frontera eficiente
+PUNTOS_FRONTERA = 50
+
+_cache = OrderedDict()
+_candado = threading.Lock()
+
+def _rendimientos_alineados(cierres, tickers, periodo):
+    """Rendimientos logarítmicos diarios de los días en que cotizan todos los tickers dentro del periodo."""
+    fechas, valores = cierres.fechas, cierres.valores
+    sin_precios = [ticker for ticker in tickers if ticker not in cierres.columnas]
+    if sin_precios:
+        raise ValueError(f"No hay precios para {', '.join(sin_precios)}.")
+    columnas = [cierres.columnas[ticker] for ticker in tickers]
+    inicio = 0 if periodo is None else fila_inicio_periodo(fechas, periodo)
+    precios = valores[inicio:, columnas].astype(float)
+    sin_precios = [ticker for ticker, validos in zip(tickers, np.isfinite(precios).any(axis=0)) if not validos]
+    if sin_precios:
+        raise ValueError(f"No hay precios en el periodo para {', '.join(sin_precios)}.")
+    precios = precios[np.all(np.isfinite(precios) & (precios > 0), axis=1)]
+    return np.diff(np.log(precios), axis=0)
+
+def _resumen(pesos, rendimientos, covarianza, tasa_libre_riesgo):
+    """Rendimiento, riesgo y ratio de Sharpe de un portafolio."""
+    rendimiento = float(pesos @ rendimientos)
+    riesgo = float(np.sqrt(max(pesos @ covarianza @ pesos, 0.0)))
+    return {
+        'pesos': pesos,
+        'rendimiento': rendimiento,
+        'riesgo': riesgo,
+        'sharpe': (rendimiento - tasa_libre_riesgo) / riesgo if riesgo > 0 else None,
+    }
+
+def _calcular(cierres, tickers, periodo, tasa_libre_riesgo):
+    """Covarianza, portafolios de mínima varianza y máximo Sharpe, y frontera eficiente."""
+    diarios = _rendimientos_alineados(cierres, tickers, periodo)
+    if len(diarios) < len(tickers) + 2:
+        raise ValueError("No hay suficientes días en común para estimar la covarianza.")
+
+    rendimientos = diarios.mean(axis=0) * DIAS_POR_ANO
+    covarianza = np.cov(diarios, rowvar=False) * DIAS_POR_ANO
+    desviaciones = np.sqrt(np.diag(covarianza))
+    correlacion = covarianza / np.outer(desviaciones, desviaciones)
+
+    # Una sola resolución de Σ X = [1, μ] basta para todos los portafolios de la frontera
+    unos = np.ones(len(tickers))
+    try:
+        X = np.linalg.solve(covarianza, np.column_stack([unos, rendimientos]))
+    except np.linalg.LinAlgError:
+        X = np.linalg.pinv(covarianza) @ np.column_stack([unos, rendimientos])
+    inv_unos, inv_rendimientos = X[:, 0], X[:, 1]
+    A = unos @ inv_unos
+    B = unos @ inv_rendimientos
+    C = rendimientos @ inv_rendimientos
+    D = A * C - B ** 2
+
+    minima_varianza = _resumen(inv_unos / A, rendimientos, covarianza, tasa_libre_riesgo)
+
+    exceso = inv_rendimientos - tasa_libre_riesgo * inv_unos
+    denominador = unos @ exceso
+    # El portafolio tangente solo existe si el mínimo de varianza rinde más que la tasa libre de riesgo
+    maximo_sharpe = _resumen(exceso / denominador, rendimientos, covarianza, tasa_libre_riesgo) if denominador > 0 else None
+
+    # Frontera eficiente: rama superior de la parábola σ²(m) = (A m² - 2 B m + C) / D
+    maximo = max(rendimientos.max(), maximo_sharpe['rendimiento'] if maximo_sharpe else rendimientos.max())
+    objetivos = np.linspace(minima_varianza['rendimiento'], maximo, PUNTOS_FRONTERA)
+    if D > 0:
+        riesgos = np.sqrt(np.maximum((A * objetivos ** 2 - 2 * B * objetivos + C) / D, 0.0))
+    else:
+        riesgos = np.full_like(objetivos, minima_varianza['riesgo'])
+
+    return {
+        'tickers': list(tickers),
+        'periodo': periodo,
+        'dias': len(diarios),
+        'rendimientos': rendimientos,
+        'riesgos': desviaciones,
+        'covarianza': covarianza,
+        'correlacion': correlacion,
+        'minima_varianza': minima_varianza,
+        'maximo_sharpe': maximo_sharpe,
+        'frontera': {'rendimientos': objetivos, 'riesgos': riesgos},
+    }
+
+def analizar_portafolio(cierres, tickers, periodo=None, tasa_libre_riesgo=0.0):
+    """
+    Analiza la combinación de varios ETFs en un portafolio.
+
+    Calcula la matriz de covarianza de los rendimientos diarios (anualizada) sobre los
+    días en que cotizan todos los tickers del periodo, el portafolio de mínima
+    varianza, el de máximo Sharpe (tangente) y la frontera eficiente, todos con
+    fórmulas cerradas a partir de una sola resolución del sistema lineal. Los pesos
+    no están restringidos: un peso negativo indica una posición en corto.
+
+    El resultado se guarda por (tickers, periodo, tasa): cambiar el monto invertido
+    solo escala los pesos, y volver a un periodo ya visto no recalcula nada.
+
+    Args:
+    cierres (MatrizCierres): Matriz de cierres alineados (por ejemplo, ETFs_Data.cierres).
+    tickers (list): Tickers del portafolio.
+    periodo (str): Periodo ('1m'…'10y', 'YTD') o None para toda la historia.
+    tasa_libre_riesgo (float): Tasa libre de riesgo anual.
+
+    Returns:
+    dict: Rendimientos, riesgos, covarianza, correlación, 'minima_varianza',
+    'maximo_sharpe' (None si no existe) y 'frontera'.
+    """
+    tickers = tuple(tickers)
+    # La clave identifica la matriz y sus valores: precios nuevos o corregidos dan otra clave
+    clave = (id(cierres), cierres.huella(tickers), tickers, periodo, tasa_libre_riesgo)
+    with _candado:
+        if clave in _cache:
+            _cache.move_to_end(clave)
+            return _cache[clave]
+    resultado = _calcular(cierres, tickers, periodo, tasa_libre_riesgo)
+    with _candado:
+        _cache[clave] = resultado
+        while len(_cache) > MAXIMO_EN_CACHE:
+            _cache.popitem(last=False)
+    return resultado
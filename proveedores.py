@@ -0,0 +1,366 @@
+"""
+Proveedores de datos de mercado: precios históricos, metadatos y cotizaciones.
+
+data.py y cotizaciones.py no hablan con yfinance directamente sino con el proveedor
+configurado, así que la app puede correr desde la entrega nocturna de archivos o en
+un entorno sin conexión:
+
+    SIMULADOR_PROVEEDOR=yfinance                                  (por defecto)
+    SIMULADOR_PROVEEDOR=archivos SIMULADOR_DATOS=/datos/precios   (CSV/Parquet locales)
+    SIMULADOR_PROVEEDOR=grabar   SIMULADOR_DATOS=/tmp/grabacion   (yfinance, guardando lo que responde)
+
+Lo que graba ProveedorGrabador queda en el mismo formato que lee ProveedorArchivos,
+así que una grabación se reproduce con SIMULADOR_PROVEEDOR=archivos.
+"""
+import csv
+import hashlib
+import os
+import shutil
+import threading
+from abc import ABC, abstractmethod
+import numpy as np
+import pandas as pd
+from cache_precios import actualizar_precios_lote
+from descargas import con_reintentos, crear_ticker, descargar_cotizaciones, descargar_historiales
+
+PROVEEDOR = os.environ.get("SIMULADOR_PROVEEDOR", "yfinance")
+
+# Directorio de los archivos de precios (proveedores 'archivos' y 'grabar')
+DIRECTORIO_DATOS = os.environ.get("SIMULADOR_DATOS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "datos"))
+
+# Archivo opcional con el nombre corto y la descripción de cada ticker
+ARCHIVO_INFO = 'info.csv'
+
+# Subdirectorio donde se guarda la versión consolidada (un arreglo por columna) de los archivos
+DIRECTORIO_CONSOLIDADO = '.consolidado'
+
+# Columnas de precios, en el orden de Ticker.history de yfinance
+COLUMNAS = ('Open', 'High', 'Low', 'Close', 'Volume', 'Dividends', 'Stock Splits')
+
+# Columnas que valen 0 (y no NaN) cuando un archivo no las trae
+COLUMNAS_CERO = ('Dividends', 'Stock Splits')
+
+class Proveedor(ABC):
+    """
+    Interfaz de un proveedor de datos de mercado.
+
+    Los métodos pueden lanzar excepciones: quien los llama (data.py) registra el
+    fallo y usa un valor de respaldo.
+    """
+
+    # Si las descripciones vienen en inglés y hay que traducirlas
+    traducir_descripciones = True
+
+    @abstractmethod
+    def historiales(self, tickers, fecha_inicio, fecha_fin):
+        """
+        Precios diarios de varios tickers entre dos fechas.
+
+        Args:
+        tickers (list): Símbolos de los ETFs.
+        fecha_inicio (str): Fecha inicial en formato 'YYYY-MM-DD'.
+        fecha_fin (str): Fecha final (exclusiva) en formato 'YYYY-MM-DD'.
+
+        Returns:
+        dict: DataFrame por ticker con las columnas de COLUMNAS, o None si no hay datos.
+        """
+
+    @abstractmethod
+    def info(self, ticker):
+        """Nombre corto y descripción larga (sin traducir) de un ticker."""
+
+    @abstractmethod
+    def precio_actual(self, ticker):
+        """Precio más reciente de un ticker."""
+
+    def cotizaciones(self, tickers):
+        """Último precio de varios tickers (None si no hubo cotización)."""
+        cotizaciones = {}
+        for ticker in tickers:
+            try:
+                cotizaciones[ticker] = self.precio_actual(ticker)
+            except Exception as e:
+                print(f"Error al obtener el precio actual para {ticker}: {e}")
+                cotizaciones[ticker] = None
+        return cotizaciones
+
+class ProveedorYFinance(Proveedor):
+    """Datos de Yahoo Finance, con la caché local de precios incremental de cache_precios."""
+
+    def historiales(self, tickers, fecha_inicio, fecha_fin):
+        return actualizar_precios_lote(list(tickers), fecha_inicio, fecha_fin, descargar_historiales)
+
+    def info(self, ticker):
+        accion = crear_ticker(ticker)
+        info = con_reintentos(lambda: accion.info)
+        return info.get('shortName', 'No disponible'), info.get('longBusinessSummary', 'Descripción no disponible')
+
+    def precio_actual(self, ticker):
+        accion = crear_ticker(ticker)
+        # Precio de cierre del último día de negociación
+        return con_reintentos(accion.history, period='1d')['Close'].iloc[-1]
+
+    def cotizaciones(self, tickers):
+        return descargar_cotizaciones(tickers)
+
+def _normalizar_columna(nombre):
+    return str(nombre).lower().replace(' ', '').replace('_', '')
+
+# Nombre normalizado de columna en un archivo -> columna de COLUMNAS
+_EQUIVALENCIAS = {_normalizar_columna(columna): columna for columna in COLUMNAS}
+
+def _fechas(indice):
+    """Fechas sin hora ni zona horaria de un índice de fechas o de textos con fechas."""
+    if not isinstance(indice, pd.DatetimeIndex):
+        textos = pd.Index(indice).astype(str)
+        # Las fechas ISO pueden traer zonas horarias distintas (verano e invierno): se conserva la fecha local
+        if textos.str.match(r'\d{4}-\d{2}-\d{2}').all():
+            textos = textos.str.slice(0, 10)
+        indice = pd.DatetimeIndex(pd.to_datetime(textos))
+    if indice.tz is not None:
+        indice = indice.tz_localize(None)
+    return indice.normalize()
+
+def _leer_archivo(ruta):
+    """Lee un archivo de precios (CSV o Parquet) con las fechas en el índice o en la primera columna."""
+    if ruta.endswith('.parquet'):
+        datos = pd.read_parquet(ruta)
+    else:
+        datos = pd.read_csv(ruta)
+    if not isinstance(datos.index, pd.DatetimeIndex):
+        datos = datos.set_index(datos.columns[0])
+    datos.index = _fechas(datos.index)
+    columnas = {}
+    for columna in datos.columns:
+        destino = _EQUIVALENCIAS.get(_normalizar_columna(columna))
+        if destino is not None:
+            columnas[destino] = columna
+    # Sin 'Close' se usa el cierre ajustado
+    ajustado = next((columna for columna in datos.columns if _normalizar_columna(columna) == 'adjclose'), None)
+    if 'Close' not in columnas and ajustado is not None:
+        columnas['Close'] = ajustado
+    if 'Close' not in columnas:
+        raise ValueError("el archivo no tiene columna 'Close'")
+    datos = datos[~datos.index.duplicated(keep='last')].sort_index()
+    return datos.index.to_numpy(dtype='datetime64[ns]'), {
+        columna: datos[columnas[columna]].to_numpy(dtype=np.float64)
+        for columna in COLUMNAS if columna in columnas
+    }
+
+def leer_info(ruta):
+    """Lee un info.csv: ticker -> (nombre corto, descripción). Vacío si el archivo no existe."""
+    info = {}
+    if os.path.exists(ruta):
+        with open(ruta, newline='', encoding='utf-8-sig') as archivo:
+            for fila in csv.DictReader(archivo):
+                info[(fila.get('ticker') or '').strip().upper()] = (
+                    (fila.get('nombre_corto') or '').strip() or 'No disponible',
+                    (fila.get('descripcion') or '').strip() or 'Descripción no disponible',
+                )
+    return info
+
+class ProveedorArchivos(Proveedor):
+    """
+    Precios de un directorio de archivos locales: un <TICKER>.csv o <TICKER>.parquet por ticker.
+
+    La primera vez se leen todos los archivos y se consolidan en un solo arreglo .npy
+    (ticker × fecha × columna, con un único índice de fechas) dentro del mismo
+    directorio. Las siguientes cargas solo lo abren con np.load(mmap_mode='r'), así
+    que los precios de cada ticker son un bloque contiguo que se convierte en
+    DataFrame sin parsear nada. Si cambia algún archivo (por ejemplo, con la entrega
+    nocturna) se vuelve a consolidar.
+
+    El nombre corto y la descripción salen de info.csv (columnas 'ticker',
+    'nombre_corto' y 'descripcion'), si existe, y se usan sin traducir.
+    """
+
+    traducir_descripciones = False
+
+    def __init__(self, directorio=DIRECTORIO_DATOS):
+        self.directorio = directorio
+        self._consolidado = (None, None)  # (firma de los archivos, datos abiertos)
+        self._info = None
+        self._candado = threading.Lock()
+
+    def _archivos(self):
+        """Archivos de precios del directorio: ticker -> (nombre, tamaño, modificación)."""
+        archivos = {}
+        with os.scandir(self.directorio) as entradas:
+            for entrada in entradas:
+                base, extension = os.path.splitext(entrada.name)
+                if extension not in ('.csv', '.parquet') or entrada.name == ARCHIVO_INFO or not entrada.is_file():
+                    continue
+                estado = entrada.stat()
+                archivos[base.upper()] = (entrada.name, estado.st_size, estado.st_mtime_ns)
+        return archivos
+
+    def _datos(self):
+        """Datos consolidados vigentes: (fechas, {ticker: fila}, arreglo ticker × fecha × columna)."""
+        archivos = self._archivos()
+        firma = hashlib.sha1(repr(sorted(archivos.items())).encode()).hexdigest()[:16]
+        if self._consolidado[0] == firma:
+            return self._consolidado[1]
+        with self._candado:
+            if self._consolidado[0] != firma:
+                ruta = os.path.join(self.directorio, DIRECTORIO_CONSOLIDADO, firma)
+                if not os.path.isdir(ruta):
+                    datos = self._consolidar(archivos, ruta)
+                else:
+                    datos = self._abrir(ruta)
+                self._consolidado = (firma, datos)
+            return self._consolidado[1]
+
+    def _abrir(self, ruta):
+        """Abre una versión consolidada sin copiarla a memoria."""
+        with open(os.path.join(ruta, 'tickers.txt'), encoding='utf-8') as archivo:
+            tickers = archivo.read().split()
+        fechas = np.load(os.path.join(ruta, 'fechas.npy'))
+        precios = np.load(os.path.join(ruta, 'precios.npy'), mmap_mode='r')
+        return fechas, {ticker: fila for fila, ticker in enumerate(tickers)}, precios
+
+    def _consolidar(self, archivos, ruta):
+        """Lee todos los archivos y escribe su versión consolidada; si no se puede escribir, la conserva en memoria."""
+        leidos = {}
+        for ticker, (nombre, _, _) in sorted(archivos.items()):
+            try:
+                leidos[ticker] = _leer_archivo(os.path.join(self.directorio, nombre))
+            except Exception as e:
+                print(f"Error al leer los precios de {ticker} ({nombre}): {e}")
+        tickers = list(leidos)
+        fechas = np.unique(np.concatenate([fechas for fechas, _ in leidos.values()])) if leidos else np.array([], dtype='datetime64[ns]')
+        precios = np.full((len(tickers), len(fechas), len(COLUMNAS)), np.nan)
+        for fila, ticker in enumerate(tickers):
+            fechas_ticker, columnas = leidos[ticker]
+            posiciones = np.searchsorted(fechas, fechas_ticker)
+            for j, columna in enumerate(COLUMNAS):
+                if columna in columnas:
+                    precios[fila, posiciones, j] = columnas[columna]
+                elif columna in COLUMNAS_CERO:
+                    precios[fila, posiciones, j] = 0.0
+
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(temporal, exist_ok=True)
+            with open(os.path.join(temporal, 'tickers.txt'), 'w', encoding='utf-8') as archivo:
+                archivo.write('\n'.join(tickers))
+            np.save(os.path.join(temporal, 'fechas.npy'), fechas)
+            np.save(os.path.join(temporal, 'precios.npy'), precios)
+            os.replace(temporal, ruta)
+        except Exception as e:
+            print(f"Error al guardar los precios consolidados en {ruta}: {e}")
+            shutil.rmtree(temporal, ignore_errors=True)
+            return fechas, {ticker: fila for fila, ticker in enumerate(tickers)}, precios
+        # Las versiones anteriores ya no se usan (los lectores que las abrieron conservan sus mapeos)
+        padre = os.path.dirname(ruta)
+        for anterior in os.listdir(padre):
+            if anterior != os.path.basename(ruta) and not anterior.endswith('.tmp'):
+                shutil.rmtree(os.path.join(padre, anterior), ignore_errors=True)
+        return self._abrir(ruta)
+
+    def historiales(self, tickers, fecha_inicio, fecha_fin):
+        fechas, filas, precios = self._datos()
+        # Vista como ndarray: indexar un np.memmap es bastante más lento y no hace falta
+        precios = precios.view(np.ndarray)
+        inicio = int(np.searchsorted(fechas, np.datetime64(fecha_inicio, 'ns'), side='left'))
+        fin = int(np.searchsorted(fechas, np.datetime64(fecha_fin, 'ns'), side='left'))
+        # Un solo índice para todo el rango; cada ticker usa una porción
+        indice = pd.DatetimeIndex(fechas[inicio:fin], name='Date')
+        cierres = precios[:, inicio:fin, COLUMNAS.index('Close')]
+        columnas = pd.Index(COLUMNAS)
+        historiales = {}
+        for ticker in tickers:
+            fila = filas.get(ticker)
+            validos = np.flatnonzero(~np.isnan(cierres[fila])) if fila is not None else []
+            if not len(validos):
+                historiales[ticker] = None
+                continue
+            primero, ultimo = validos[0], validos[-1] + 1
+            if ultimo - primero == len(validos):
+                # Sin huecos (lo habitual): porciones contiguas del bloque y del índice
+                historiales[ticker] = pd.DataFrame(
+                    precios[fila, inicio + primero:inicio + ultimo], index=indice[primero:ultimo], columns=columnas, copy=True,
+                )
+            else:
+                historiales[ticker] = pd.DataFrame(precios[fila, inicio + validos], index=indice[validos], columns=columnas)
+        return historiales
+
+    def info(self, ticker):
+        if self._info is None:
+            self._info = leer_info(os.path.join(self.directorio, ARCHIVO_INFO))
+        return self._info.get(ticker, ('No disponible', 'Descripción no disponible'))
+
+    def precio_actual(self, ticker):
+        return self.cotizaciones([ticker])[ticker]
+
+    def cotizaciones(self, tickers):
+        _, filas, precios = self._datos()
+        cierres = precios.view(np.ndarray)[:, :, COLUMNAS.index('Close')]
+        cotizaciones = {}
+        for ticker in tickers:
+            fila = filas.get(ticker)
+            validos = np.flatnonzero(~np.isnan(cierres[fila])) if fila is not None else []
+            cotizaciones[ticker] = float(cierres[fila, validos[-1]]) if len(validos) else None
+        return cotizaciones
+
+class ProveedorGrabador(Proveedor):
+    """
+    Envuelve otro proveedor y guarda en un directorio todo lo que responde.
+
+    Los precios se escriben como <TICKER>.parquet y los metadatos en info.csv, el
+    formato de ProveedorArchivos, que es el que reproduce la grabación.
+    """
+
+    def __init__(self, proveedor, directorio=DIRECTORIO_DATOS):
+        self.proveedor = proveedor
+        self.directorio = directorio
+        self.traducir_descripciones = proveedor.traducir_descripciones
+        # Se conserva lo grabado en ejecuciones anteriores
+        self._info = leer_info(os.path.join(directorio, ARCHIVO_INFO))
+        self._candado = threading.Lock()
+
+    def historiales(self, tickers, fecha_inicio, fecha_fin):
+        historiales = self.proveedor.historiales(tickers, fecha_inicio, fecha_fin)
+        os.makedirs(self.directorio, exist_ok=True)
+        for ticker, datos in historiales.items():
+            if datos is None or datos.empty:
+                continue
+            ruta = os.path.join(self.directorio, f"{ticker}.parquet")
+            try:
+                datos.to_parquet(f"{ruta}.tmp")
+                os.replace(f"{ruta}.tmp", ruta)
+            except Exception as e:
+                print(f"Error al grabar los precios de {ticker}: {e}")
+        return historiales
+
+    def info(self, ticker):
+        info = self.proveedor.info(ticker)
+        with self._candado:
+            self._info[ticker] = info
+            os.makedirs(self.directorio, exist_ok=True)
+            ruta = os.path.join(self.directorio, ARCHIVO_INFO)
+            with open(f"{ruta}.tmp", 'w', newline='', encoding='utf-8') as archivo:
+                escritor = csv.writer(archivo)
+                escritor.writerow(['ticker', 'nombre_corto', 'descripcion'])
+                for simbolo, (nombre_corto, descripcion) in sorted(self._info.items()):
+                    escritor.writerow([simbolo, nombre_corto, descripcion])
+            os.replace(f"{ruta}.tmp", ruta)
+        return info
+
+    def precio_actual(self, ticker):
+        return self.proveedor.precio_actual(ticker)
+
+    def cotizaciones(self, tickers):
+        return self.proveedor.cotizaciones(tickers)
+
+def crear_proveedor(nombre=PROVEEDOR, directorio=DIRECTORIO_DATOS):
+    """Crea el proveedor indicado ('yfinance', 'archivos' o 'grabar')."""
+    if nombre == 'yfinance':
+        return ProveedorYFinance()
+    if nombre == 'archivos':
+        return ProveedorArchivos(directorio)
+    if nombre == 'grabar':
+        return ProveedorGrabador(ProveedorYFinance(), directorio)
+    raise ValueError(f"Proveedor de datos no reconocido: {nombre}")
+
+# Proveedor compartido por todo el proceso
+proveedor_datos = crear_proveedor()
@@ -0,0 +1,234 @@
+"""
+Snapshot precalculado de las métricas de todos los ETFs.
+
+Ejecutado como script recorre una vez todo el proceso (precios, descripciones,
+traducciones y métricas de todos los periodos) y escribe un snapshot versionado;
+la app solo lo abre, sin descargar ni calcular nada. Pensado para lanzarse después
+del cierre del mercado (por ejemplo, desde cron):
+
+    python snapshot.py
+    python snapshot.py --directorio /ruta/compartida --conservar 5
+
+Cada snapshot es un directorio con un arreglo .npy por campo (columnar, se abre con
+np.load(mmap_mode='r') sin copiarlo a memoria) y un JSON con los textos. El
+archivo ACTUAL apunta al último snapshot completo y se reemplaza de forma atómica,
+así que un lector nunca ve un snapshot a medio escribir.
+"""
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from backtest import alinear_dividendos
+from data import ETF, PERIODOS, RegistroETFs, ETFs_Data, almacen_precios
+from metricas import MatrizCierres
+
+# Versión del formato; un snapshot de otra versión se ignora
+VERSION_FORMATO = 1
+
+DIRECTORIO_SNAPSHOTS = os.environ.get(
+    'SIMULADOR_SNAPSHOTS',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.snapshots'),
+)
+
+# Archivo con el nombre del snapshot vigente
+ARCHIVO_ACTUAL = 'ACTUAL'
+
+# Número de snapshots anteriores que se conservan en disco
+CONSERVAR = 3
+
+# Métricas escalares y por periodo de cada ETF, en el orden en que se guardan
+CAMPOS_ESCALARES = ('precio_actual', 'rendimiento_log_geom', 'riesgo_promedio', 'ratio_riesgo_rendimiento')
+CAMPOS_POR_PERIODO = ('rendimientos', 'riesgos', 'drawdowns', 'dias_bajo_agua')
+
+def _a_arreglo(valores):
+    """Convierte una lista con None en un arreglo float64 con NaN."""
+    return np.array([np.nan if valor is None else valor for valor in valores], dtype=np.float64)
+
+def _a_valor(valor):
+    """Convierte un float del snapshot en float de Python (None si es NaN)."""
+    return None if np.isnan(valor) else float(valor)
+
+def escribir_snapshot(registro, dividendos, directorio=DIRECTORIO_SNAPSHOTS, conservar=CONSERVAR):
+    """
+    Escribe un snapshot con todos los ETFs de un registro ya cargado.
+
+    Args:
+    registro (RegistroETFs): Registro con todos los ETFs construidos.
+    dividendos (ndarray): Dividendos por acción alineados con registro.cierres (fecha × ticker).
+    directorio (str): Directorio de los snapshots.
+    conservar (int): Número de snapshots que se conservan (incluido el nuevo).
+
+    Returns:
+    str: Ruta del snapshot escrito.
+    """
+    etfs = [registro.obtener(nombre) for nombre in registro.nombres()]
+    creado = datetime.now()
+    nombre = f"snapshot-{creado.strftime('%Y%m%dT%H%M%S%f')}"
+    ruta = os.path.join(directorio, nombre)
+    temporal = ruta + '.tmp'
+    os.makedirs(temporal, exist_ok=True)
+
+    cierres = registro.cierres
+    np.save(os.path.join(temporal, 'fechas.npy'), cierres.fechas.to_numpy(dtype='datetime64[ns]'))
+    np.save(os.path.join(temporal, 'cierres.npy'), np.ascontiguousarray(cierres.valores))
+    np.save(os.path.join(temporal, 'dividendos.npy'), np.ascontiguousarray(dividendos, dtype=np.float64))
+    np.save(os.path.join(temporal, 'escalares.npy'), np.column_stack([
+        _a_arreglo([getattr(etf, campo) for etf in etfs]) for campo in CAMPOS_ESCALARES
+    ]))
+    # (campo, ETF, periodo)
+    np.save(os.path.join(temporal, 'por_periodo.npy'), np.stack([
+        np.stack([_a_arreglo([getattr(etf, campo).get(periodo) for periodo in PERIODOS]) for etf in etfs])
+        for campo in CAMPOS_POR_PERIODO
+    ]))
+    with open(os.path.join(temporal, 'etfs.json'), 'w', encoding='utf-8') as archivo:
+        json.dump({
+            'version': VERSION_FORMATO,
+            'creado': creado.isoformat(),
+            'periodos': PERIODOS,
+            'tickers_cierres': cierres.tickers,
+            'nombres': [etf.nombre for etf in etfs],
+            'simbolos': [etf.simbolo for etf in etfs],
+            'nombres_cortos': [etf.nombre_corto for etf in etfs],
+            'descripciones': [etf.descripcion_larga for etf in etfs],
+        }, archivo, ensure_ascii=False)
+
+    os.replace(temporal, ruta)
+    # El puntero se cambia solo cuando el snapshot está completo
+    puntero = os.path.join(directorio, ARCHIVO_ACTUAL)
+    with open(puntero + '.tmp', 'w', encoding='utf-8') as archivo:
+        archivo.write(nombre)
+    os.replace(puntero + '.tmp', puntero)
+    _limpiar(directorio, conservar)
+    return ruta
+
+def _limpiar(directorio, conservar):
+    """Borra los snapshots más antiguos (los lectores que ya los abrieron conservan sus mapeos)."""
+    anteriores = sorted(nombre for nombre in os.listdir(directorio) if nombre.startswith('snapshot-') and not nombre.endswith('.tmp'))
+    for nombre in anteriores[:-conservar] if conservar > 0 else []:
+        try:
+            shutil.rmtree(os.path.join(directorio, nombre))
+        except OSError as e:
+            print(f"Error al borrar el snapshot {nombre}: {e}")
+
+class Snapshot:
+    """
+    Snapshot abierto: un RegistroETFs completo cuyos arreglos están mapeados desde disco.
+    """
+
+    def __init__(self, ruta):
+        with open(os.path.join(ruta, 'etfs.json'), encoding='utf-8') as archivo:
+            meta = json.load(archivo)
+        if meta['version'] != VERSION_FORMATO:
+            raise ValueError(f"Versión de snapshot no soportada: {meta['version']}")
+        self.ruta = ruta
+        self.creado = datetime.fromisoformat(meta['creado'])
+
+        def cargar(campo):
+            return np.load(os.path.join(ruta, f'{campo}.npy'), mmap_mode='r')
+
+        cierres = MatrizCierres.desde_arreglos(pd.DatetimeIndex(cargar('fechas')), meta['tickers_cierres'], cargar('cierres'))
+        self.dividendos = cargar('dividendos')
+        escalares = cargar('escalares')
+        por_periodo = cargar('por_periodo')
+        periodos = meta['periodos']
+
+        etfs = []
+        for i, simbolo in enumerate(meta['simbolos']):
+            metricas = [_a_valor(valor) for valor in escalares[i]]
+            por_campo = [
+                {periodo: _a_valor(por_periodo[k, i, j]) for j, periodo in enumerate(periodos)}
+                for k in range(len(CAMPOS_POR_PERIODO))
+            ]
+            etfs.append(ETF(
+                meta['nombres'][i], simbolo, meta['nombres_cortos'][i], meta['descripciones'][i],
+                *metricas, *por_campo, cierres,
+            ))
+        self.registro = RegistroETFs.precargado(etfs, cierres)
+
+    def precios(self, tickers):
+        """Precios de cierre y dividendos por ticker (DataFrame o None), como los del almacén de precios."""
+        cierres = self.registro.cierres
+        precios = {}
+        for ticker in tickers:
+            if ticker not in cierres.columnas:
+                precios[ticker] = None
+                continue
+            columna = cierres.columnas[ticker]
+            validos = ~np.isnan(cierres.valores[:, columna])
+            precios[ticker] = pd.DataFrame({
+                'Close': cierres.valores[validos, columna],
+                'Dividends': self.dividendos[validos, columna],
+            }, index=cierres.fechas[validos])
+        return precios
+
+def ruta_actual(directorio=DIRECTORIO_SNAPSHOTS):
+    """Ruta del snapshot vigente, o None si todavía no hay ninguno."""
+    try:
+        with open(os.path.join(directorio, ARCHIVO_ACTUAL), encoding='utf-8') as archivo:
+            nombre = archivo.read().strip()
+    except FileNotFoundError:
+        return None
+    return os.path.join(directorio, nombre) if nombre else None
+
+class VigilanteSnapshots:
+    """
+    Mantiene abierto el snapshot vigente y lo reemplaza cuando aparece uno nuevo.
+
+    Comprobar si hay uno nuevo cuesta un stat del archivo ACTUAL; abrirlo solo mapea
+    los arreglos. El cambio es atómico: quien ya obtuvo el snapshot anterior lo sigue
+    usando completo.
+    """
+
+    def __init__(self, directorio=DIRECTORIO_SNAPSHOTS):
+        self.directorio = directorio
+        self._actual = None
+        self._modificado = None
+        self._candado = threading.Lock()
+
+    def actual(self):
+        """Devuelve el snapshot vigente (o None si no hay ninguno)."""
+        try:
+            modificado = os.stat(os.path.join(self.directorio, ARCHIVO_ACTUAL)).st_mtime_ns
+        except FileNotFoundError:
+            return self._actual
+        if modificado == self._modificado:
+            return self._actual
+        with self._candado:
+            if modificado != self._modificado:
+                ruta = ruta_actual(self.directorio)
+                try:
+                    if self._actual is None or self._actual.ruta != ruta:
+                        self._actual = Snapshot(ruta)
+                except Exception as e:
+                    print(f"Error al abrir el snapshot {ruta}: {e}")
+                self._modificado = modificado
+        return self._actual
+
+# Vigilante compartido por todas las sesiones de la app
+vigilante_snapshots = VigilanteSnapshots()
+
+def generar_snapshot(directorio=DIRECTORIO_SNAPSHOTS, conservar=CONSERVAR):
+    """Descarga, traduce y calcula todos los ETFs y escribe el snapshot."""
+    ETFs_Data.cargar(ETFs_Data.nombres())
+    cierres = ETFs_Data.cierres
+    precios = almacen_precios.obtener(cierres.tickers)
+    dividendos = alinear_dividendos(precios, cierres.fechas, cierres.tickers)
+    return escribir_snapshot(ETFs_Data, dividendos, directorio, conservar)
+
+def main():
+    parser = argparse.ArgumentParser(description="Precalcula las métricas de todos los ETFs y escribe un snapshot.")
+    parser.add_argument("--directorio", default=DIRECTORIO_SNAPSHOTS, help="Directorio de los snapshots.")
+    parser.add_argument("--conservar", type=int, default=CONSERVAR, help="Número de snapshots que se conservan.")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    ruta = generar_snapshot(args.directorio, args.conservar)
+    print(f"Snapshot escrito en {ruta} ({time.perf_counter() - inicio:.1f} s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import gzip
+import http.client
+import json
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+import pytest
+import api
+
+class RegistroSimulado:
+    """Registro con un solo ETF y 300 cierres, suficiente para que /cierres se comprima."""
+
+    def __init__(self):
+        fechas = pd.bdate_range('2024-01-02', periods=300)
+        self.etf = SimpleNamespace(
+            nombre='SPDR S&P 500', simbolo='SPY', nombre_corto='S&P 500', precio_actual=400.0,
+            rendimiento_log_geom=0.08, riesgo_promedio=0.15, ratio_riesgo_rendimiento=0.53,
+            descripcion_larga='Réplica del S&P 500.', rendimientos={}, riesgos={}, drawdowns={}, dias_bajo_agua={},
+            precios_historicos=pd.DataFrame({'Close': 100 + np.arange(300) / 7}, index=fechas),
+        )
+
+    def nombres(self):
+        return [self.etf.nombre]
+
+    def obtener(self, nombre):
+        return self.etf
+
+@pytest.fixture
+def servidor(monkeypatch):
+    datos = api.DatosAPI(RegistroSimulado(), datetime(2024, 6, 1, 12, 0))
+    monkeypatch.setattr(api, 'datos_actuales', lambda: datos)
+    servidor = api.crear_servidor(puerto=0)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    yield servidor.server_address[1]
+    servidor.shutdown()
+    servidor.server_close()
+
+def _pedir(puerto, ruta, **cabeceras):
+    conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=10)
+    try:
+        conexion.request('GET', ruta, headers=cabeceras)
+        respuesta = conexion.getresponse()
+        return respuesta.status, dict(respuesta.getheaders()), respuesta.read()
+    finally:
+        conexion.close()
+
+def test_gzip_e_identidad_tienen_etag_distinto(servidor):
+    estado, cabeceras, cuerpo = _pedir(servidor, '/etfs/spy/cierres')
+    assert estado == 200
+    assert 'Content-Encoding' not in cabeceras
+    assert len(json.loads(cuerpo)['cierres']) == 300
+
+    estado_gzip, cabeceras_gzip, cuerpo_gzip = _pedir(servidor, '/etfs/spy/cierres', **{'Accept-Encoding': 'gzip'})
+    assert estado_gzip == 200
+    assert cabeceras_gzip['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(cuerpo_gzip) == cuerpo
+    assert cabeceras_gzip['ETag'] != cabeceras['ETag']
+    assert cabeceras['Vary'] == cabeceras_gzip['Vary'] == 'Accept-Encoding'
+
+def test_if_none_match_responde_304_solo_para_su_codificacion(servidor):
+    _, cabeceras, _ = _pedir(servidor, '/etfs/spy/cierres')
+    _, cabeceras_gzip, _ = _pedir(servidor, '/etfs/spy/cierres', **{'Accept-Encoding': 'gzip'})
+
+    estado, revalidada, cuerpo = _pedir(servidor, '/etfs/spy/cierres', **{'If-None-Match': cabeceras['ETag']})
+    assert (estado, cuerpo) == (304, b'')
+    assert revalidada['ETag'] == cabeceras['ETag']
+
+    estado, _, cuerpo = _pedir(servidor, '/etfs/spy/cierres', **{'If-None-Match': cabeceras_gzip['ETag'], 'Accept-Encoding': 'gzip'})
+    assert (estado, cuerpo) == (304, b'')
+
+    # El ETag de la versión sin comprimir no valida la comprimida, ni al revés
+    estado, _, cuerpo = _pedir(servidor, '/etfs/spy/cierres', **{'If-None-Match': cabeceras['ETag'], 'Accept-Encoding': 'gzip'})
+    assert estado == 200 and gzip.decompress(cuerpo)
+    estado, _, cuerpo = _pedir(servidor, '/etfs/spy/cierres', **{'If-None-Match': cabeceras_gzip['ETag']})
+    assert estado == 200 and json.loads(cuerpo)
+
+def test_if_none_match_acepta_etag_debil_y_lista(servidor):
+    _, cabeceras, _ = _pedir(servidor, '/etfs/SPY')
+    estado, _, _ = _pedir(servidor, '/etfs/SPY', **{'If-None-Match': f'"otro", W/{cabeceras["ETag"]}'})
+    assert estado == 304
+    estado, _, _ = _pedir(servidor, '/etfs/SPY', **{'If-None-Match': '"otro"'})
+    assert estado == 200
+
+def test_respuesta_pequena_no_se_comprime(servidor):
+    _, cabeceras, _ = _pedir(servidor, '/etfs/SPY/periodos', **{'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in cabeceras
+    assert not cabeceras['ETag'].endswith('-gzip"')
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backtest import backtest, precios_sin_dividendos
+
+def _mensual(cierres, dividendos=None):
+    """Un cierre por mes (el primer día de cada mes), así cada fila es una fecha de aportación."""
+    fechas = pd.date_range('2020-01-01', periods=len(cierres), freq='MS')
+    return pd.DataFrame({
+        'Close': np.asarray(cierres, dtype=float),
+        'Dividends': np.zeros(len(cierres)) if dividendos is None else np.asarray(dividendos, dtype=float),
+    }, index=fechas)
+
+def test_aportaciones_mensuales():
+    # Inicio en enero: 100/10 + 100/20 + 100/10 = 25 unidades, valoradas a 20 en abril
+    # Inicio en febrero: 100/20 + 100/10 + 100/20 = 20 unidades, valoradas a 10 en mayo
+    resultado = backtest({'A': _mensual([10, 20, 10, 20, 10])}, {'A': 1}, aportacion=100, anos=0.25)
+    assert list(resultado['inicios']) == list(pd.to_datetime(['2020-01-01', '2020-02-01']))
+    assert list(resultado['fines']) == list(pd.to_datetime(['2020-04-01', '2020-05-01']))
+    np.testing.assert_allclose(resultado['valor_final'], [500.0, 200.0])
+    np.testing.assert_allclose(resultado['aportado'], [300.0, 300.0])
+    np.testing.assert_allclose(resultado['rendimiento'], [500 / 300 - 1, 200 / 300 - 1])
+    assert resultado['probabilidad_perdida'] == 0.5
+
+def _cartera_dos_etfs(rebalanceo):
+    # A sube, baja y vuelve a subir; B no se mueve. 1000 iniciales al 50/50, sin aportaciones
+    precios = {'A': _mensual([10, 20, 20, 20, 10, 20, 10]), 'B': _mensual([10] * 7)}
+    resultado = backtest(precios, {'A': 1, 'B': 1}, aportacion=0, inversion_inicial=1000, anos=0.5, rebalanceo=rebalanceo)
+    assert len(resultado['valor_final']) == 1
+    return resultado['valor_final'][0]
+
+def test_sin_rebalanceo():
+    # 50 unidades de cada uno, valoradas a 10
+    assert _cartera_dos_etfs(None) == pytest.approx(1000.0)
+
+def test_rebalanceo_trimestral():
+    # Abril: 50·20 + 50·10 = 1500 → 37.5 de A y 75 de B; julio: 37.5·10 + 75·10
+    assert _cartera_dos_etfs('Q') == pytest.approx(1125.0)
+
+def test_rebalanceo_por_umbral():
+    # Febrero (A pesa 2/3): 1500 → 37.5 y 75; mayo (A pesa 1/3): 1125 → 56.25 y 56.25;
+    # junio (A pesa 2/3): 1687.5 → 42.1875 y 84.375; julio: 42.1875·10 + 84.375·10
+    assert _cartera_dos_etfs(0.1) == pytest.approx(1265.625)
+    # Con un umbral mayor que todas las desviaciones nunca se rebalancea
+    assert _cartera_dos_etfs(0.2) == pytest.approx(1000.0)
+
+def test_dividendos_reinvertidos_y_en_efectivo():
+    # Precio sin ajustar constante en 10 y un dividendo de 1 en marzo: yfinance multiplica
+    # los cierres anteriores por 1 - 1/10, así que los ajustados son 9, 9, 10, 10
+    precios = {'A': _mensual([9, 9, 10, 10], dividendos=[0, 0, 1, 0])}
+    np.testing.assert_allclose(precios_sin_dividendos(precios['A'][['Close']].to_numpy(), precios['A'][['Dividends']].to_numpy()).ravel(), [10, 10, 10, 10])
+
+    # Reinvertidos: 1000/9 unidades valoradas a 10
+    reinvertir = backtest(precios, {'A': 1}, aportacion=0, inversion_inicial=1000, anos=0.25, dividendos='reinvertir')
+    assert reinvertir['valor_final'][0] == pytest.approx(1000 * 10 / 9)
+    assert reinvertir['dividendos'][0] == 0.0
+
+    # En efectivo: 100 unidades a 10 más 100 de dividendos
+    efectivo = backtest(precios, {'A': 1}, aportacion=0, inversion_inicial=1000, anos=0.25, dividendos='efectivo')
+    assert efectivo['dividendos'][0] == pytest.approx(100.0)
+    assert efectivo['valor_final'][0] == pytest.approx(1100.0)
@@ -0,0 +1,60 @@
+from busqueda import IndiceBusqueda, normalizar
+
+TICKERS = ['SPY', 'QQQ', 'EWZ', 'VWO', 'IEMG']
+NOMBRES = [
+    'SPDR S&P 500 ETF Trust',
+    'Invesco QQQ Trust',
+    'iShares MSCI Brazil ETF',
+    'Vanguard FTSE Emerging Markets ETF',
+    'iShares Core MSCI Emerging Markets ETF',
+]
+DESCRIPCIONES = [
+    'Replica el índice S&P 500 de empresas estadounidenses.',
+    'Replica el Nasdaq-100, con mucha tecnología.',
+    'Acciones de empresas de Brasil.',
+    'Acciones de mercados emergentes de Asia y Latinoamérica.',
+    'Acciones de mercados emergentes de gran, mediana y pequeña capitalización.',
+]
+
+def _indice():
+    return IndiceBusqueda(TICKERS, NOMBRES, DESCRIPCIONES)
+
+def test_normalizar_quita_acentos_mayusculas_y_signos():
+    assert normalizar('Tecnología S&P-500') == 'tecnologia s p 500'
+    assert normalizar(None) == ''
+
+def test_ticker_exacto_va_primero():
+    assert _indice().buscar('qqq')[0] == 1
+    assert _indice().buscar('SPY')[0] == 0
+
+def test_prefijo_de_palabra():
+    assert _indice().buscar('brazi')[0] == 2
+    assert set(_indice().buscar('emerg')[:2]) == {3, 4}
+
+def test_varias_palabras_deben_aparecer_todas():
+    indice = _indice()
+    assert indice.buscar('emerging vanguard')[0] == 3
+    assert indice.buscar('msci emerging')[0] == 4
+    # Palabras de campos distintos (nombre y descripción) también cuentan
+    assert indice.buscar('acciones brasil') == [2]
+    assert indice.buscar('acciones asia') == [3]
+    # Ningún ETF tiene las dos palabras
+    assert indice.buscar('brazil tecnologia') == []
+
+def test_mayusculas_y_acentos_no_importan():
+    indice = _indice()
+    assert indice.buscar('TECNOLOGÍA') == indice.buscar('tecnologia')
+    assert indice.buscar('tecnologia')[0] == 1
+    assert indice.buscar('Latinoamerica')[0] == 3
+
+def test_consulta_vacia_no_devuelve_nada():
+    indice = _indice()
+    assert indice.buscar('') == []
+    assert indice.buscar('   ') == []
+    assert indice.buscar('&-!') == []
+
+def test_errores_de_escritura_por_trigramas():
+    assert _indice().buscar('vangaurd emerging')[0] == 3
+
+def test_limite():
+    assert len(_indice().buscar('etf', limite=2)) == 2
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import cache_precios
+from cache_precios import actualizar_precios_lote
+
+def _historial(fechas, ultimo_cierre=None):
+    cierre = 100 + np.arange(len(fechas), dtype=float)
+    if ultimo_cierre is not None:
+        cierre[-1] = ultimo_cierre
+    return pd.DataFrame({'Close': cierre, 'Dividends': 0.0}, index=pd.DatetimeIndex(fechas, name='Date'))
+
+class DescargaSimulada:
+    """Devuelve el tramo pedido de un historial y anota cada llamada."""
+
+    def __init__(self, historial):
+        self.historial = historial
+        self.llamadas = []
+
+    def __call__(self, tickers, inicio, fin):
+        self.llamadas.append((list(tickers), inicio, fin))
+        tramo = self.historial[(self.historial.index >= pd.Timestamp(inicio)) & (self.historial.index < pd.Timestamp(fin))]
+        return {ticker: tramo.copy() for ticker in tickers}
+
+def test_cambio_del_ultimo_cierre_no_provoca_descarga_completa(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_precios, 'DIRECTORIO_CACHE', str(tmp_path))
+    fechas = pd.bdate_range('2024-01-02', '2024-03-29')
+    descarga = DescargaSimulada(_historial(fechas, ultimo_cierre=150.0))
+    actualizar_precios_lote(['SPY'], '2024-01-01', '2024-03-30', descarga)
+    assert descarga.llamadas == [(['SPY'], '2024-01-01', '2024-03-30')]
+
+    # La barra de la sesión en curso cierra con otro precio en la siguiente actualización
+    descarga.historial = _historial(fechas, ultimo_cierre=151.5)
+    descarga.llamadas = []
+    precios = actualizar_precios_lote(['SPY'], '2024-01-01', '2024-03-30', descarga)
+
+    assert len(descarga.llamadas) == 1
+    assert descarga.llamadas[0][1] > '2024-01-01'  # solo el tramo nuevo
+    assert precios['SPY']['Close'].iloc[-1] == 151.5
+    assert len(precios['SPY']) == len(fechas)
+    assert cache_precios.leer_cache('SPY')['Close'].iloc[-1] == 151.5
+
+def test_reajuste_de_barras_anteriores_descarga_completa(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_precios, 'DIRECTORIO_CACHE', str(tmp_path))
+    fechas = pd.bdate_range('2024-01-02', '2024-03-29')
+    descarga = DescargaSimulada(_historial(fechas))
+    actualizar_precios_lote(['SPY'], '2024-01-01', '2024-03-30', descarga)
+
+    # Un split reajusta toda la serie
+    ajustado = _historial(fechas)
+    ajustado['Close'] /= 2
+    descarga.historial = ajustado
+    descarga.llamadas = []
+    precios = actualizar_precios_lote(['SPY'], '2024-01-01', '2024-03-30', descarga)
+
+    assert descarga.llamadas[-1] == (['SPY'], '2024-01-01', '2024-03-30')
+    assert np.allclose(precios['SPY']['Close'].to_numpy(), ajustado['Close'].to_numpy())
@@ -0,0 +1,33 @@
+import pytest
+from instrumentacion import Instrumentacion
+
+def test_medir_registra_la_etapa_y_el_resumen_la_agrega():
+    registro = Instrumentacion()
+    with registro.medir('yfinance', 'SPY'):
+        pass
+    with pytest.raises(ValueError):
+        with registro.medir('yfinance', 'SPY'):
+            raise ValueError("sin datos")
+    registro.registrar('yfinance', 0.2, 'QQQ')
+    registro.registrar_cache('noticias', aciertos=3, fallos=1)
+
+    resumen = registro.resumen()
+    etapa = resumen['etapas']['yfinance']
+    assert (etapa['llamadas'], etapa['fallos']) == (3, 1)
+    assert sum(etapa['histograma'].values()) == 3
+    assert etapa['histograma']['0.25'] == 1
+    assert etapa['p95_segundos'] == 0.25
+    assert etapa['segundos_total'] >= 0.2
+    assert resumen['por_ticker']['yfinance']['SPY'] == {'llamadas': 2, 'segundos_total': pytest.approx(etapa['segundos_total'] - 0.2), 'fallos': 1}
+    assert resumen['caches']['noticias']['tasa_aciertos'] == 0.75
+    assert 'simulador_latencia_segundos_count{etapa="yfinance"} 3' in registro.como_prometheus()
+
+def test_registrar_fallo_guarda_el_error_sin_contar_una_llamada():
+    registro = Instrumentacion()
+    registro.registrar_fallo('finviz', TimeoutError("lento"), 'SPY')
+
+    resumen = registro.resumen()
+    assert resumen['etapas']['finviz']['llamadas'] == 0
+    assert resumen['etapas']['finviz']['fallos'] == 1
+    assert resumen['errores'][0]['error'] == "TimeoutError: lento"
+    assert resumen['errores'][0]['ticker'] == 'SPY'
@@ -0,0 +1,84 @@
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from data import PERIODOS, rendimiento_y_riesgo_por_periodo
+from metricas import DESPLAZAMIENTOS, MotorMetricas, calcular_metricas
+
+def _precios(semilla, dias=2900):
+    """Historial sintético de días hábiles que termina hoy (para que YTD tenga datos)."""
+    generador = np.random.default_rng(semilla)
+    fechas = pd.bdate_range(end=pd.Timestamp(datetime.now().date()), periods=dias)
+    cierre = 100 * np.exp(np.cumsum(generador.normal(0.0003, 0.012, dias)))
+    return pd.DataFrame({'Close': cierre}, index=fechas)
+
+def _periodo_ingenuo(precios, periodo):
+    """Recorte del periodo como lo hacía la versión original (DataFrame.last y filtro de YTD)."""
+    if periodo == 'YTD':
+        return precios[precios.index >= datetime.now().replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)]
+    return precios[precios.index > precios.index[-1] - DESPLAZAMIENTOS[periodo]]
+
+def _rendimiento_y_riesgo_ingenuo(precios):
+    cierre = precios['Close']
+    rendimiento = np.log(cierre.iloc[-1] / cierre.iloc[0]) / (len(cierre) / 252)
+    riesgo = np.log(cierre / cierre.shift(1)).dropna().std() * np.sqrt(252)
+    return rendimiento, riesgo
+
+def _drawdown_ingenuo(precios):
+    cierre = precios['Close']
+    maximo = cierre.cummax()
+    en_maximo = (cierre >= maximo).to_numpy()
+    dias, racha = 0, 0
+    for es_maximo in en_maximo:
+        racha = 0 if es_maximo else racha + 1
+        dias = max(dias, racha)
+    return (cierre / maximo - 1).min(), dias
+
+@pytest.mark.parametrize('periodo', PERIODOS)
+def test_periodo_coincide_con_pandas(periodo):
+    precios = _precios(1)
+    rendimiento, riesgo = rendimiento_y_riesgo_por_periodo(precios, periodo)
+    esperado_rendimiento, esperado_riesgo = _rendimiento_y_riesgo_ingenuo(_periodo_ingenuo(precios, periodo))
+    assert rendimiento == pytest.approx(esperado_rendimiento, rel=1e-9)
+    assert riesgo == pytest.approx(esperado_riesgo, rel=1e-9)
+
+def test_historia_completa_coincide_con_pandas():
+    precios = _precios(2)
+    metricas = calcular_metricas({'A': precios}, PERIODOS)['A']
+    cierre = precios['Close']
+    assert metricas['rendimiento_log_geom'] == pytest.approx(np.log(cierre.iloc[-1] / cierre.iloc[0]) / 10, rel=1e-9)
+    assert metricas['riesgo_promedio'] == pytest.approx(_rendimiento_y_riesgo_ingenuo(precios)[1], rel=1e-9)
+    rendimiento, riesgo = MotorMetricas({'A': precios}).rendimiento_y_riesgo()
+    assert (rendimiento[0], riesgo[0]) == pytest.approx(_rendimiento_y_riesgo_ingenuo(precios), rel=1e-9)
+
+@pytest.mark.parametrize('periodo', PERIODOS)
+def test_drawdown_coincide_con_pandas(periodo):
+    precios = _precios(3)
+    metricas = calcular_metricas({'A': precios}, PERIODOS)['A']
+    caida, dias = _drawdown_ingenuo(_periodo_ingenuo(precios, periodo))
+    assert metricas['drawdowns'][periodo] == pytest.approx(caida, rel=1e-9)
+    assert metricas['dias_bajo_agua'][periodo] == dias
+
+@pytest.mark.parametrize('periodo', PERIODOS)
+def test_dias_faltantes_se_calculan_sobre_los_dias_del_ticker(periodo):
+    # B cotiza todos los días; A deja de cotizar en días sueltos y en un tramo largo
+    completo = _precios(4)
+    faltantes = np.random.default_rng(5).random(len(completo)) < 0.1
+    faltantes[1500:1540] = True
+    con_huecos = _precios(6)[~faltantes]
+    metricas = calcular_metricas({'A': con_huecos, 'B': completo}, PERIODOS)['A']
+
+    periodo_a = _periodo_ingenuo(con_huecos, periodo)
+    # El periodo se mide desde la última fecha de la matriz, que es la misma para A y B
+    if periodo != 'YTD':
+        periodo_a = con_huecos[con_huecos.index > completo.index[-1] - DESPLAZAMIENTOS[periodo]]
+    esperado_rendimiento, esperado_riesgo = _rendimiento_y_riesgo_ingenuo(periodo_a)
+    caida, dias = _drawdown_ingenuo(periodo_a)
+    assert metricas['rendimientos'][periodo] == pytest.approx(esperado_rendimiento, rel=1e-9)
+    assert metricas['riesgos'][periodo] == pytest.approx(esperado_riesgo, rel=1e-9)
+    assert metricas['drawdowns'][periodo] == pytest.approx(caida, rel=1e-9)
+    assert metricas['dias_bajo_agua'][periodo] == dias
+
+    # Las métricas de A no dependen de con qué otros tickers se calculen
+    solo = calcular_metricas({'A': con_huecos}, PERIODOS)['A']
+    assert solo['dias_bajo_agua'][periodo] == metricas['dias_bajo_agua'][periodo]
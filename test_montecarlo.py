@@ -0,0 +1,46 @@
+from statistics import NormalDist
+import numpy as np
+import pytest
+from montecarlo import DESVIACIONES_HISTOGRAMA, DIAS_POR_PASO, NUMERO_INTERVALOS, simular_valor_futuro
+
+TRAYECTORIAS = 200_000
+
+def _rendimientos(semilla=0):
+    return np.random.default_rng(semilla).normal(0.0004, 0.011, 2520)
+
+def _parametros_finales(rendimientos, anos):
+    """Media y desviación del rendimiento logarítmico acumulado al final del horizonte."""
+    pasos = int(round(anos * 252 / DIAS_POR_PASO))
+    media = rendimientos.mean() * DIAS_POR_PASO * pasos
+    desviacion = rendimientos.std(ddof=1) * np.sqrt(DIAS_POR_PASO * pasos)
+    return media, desviacion
+
+def test_percentiles_gbm_coinciden_con_la_lognormal():
+    rendimientos = _rendimientos()
+    resultado = simular_valor_futuro(1000, rendimientos, 5, numero_trayectorias=TRAYECTORIAS, procesos=1, semilla=1)
+    media, desviacion = _parametros_finales(rendimientos, 5)
+    # Un intervalo del histograma más el error de muestreo del percentil (en escala logarítmica)
+    tolerancia = 2 * DESVIACIONES_HISTOGRAMA * desviacion / NUMERO_INTERVALOS + 0.02 * desviacion
+    for percentil, valor in resultado['percentiles_finales'].items():
+        esperado = media + desviacion * NormalDist().inv_cdf(percentil / 100)
+        assert np.log(valor / 1000) == pytest.approx(esperado, abs=tolerancia)
+
+def test_probabilidad_de_perdida_gbm():
+    rendimientos = _rendimientos()
+    resultado = simular_valor_futuro(1000, rendimientos, 5, numero_trayectorias=TRAYECTORIAS, procesos=1, semilla=2)
+    media, desviacion = _parametros_finales(rendimientos, 5)
+    esperada = NormalDist().cdf(-media / desviacion)
+    # Cuatro errores estándar de una proporción con TRAYECTORIAS muestras
+    assert resultado['probabilidad_perdida'] == pytest.approx(esperada, abs=4 * np.sqrt(esperada * (1 - esperada) / TRAYECTORIAS))
+
+def test_bootstrap_con_la_misma_semilla_se_reproduce():
+    rendimientos = _rendimientos(3)
+    primero = simular_valor_futuro(1000, rendimientos, 3, numero_trayectorias=20_000, metodo='bootstrap', procesos=1, semilla=7)
+    segundo = simular_valor_futuro(1000, rendimientos, 3, numero_trayectorias=20_000, metodo='bootstrap', procesos=1, semilla=7)
+    for percentil in primero['bandas']:
+        np.testing.assert_array_equal(primero['bandas'][percentil], segundo['bandas'][percentil])
+    assert primero['probabilidad_perdida'] == segundo['probabilidad_perdida']
+    assert primero['valor_medio'] == segundo['valor_medio']
+
+    otro = simular_valor_futuro(1000, rendimientos, 3, numero_trayectorias=20_000, metodo='bootstrap', procesos=1, semilla=8)
+    assert otro['valor_medio'] != primero['valor_medio']
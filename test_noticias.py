@@ -0,0 +1,35 @@
+from collections import OrderedDict
+import pytest
+import noticias
+
+@pytest.fixture
+def descargas(monkeypatch):
+    """Sustituye la descarga de Finviz y deja la caché vacía."""
+    pedidos = []
+
+    def descargar(ticker):
+        pedidos.append(ticker)
+        return [{'date_time': 'Jan-02-24', 'title': f'Titular de {ticker}', 'link': ''}]
+
+    monkeypatch.setattr(noticias, '_descargar_noticias', descargar)
+    monkeypatch.setattr(noticias, '_cache', OrderedDict())
+    monkeypatch.setattr(noticias, 'MAXIMO_EN_CACHE', 2)
+    return pedidos
+
+def test_cache_descarta_el_ticker_usado_hace_mas_tiempo(descargas):
+    noticias.obtener_noticias(['SPY', 'QQQ'])
+    noticias.obtener_noticias(['SPY'])  # SPY pasa a ser el más reciente
+    noticias.obtener_noticias(['IWM'])
+
+    assert list(noticias._cache) == ['SPY', 'IWM']
+    assert descargas == ['SPY', 'QQQ', 'IWM']
+
+    noticias.obtener_noticias(['QQQ'])
+    assert descargas == ['SPY', 'QQQ', 'IWM', 'QQQ']
+    assert len(noticias._cache) == 2
+
+def test_cache_caduca_tras_el_ttl(descargas, monkeypatch):
+    assert noticias.obtener_noticias(['SPY'])['SPY'][0]['title'] == 'Titular de SPY'
+    monkeypatch.setattr(noticias, 'TTL_SEGUNDOS', -1)
+    noticias.obtener_noticias(['SPY'])
+    assert descargas == ['SPY', 'SPY']
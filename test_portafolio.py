@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+from metricas import MatrizCierres
+from portafolio import analizar_portafolio
+
+def _cierres(tickers, dias=300, semilla=0):
+    generador = np.random.default_rng(semilla)
+    fechas = pd.bdate_range('2023-01-02', periods=dias)
+    matriz = MatrizCierres()
+    matriz.agregar({
+        ticker: pd.DataFrame({'Close': 100 * np.exp(np.cumsum(generador.normal(0.0003, 0.01, dias)))}, index=fechas)
+        for ticker in tickers
+    })
+    return matriz
+
+def test_portafolio_de_tickers_con_precios():
+    resultado = analizar_portafolio(_cierres(['SPY', 'TLT', 'GLD']), ['SPY', 'TLT', 'GLD'])
+    assert np.isclose(resultado['minima_varianza']['pesos'].sum(), 1.0)
+    assert resultado['covarianza'].shape == (3, 3)
+
+def test_ticker_sin_precios_lanza_value_error_con_su_nombre():
+    with pytest.raises(ValueError, match='QQQ'):
+        analizar_portafolio(_cierres(['SPY', 'TLT']), ['SPY', 'QQQ', 'TLT'])
+
+def test_ticker_sin_precios_en_el_periodo_lanza_value_error():
+    cierres = _cierres(['SPY', 'TLT'])
+    fechas = pd.bdate_range('2023-01-02', periods=300)
+    cierres.agregar({'QQQ': pd.DataFrame({'Close': np.r_[np.full(10, 50.0), np.full(290, np.nan)]}, index=fechas)})
+    with pytest.raises(ValueError, match='QQQ'):
+        analizar_portafolio(cierres, ['SPY', 'QQQ', 'TLT'], '1m')
+
+def test_otra_matriz_con_la_misma_forma_no_reutiliza_el_resultado():
+    primera = analizar_portafolio(_cierres(['SPY', 'TLT'], semilla=1), ['SPY', 'TLT'], '1y')
+    segunda = analizar_portafolio(_cierres(['SPY', 'TLT'], semilla=2), ['SPY', 'TLT'], '1y')
+    assert not np.allclose(primera['covarianza'], segunda['covarianza'])
+
+def test_un_cierre_corregido_no_reutiliza_el_resultado():
+    cierres = _cierres(['SPY', 'TLT'], semilla=3)
+    antes = analizar_portafolio(cierres, ['SPY', 'TLT'])
+    corregida = cierres.serie('SPY').to_frame()
+    corregida.iloc[100, 0] *= 1.5
+    cierres.agregar({'SPY': corregida})
+    despues = analizar_portafolio(cierres, ['SPY', 'TLT'])
+    assert despues is not antes
+    assert not np.allclose(antes['covarianza'], despues['covarianza'])
+    assert analizar_portafolio(cierres, ['SPY', 'TLT']) is despues
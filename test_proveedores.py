@@ -0,0 +1,88 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import proveedores
+from proveedores import COLUMNAS, DIRECTORIO_CONSOLIDADO, Proveedor, ProveedorArchivos, ProveedorGrabador
+
+def _historial(fechas, base):
+    n = len(fechas)
+    cierre = base + np.arange(n, dtype=float)
+    return pd.DataFrame({
+        'Open': cierre - 0.5, 'High': cierre + 1, 'Low': cierre - 1, 'Close': cierre,
+        'Volume': 1000.0 + np.arange(n), 'Dividends': 0.0, 'Stock Splits': 0.0,
+    }, index=pd.DatetimeIndex(fechas, name='Date'))
+
+class ProveedorSimulado(Proveedor):
+    traducir_descripciones = False
+
+    def __init__(self):
+        fechas = pd.bdate_range('2024-01-02', periods=30)
+        self.datos = {'SPY': _historial(fechas, 100.0), 'TLT': _historial(fechas[::2], 50.0)}
+        self.datos['TLT'].loc[fechas[10], 'Dividends'] = 0.25
+
+    def historiales(self, tickers, fecha_inicio, fecha_fin):
+        return {ticker: self.datos.get(ticker) for ticker in tickers}
+
+    def info(self, ticker):
+        return f"{ticker} ETF", f"Descripción de {ticker}, con comas"
+
+    def precio_actual(self, ticker):
+        return float(self.datos[ticker]['Close'].iloc[-1])
+
+def test_proveedor_sin_metodos_no_se_puede_instanciar():
+    class Incompleto(Proveedor):
+        def info(self, ticker):
+            return None, None
+    with pytest.raises(TypeError):
+        Incompleto()
+
+def test_grabacion_se_reproduce_con_archivos(tmp_path):
+    simulado = ProveedorSimulado()
+    grabador = ProveedorGrabador(simulado, str(tmp_path))
+    grabados = grabador.historiales(['SPY', 'TLT', 'QQQ'], '2024-01-01', '2024-03-01')
+    for ticker in ('SPY', 'TLT'):
+        grabador.info(ticker)
+    assert sorted(os.listdir(tmp_path)) == ['SPY.parquet', 'TLT.parquet', 'info.csv']
+
+    archivos = ProveedorArchivos(str(tmp_path))
+    leidos = archivos.historiales(['SPY', 'TLT', 'QQQ'], '2024-01-01', '2024-03-01')
+    assert leidos['QQQ'] is None
+    for ticker in ('SPY', 'TLT'):
+        # TLT solo cotiza días alternos: no aparecen las fechas que solo tiene SPY
+        pd.testing.assert_frame_equal(leidos[ticker], grabados[ticker][list(COLUMNAS)], check_freq=False)
+        assert archivos.info(ticker) == simulado.info(ticker)
+    assert archivos.cotizaciones(['SPY', 'TLT', 'QQQ']) == {'SPY': 129.0, 'TLT': 64.0, 'QQQ': None}
+
+    # Versión consolidada: un bloque ticker × fecha × columna con un único índice de fechas
+    consolidado = tmp_path / DIRECTORIO_CONSOLIDADO
+    (version,) = os.listdir(consolidado)
+    assert (consolidado / version / 'tickers.txt').read_text(encoding='utf-8').split() == ['SPY', 'TLT']
+    assert np.load(consolidado / version / 'precios.npy').shape == (2, 30, len(COLUMNAS))
+    assert len(np.load(consolidado / version / 'fechas.npy')) == 30
+
+    # Rango parcial
+    rango = archivos.historiales(['SPY'], '2024-01-10', '2024-01-20')['SPY']
+    assert rango.index[0] == pd.Timestamp('2024-01-10') and rango.index[-1] < pd.Timestamp('2024-01-20')
+
+def test_la_consolidacion_se_reutiliza_y_se_rehace_al_cambiar_los_archivos(tmp_path, monkeypatch):
+    ProveedorGrabador(ProveedorSimulado(), str(tmp_path)).historiales(['SPY', 'TLT'], '2024-01-01', '2024-03-01')
+    ProveedorArchivos(str(tmp_path)).historiales(['SPY'], '2024-01-01', '2024-03-01')
+    (version,) = os.listdir(tmp_path / DIRECTORIO_CONSOLIDADO)
+
+    # Otro proceso abre la versión consolidada sin volver a leer los archivos
+    def sin_leer(ruta):
+        raise AssertionError(f"se volvió a leer {ruta}")
+    with monkeypatch.context() as m:
+        m.setattr(proveedores, '_leer_archivo', sin_leer)
+        assert ProveedorArchivos(str(tmp_path)).historiales(['SPY'], '2024-01-01', '2024-03-01')['SPY'] is not None
+
+    # Un archivo nuevo (CSV sin algunas columnas) genera otra versión y se borra la anterior
+    pd.DataFrame({'Date': ['2024-01-02', '2024-01-03'], 'Adj Close': [10.0, 11.0]}).to_csv(tmp_path / 'gld.csv', index=False)
+    archivos = ProveedorArchivos(str(tmp_path))
+    gld = archivos.historiales(['GLD'], '2024-01-01', '2024-03-01')['GLD']
+    assert gld['Close'].tolist() == [10.0, 11.0]
+    assert gld['Dividends'].tolist() == [0.0, 0.0]
+    assert gld['Open'].isna().all()
+    assert os.listdir(tmp_path / DIRECTORIO_CONSOLIDADO) != [version]
+    assert len(os.listdir(tmp_path / DIRECTORIO_CONSOLIDADO)) == 1
@@ -0,0 +1,69 @@
+import os
+import numpy as np
+import pandas as pd
+import snapshot
+from data import ETF, PERIODOS, RegistroETFs
+from metricas import MatrizCierres
+
+def _por_periodo(base):
+    """Un valor distinto por periodo; el último sin datos (None), como un ETF con poca historia."""
+    return {periodo: (None if periodo == PERIODOS[-1] else base + i / 100) for i, periodo in enumerate(PERIODOS)}
+
+def _registro():
+    """Registro con dos ETFs; QQQ no cotiza el tercer día."""
+    fechas = pd.bdate_range('2024-01-02', periods=5)
+    valores = np.array([
+        [100.0, 50.0],
+        [101.0, 51.0],
+        [102.0, np.nan],
+        [103.0, 53.0],
+        [104.0, 54.0],
+    ])
+    cierres = MatrizCierres.desde_arreglos(fechas, ['SPY', 'QQQ'], valores)
+    etfs = [
+        ETF('SPDR S&P 500', 'SPY', 'S&P 500', 'Réplica del S&P 500.', 104.0, 0.08, 0.15, 0.53,
+            _por_periodo(0.1), _por_periodo(0.2), _por_periodo(-0.3), _por_periodo(4), cierres),
+        ETF('Invesco QQQ', 'QQQ', 'Nasdaq 100', 'Réplica del Nasdaq 100.', 54.0, None, 0.2, None,
+            _por_periodo(0.5), _por_periodo(0.6), _por_periodo(-0.7), _por_periodo(8), cierres),
+    ]
+    dividendos = np.zeros_like(valores)
+    dividendos[3, 0] = 1.5
+    return RegistroETFs.precargado(etfs, cierres), dividendos
+
+def test_ida_y_vuelta_conserva_metricas_y_precios(tmp_path):
+    registro, dividendos = _registro()
+    ruta = snapshot.escribir_snapshot(registro, dividendos, directorio=str(tmp_path))
+    abierto = snapshot.Snapshot(ruta)
+
+    assert abierto.registro.nombres() == registro.nombres()
+    campos = ('simbolo', 'nombre_corto', 'descripcion_larga') + snapshot.CAMPOS_ESCALARES + snapshot.CAMPOS_POR_PERIODO
+    for nombre in registro.nombres():
+        original, leido = registro.obtener(nombre), abierto.registro.obtener(nombre)
+        for campo in campos:
+            assert getattr(leido, campo) == getattr(original, campo), campo
+
+    precios = abierto.precios(['SPY', 'QQQ', 'IWM'])
+    assert precios['IWM'] is None
+    assert precios['SPY']['Close'].tolist() == [100.0, 101.0, 102.0, 103.0, 104.0]
+    assert precios['SPY']['Dividends'].tolist() == [0.0, 0.0, 0.0, 1.5, 0.0]
+    # El día sin cotización no aparece
+    assert precios['QQQ']['Close'].tolist() == [50.0, 51.0, 53.0, 54.0]
+    assert precios['QQQ'].index.equals(registro.cierres.fechas.delete(2))
+    pd.testing.assert_series_equal(
+        abierto.registro.obtener('Invesco QQQ').precios_historicos['Close'],
+        registro.obtener('Invesco QQQ').precios_historicos['Close'],
+        check_names=False, check_freq=False,
+    )
+
+def test_actual_apunta_al_ultimo_y_se_conservan_los_recientes(tmp_path):
+    registro, dividendos = _registro()
+    rutas = [snapshot.escribir_snapshot(registro, dividendos, directorio=str(tmp_path), conservar=2) for _ in range(4)]
+
+    assert snapshot.ruta_actual(str(tmp_path)) == rutas[-1]
+    en_disco = sorted(nombre for nombre in os.listdir(tmp_path) if nombre.startswith('snapshot-'))
+    assert en_disco == [os.path.basename(ruta) for ruta in rutas[-2:]]
+    assert snapshot.VigilanteSnapshots(str(tmp_path)).actual().ruta == rutas[-1]
+
+def test_sin_snapshot_no_hay_actual(tmp_path):
+    assert snapshot.ruta_actual(str(tmp_path)) is None
+    assert snapshot.VigilanteSnapshots(str(tmp_path)).actual() is None
@@ -0,0 +1,50 @@
+import pytest
+import traducciones
+from traducciones import traducir_textos
+
+class TraductorSimulado:
+    """Como Translator.translate de googletrans 4.0.0rc1: un solo str por llamada."""
+
+    def __init__(self, falla=False):
+        self.falla = falla
+        self.llamadas = []
+
+    def __call__(self, texto, dest='en', src='auto'):
+        if not isinstance(texto, str):
+            raise TypeError("translate solo acepta un texto")
+        self.llamadas.append(texto)
+        if self.falla:
+            raise TimeoutError("sin respuesta")
+        return type("Traduccion", (), {"text": f"[{dest}] {texto}"})()
+
+@pytest.fixture
+def traductor(tmp_path, monkeypatch):
+    monkeypatch.setattr(traducciones, 'ARCHIVO_CACHE', str(tmp_path / "traducciones.json"))
+    monkeypatch.setattr(traducciones, '_cache', None)
+    monkeypatch.setattr(traducciones, '_reintentar_desde', 0.0)
+    simulado = TraductorSimulado()
+    monkeypatch.setattr(traducciones.translator, 'translate', simulado)
+    return simulado
+
+def test_traduce_cada_texto_y_guarda_en_cache(traductor):
+    assert traducir_textos(["Bonds", "Stocks", ""]) == ["[es] Bonds", "[es] Stocks", ""]
+    assert sorted(traductor.llamadas) == ["Bonds", "Stocks"]
+
+    traductor.llamadas.clear()
+    traducciones._cache = None  # se vuelve a leer del disco
+    assert traducir_textos(["Stocks", "Gold"]) == ["[es] Stocks", "[es] Gold"]
+    assert traductor.llamadas == ["Gold"]
+
+def test_un_fallo_devuelve_los_originales_y_suspende_las_llamadas(traductor):
+    traductor.falla = True
+    assert traducir_textos(["Bonds", "Stocks"]) == ["Bonds", "Stocks"]
+    llamadas = len(traductor.llamadas)
+    assert llamadas >= 1
+
+    # Durante la espera no se vuelve a llamar al traductor
+    traductor.falla = False
+    assert traducir_textos(["Gold"]) == ["Gold"]
+    assert len(traductor.llamadas) == llamadas
+
+    traducciones._reintentar_desde = 0.0
+    assert traducir_textos(["Gold"]) == ["[es] Gold"]
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from googletrans import Translator
+from descargas import en_paralelo
+from instrumentacion import instrumentacion
+
+# Archivo donde se guardan las traducciones ya hechas
+ARCHIVO_CACHE = os.environ.get("SIMULADOR_CACHE_TRADUCCIONES", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache_traducciones.json"))
+
+# Tiempo de vida de una traducción guardada (30 días) y número máximo de entradas
+TTL_SEGUNDOS = 30 * 24 * 3600
+MAXIMO_ENTRADAS = 5000
+
+# Tiempo máximo de espera a Google Translate, para no bloquear el arranque
+TIMEOUT_SEGUNDOS = 10
+
+# Tras un fallo no se vuelve a llamar a Google Translate durante este tiempo
+ESPERA_TRAS_FALLO_SEGUNDOS = 300
+
+# Inicializar el traductor
+translator = Translator(timeout=TIMEOUT_SEGUNDOS)
+
+_candado = threading.Lock()
+_cache = None
+_reintentar_desde = 0.0  # instante (time.monotonic) a partir del cual se vuelve a llamar al traductor
+
+def _clave(texto, destino):
+    """Clave de la caché: hash del idioma destino y del texto original."""
+    return hashlib.sha256(f"{destino}\0{texto}".encode("utf-8")).hexdigest()
+
+def _cargar():
+    """Carga la caché desde disco la primera vez que se necesita."""
+    global _cache
+    if _cache is None:
+        try:
+            with open(ARCHIVO_CACHE, encoding="utf-8") as archivo:
+                _cache = json.load(archivo)
+        except FileNotFoundError:
+            _cache = {}
+        except Exception as e:
+            print(f"Error al leer la caché de traducciones: {e}")
+            _cache = {}
+    return _cache
+
+def _guardar(cache):
+    """Guarda la caché en disco de forma atómica, descartando las entradas más antiguas si sobran."""
+    if len(cache) > MAXIMO_ENTRADAS:
+        antiguas = sorted(cache, key=lambda clave: cache[clave]["fecha"])[:len(cache) - MAXIMO_ENTRADAS]
+        for clave in antiguas:
+            del cache[clave]
+    ruta_temporal = f"{ARCHIVO_CACHE}.{os.getpid()}.tmp"
+    try:
+        with open(ruta_temporal, "w", encoding="utf-8") as archivo:
+            json.dump(cache, archivo, ensure_ascii=False)
+        os.replace(ruta_temporal, ARCHIVO_CACHE)
+    except Exception as e:
+        print(f"Error al guardar la caché de traducciones: {e}")
+
+def _traducir(texto, destino):
+    """
+    Traduce un texto (translate solo acepta un str) o devuelve None si falla.
+
+    Un fallo suspende las llamadas durante ESPERA_TRAS_FALLO_SEGUNDOS, para que un
+    traductor caído no añada TIMEOUT_SEGUNDOS a cada carga.
+    """
+    global _reintentar_desde
+    if time.monotonic() < _reintentar_desde:
+        return None
+    try:
+        with instrumentacion.medir('google_translate'):
+            return translator.translate(texto, dest=destino).text
+    except Exception as e:
+        print(f"Error al traducir el texto: {e}")
+        instrumentacion.registrar_fallo('traducir_textos', e)
+        _reintentar_desde = time.monotonic() + ESPERA_TRAS_FALLO_SEGUNDOS
+        return None
+
+def traducir_textos(textos, destino='es'):
+    """
+    Traduce varios textos usando la caché persistente.
+
+    Los textos que no están en la caché (o cuya traducción caducó) se traducen uno
+    por uno en un pool de hilos. Si una traducción falla, se devuelve la traducción
+    caducada si existe o, si no, el texto original.
+
+    Args:
+    textos (list): Textos a traducir.
+    destino (str): Idioma destino.
+
+    Returns:
+    list: Textos traducidos, en el mismo orden.
+    """
+    ahora = time.time()
+    with _candado:
+        cache = _cargar()
+        claves = [_clave(texto, destino) for texto in textos]
+        pendientes = {}
+        for clave, texto in zip(claves, textos):
+            entrada = cache.get(clave)
+            if texto and (entrada is None or ahora - entrada["fecha"] > TTL_SEGUNDOS):
+                pendientes[clave] = texto
+
+    instrumentacion.registrar_cache('traducciones', aciertos=len(set(claves)) - len(pendientes), fallos=len(pendientes))
+    if pendientes:
+        traducidos = en_paralelo(lambda clave: _traducir(pendientes[clave], destino), pendientes)
+        traducidos = {clave: texto for clave, texto in traducidos.items() if texto is not None}
+        if traducidos:
+            with _candado:
+                for clave, texto in traducidos.items():
+                    cache[clave] = {"texto": texto, "fecha": ahora}
+                _guardar(cache)
+
+    with _candado:
+        return [cache[clave]["texto"] if clave in cache else texto for clave, texto in zip(claves, textos)]